@@ -0,0 +1,70 @@
+import os
+import zlib
+import logging
+import serializer
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# analysis_json 中体积大、统计时用不到的字段，单独压缩存放到 analysis_payloads 表
+COLD_FIELDS = ('knowledgeAnalysis', 'incorrectQuestions')
+
+# 压缩算法：zstd（需安装 zstandard）或 zlib，未配置时优先使用 zstd
+ANALYSIS_PAYLOAD_CODEC = os.getenv('ANALYSIS_PAYLOAD_CODEC') or ('zstd' if zstandard else 'zlib')
+ANALYSIS_PAYLOAD_LEVEL = int(os.getenv('ANALYSIS_PAYLOAD_LEVEL', '6'))
+
+if ANALYSIS_PAYLOAD_CODEC == 'zstd' and zstandard is None:
+    logger.warning("未安装 zstandard，分析结果改用 zlib 压缩")
+    ANALYSIS_PAYLOAD_CODEC = 'zlib'
+
+
+def compress(data, codec=None):
+    """压缩 bytes，返回 (codec, blob)"""
+    codec = codec or ANALYSIS_PAYLOAD_CODEC
+    if codec == 'zstd':
+        return codec, zstandard.ZstdCompressor(level=ANALYSIS_PAYLOAD_LEVEL).compress(data)
+    if codec == 'zlib':
+        return codec, zlib.compress(data, ANALYSIS_PAYLOAD_LEVEL)
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def decompress(codec, blob):
+    if codec == 'zstd':
+        if zstandard is None:
+            raise RuntimeError("读取 zstd 压缩的分析结果需要安装 zstandard")
+        return zstandard.ZstdDecompressor().decompress(blob)
+    if codec == 'zlib':
+        return zlib.decompress(blob)
+    raise ValueError(f"不支持的压缩算法: {codec}")
+
+
+def split_analysis(analysis):
+    """
+    把分析结果拆为 (热数据 dict, 冷数据 dict)。
+    热数据保留在 analysis_results.analysis_json，冷数据压缩后写入 analysis_payloads。
+    """
+    hot = {key: value for key, value in analysis.items() if key not in COLD_FIELDS}
+    cold = {key: analysis[key] for key in COLD_FIELDS if key in analysis}
+    return hot, cold
+
+
+def encode_payload(cold):
+    """冷数据 -> (codec, blob)"""
+    return compress(serializer.dumps_bytes(cold))
+
+
+def decode_payload(codec, blob):
+    if blob is None:
+        return {}
+    return serializer.loads(decompress(codec, blob))
+
+
+def merge_analysis(analysis_json, codec, blob):
+    """把热数据 JSON 与压缩的冷数据还原为完整的分析结果 dict"""
+    analysis = serializer.loads(analysis_json)
+    analysis.update(decode_payload(codec, blob))
+    return analysis
@@ -1,13 +1,84 @@
+import os
 import json
 import re
+import time
 import logging
-from config import get_model
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+from batch_service import ANALYSIS_WORKERS, batcher
+from llm_service import call_model
+from prompt_codec import encode_records
+from local_analysis import generate_local_analysis
 import ast
 
 logger = logging.getLogger(__name__)
 
-def analyze_quiz_results(user_answers, quiz_json=None):
-    """分析测验结果"""
+# 分析模式：llm（模型分析，失败时降级为本地分析）、local（仅本地规则分析）、
+# fast（先返回本地分析，模型分析在后台完成后回填）
+ANALYSIS_MODES = ('llm', 'local', 'fast')
+ANALYSIS_MODE = os.getenv('ANALYSIS_MODE', 'llm')
+# 模型分析的等待上限（秒），超时后先返回本地分析
+ANALYSIS_LATENCY_BUDGET = float(os.getenv('ANALYSIS_LATENCY_BUDGET', '20'))
+# 连续失败多少次后熔断，以及熔断持续时间（秒）
+CIRCUIT_FAILURE_THRESHOLD = int(os.getenv('ANALYSIS_CIRCUIT_THRESHOLD', '3'))
+CIRCUIT_COOLDOWN = float(os.getenv('ANALYSIS_CIRCUIT_COOLDOWN', '60'))
+
+_executor = ThreadPoolExecutor(max_workers=ANALYSIS_WORKERS, thread_name_prefix='analysis')
+
+
+class CircuitBreaker:
+    """
+    模型调用熔断器：连续失败达到阈值后，在冷却时间内直接走本地分析。
+
+    冷却结束后进入半开状态，只放行一个试探请求；试探完成前其他请求仍走本地分析，
+    试探成功则关闭熔断，失败则重新开始冷却。
+    """
+
+    def __init__(self, threshold, cooldown):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at = None
+        self.probing = False
+        self._lock = threading.Lock()
+
+    def is_open(self):
+        """返回 True 表示本次请求应跳过模型；半开状态下第一个调用者成为试探请求"""
+        with self._lock:
+            if self.opened_at is None:
+                return False
+            if self.probing or time.time() - self.opened_at < self.cooldown:
+                return True
+            self.probing = True
+            return False
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self.probing = False
+
+    def record_failure(self):
+        with self._lock:
+            self.failures += 1
+            if self.probing:
+                # 试探失败，重新熔断
+                self.probing = False
+                self.opened_at = time.time()
+            elif self.failures >= self.threshold and self.opened_at is None:
+                self.opened_at = time.time()
+
+
+circuit_breaker = CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN)
+
+
+def analyze_quiz_results(user_answers, quiz_json=None, quiz_id=None, mode=None):
+    """
+    分析测验结果，传入 quiz_id 时同一测验的并发请求会被合并批量分析。
+
+    返回结果中 analysisSource 标记分析来源（llm/local）。若模型分析仍在后台进行，
+    结果中会带有 _pending（Future），调用方保存结果后应交给 schedule_knowledge_fill 回填。
+    """
     if quiz_json:
         logger.info("使用传入的quiz_json进行分析")
     else:
@@ -78,20 +149,85 @@ def analyze_quiz_results(user_answers, quiz_json=None):
     except Exception as e:
         logger.error(f"处理答案时出错: {str(e)}")
 
-    try:
-        knowledge_analysis = generate_analysis(total_questions, correct_count, incorrect_questions)
-    except Exception as e:
-        logger.error(f"生成分析时出错: {str(e)}")
-        knowledge_analysis = f"分析生成失败: {str(e)}，请稍后重试。"
+    knowledge_analysis, source, pending = resolve_knowledge_analysis(
+        quiz_id, total_questions, correct_count, incorrect_questions, mode)
 
-    return {
+    result = {
         "totalQuestions": total_questions,
         "correctCount": correct_count,
         "incorrectCount": len(incorrect_questions),
         "incorrectQuestions": incorrect_questions,
         "knowledgeAnalysis": knowledge_analysis,
+        "analysisSource": source,
         "errorIndex": binary_error_str  # 返回错误序号格式
     }
+    if pending is not None:
+        result["_pending"] = pending
+    return result
+
+
+def resolve_knowledge_analysis(quiz_id, total_questions, correct_count, incorrect_questions, mode=None):
+    """
+    按分析模式选择模型分析或本地分析。
+
+    返回 (分析文本, 来源, 未完成的模型分析 Future 或 None)。
+    """
+    mode = mode if mode in ANALYSIS_MODES else ANALYSIS_MODE
+
+    if not incorrect_questions:
+        return "恭喜！您回答了所有问题正确。", "local", None
+
+    if mode == 'local':
+        return generate_local_analysis(total_questions, correct_count, incorrect_questions), "local", None
+
+    if circuit_breaker.is_open():
+        logger.info("模型熔断中，使用本地分析")
+        return generate_local_analysis(total_questions, correct_count, incorrect_questions), "local", None
+
+    future = _executor.submit(_call_llm_analysis, quiz_id, total_questions, correct_count, incorrect_questions)
+
+    if mode == 'fast':
+        return generate_local_analysis(total_questions, correct_count, incorrect_questions), "local", future
+
+    try:
+        return future.result(timeout=ANALYSIS_LATENCY_BUDGET), "llm", None
+    except FutureTimeoutError:
+        logger.warning(f"模型分析超过 {ANALYSIS_LATENCY_BUDGET:.0f} 秒，先返回本地分析")
+        return generate_local_analysis(total_questions, correct_count, incorrect_questions), "local", future
+    except Exception as e:
+        logger.error(f"生成分析时出错: {str(e)}")
+        return generate_local_analysis(total_questions, correct_count, incorrect_questions), "local", None
+
+
+def _call_llm_analysis(quiz_id, total_questions, correct_count, incorrect_questions):
+    """调用模型生成分析（可能与同一测验的其他请求合并），并记录熔断状态"""
+    try:
+        if quiz_id and batcher.enabled:
+            text = batcher.submit(quiz_id, total_questions, correct_count,
+                                  incorrect_questions, generate_analysis)
+        else:
+            text = generate_analysis(total_questions, correct_count, incorrect_questions)
+    except Exception:
+        circuit_breaker.record_failure()
+        raise
+    circuit_breaker.record_success()
+    return text
+
+
+def schedule_knowledge_fill(pending, fill):
+    """模型分析完成后调用 fill(分析文本) 回填已保存的分析结果"""
+    def on_done(future):
+        try:
+            text = future.result()
+        except Exception as e:
+            logger.error(f"后台模型分析失败，保留本地分析: {str(e)}")
+            return
+        try:
+            fill(text)
+        except Exception as e:
+            logger.error(f"回填模型分析失败: {str(e)}")
+
+    pending.add_done_callback(on_done)
 
 
 
@@ -130,9 +266,7 @@ def create_default_quiz_json():
     }
 
 def generate_analysis(total_questions, correct_count, incorrect_questions):
-    """生成知识点分析"""
-    model = get_model()
-    
+    """调用模型生成知识点分析，失败时抛出异常"""
     # 如果没有错误题目，直接返回成功信息
     if not incorrect_questions:
         return "恭喜！您回答了所有问题正确。"
@@ -145,7 +279,7 @@ def generate_analysis(total_questions, correct_count, incorrect_questions):
     错误答案: {len(incorrect_questions)}
     
     以下是用户回答错误的题目:
-    {json.dumps(incorrect_questions, ensure_ascii=False, indent=2)}
+    {encode_records(incorrect_questions)}
     
     请提供:
     1. 用户知识点不足的区域总结
@@ -156,9 +290,9 @@ def generate_analysis(total_questions, correct_count, incorrect_questions):
     """
     
     try:
-        analysis_response = model.generate_content(analysis_prompt)
+        analysis_text = call_model('analysis', analysis_prompt)
         logger.info("成功生成知识点分析")
-        return analysis_response.text
+        return analysis_text
     except Exception as e:
         logger.error(f"生成分析失败: {str(e)}")
-        return f"生成分析失败: {str(e)}"
\ No newline at end of file
+        raise
\ No newline at end of file
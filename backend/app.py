@@ -11,9 +11,20 @@ from flask_sqlalchemy import SQLAlchemy
 import config
 from quiz_service import generate_quiz, update_survey_json
 from file_service import extract_text_from_pdf,generate_pdf_previews
-from analysis_service import analyze_quiz_results
+from analysis_service import analyze_quiz_results, schedule_knowledge_fill
+from report_service import get_or_refresh_class_report
+from metrics import metrics
+from pagination import parse_limit, parse_sort, parse_fields
+from http_cache import conditional
+import tokenizer_service
+import db_pool
+import serializer
+import compression
 from db_service import *
 
+# 批量接口单次最多请求的 ID 数
+BATCH_MAX_IDS = int(os.getenv('BATCH_MAX_IDS', '100'))
+
 # 配置日志
 logging.basicConfig(
     level=logging.DEBUG,
@@ -23,8 +34,12 @@ logger = logging.getLogger(__name__)
 
 
 app = Flask(__name__)
-CORS(app)
+CORS(app, expose_headers=["X-Next-Cursor", "ETag"])
 init_database()  # 初始化数据库
+db_pool.init_app(app)  # 每个请求从连接池借一个数据库连接复用，请求结束时归还
+serializer.init_app(app)  # jsonify 使用 orjson（未安装时回退到标准库）
+compression.init_app(app)  # 按 Accept-Encoding 压缩较大的响应
+tokenizer_service.warm_up()  # 预热分词器，避免首个词云请求承担词典加载耗时
 
 
 # 初始化配置
@@ -132,7 +147,7 @@ def create_quiz():
         selected_pages = request.form.get('selectedPages')
         if selected_pages:
             try:
-                selected_pages = json.loads(selected_pages)
+                selected_pages = serializer.loads(selected_pages)
             except json.JSONDecodeError:
                 selected_pages = None
         
@@ -174,6 +189,8 @@ def analyze_quiz():
             return jsonify({"error": "没有提供答案"}), 400
         
         quiz_id = data.get('quiz_id')
+        # 分析模式（llm/local/fast），低风险测验可指定 local 跳过模型调用
+        analysis_mode = data.get('analysisMode')
         print("quiz_id:", quiz_id)
         # 分析结果
         if quiz_id:
@@ -181,11 +198,12 @@ def analyze_quiz():
             quiz = get_quiz_by_id(quiz_id)
             if not quiz:
                 return jsonify({"error": "测验不存在"}), 404
-            result = analyze_quiz_results(data['answers'], quiz['quiz_json'])
+            result = analyze_quiz_results(data['answers'], quiz['quiz_json'], quiz_id, analysis_mode)
             print("result:", result)
         else:
             # 从本地文件分析（兼容旧版本）
-            result = analyze_quiz_results(data['answers'])
+            result = analyze_quiz_results(data['answers'], mode=analysis_mode)
+        pending = result.pop("_pending", None)
         
         # 保存分析结果到数据库
         if quiz_id and sno:
@@ -195,6 +213,11 @@ def analyze_quiz():
         if quiz_id and tno:
             analysis_id = save_teacher_analysis(tno, quiz_id, result)
             result["analysis_id"] = analysis_id
+
+        # 模型分析仍在后台进行时，完成后回填到已保存的结果
+        if pending is not None and result.get("analysis_id"):
+            analysis_id = result["analysis_id"]
+            schedule_knowledge_fill(pending, lambda text: update_analysis_knowledge(analysis_id, text))
         
         return jsonify(result), 200
         
@@ -203,16 +226,61 @@ def analyze_quiz():
         return jsonify({"error": f"测验分析失败: {str(e)}"}), 500
 
 
+def paginated_response(items, next_cursor):
+    """分页结果：响应体仍为数组，下一页游标放在 X-Next-Cursor 响应头中"""
+    response = jsonify(items)
+    if next_cursor:
+        response.headers['X-Next-Cursor'] = next_cursor
+    return response, 200
+
+
+def list_params():
+    """
+    列表接口的公共查询参数：
+        limit   每页条数（不传则返回全部）
+        cursor  上一页响应头 X-Next-Cursor 的值
+        sort    -created_at（默认，倒序）或 created_at（正序）
+        fields  逗号分隔的返回字段，如 id,title,created_at
+    参数不合法时抛出 ValueError。
+    """
+    return {
+        "limit": parse_limit(request.args.get('limit')),
+        "cursor": request.args.get('cursor'),
+        "descending": parse_sort(request.args.get('sort')),
+        "fields": parse_fields(request.args.get('fields')),
+    }
+
+
+def batch_ids():
+    """
+    批量接口的 ids 参数：逗号分隔的 ID，如 ids=3,5,8，去重后保持顺序。
+    参数缺失、不合法或超过 BATCH_MAX_IDS 个时抛出 ValueError。
+    """
+    value = request.args.get('ids', '')
+    try:
+        ids = list(dict.fromkeys(int(item) for item in value.split(',') if item.strip()))
+    except ValueError:
+        raise ValueError(f"ids 参数不合法: {value}")
+    if not ids:
+        raise ValueError("缺少 ids 参数")
+    if len(ids) > BATCH_MAX_IDS:
+        raise ValueError(f"ids 最多 {BATCH_MAX_IDS} 个")
+    return ids
+
+
 @app.route('/auto_quiz', methods=['GET'])
 def get_student_quizzes():
-    """获取所有测验"""
-    try:        
-        sno = request.args.get('sno')  
+    """获取所有测验（支持 limit、cursor、sort、fields，见 list_params）"""
+    try:
+        sno = request.args.get('sno')
         if not sno:
             return jsonify({"error": "缺少 sno 参数"}), 400
 
-        quizzes = get_all_quizzes(sno)
-        return jsonify(quizzes), 200
+        try:
+            quizzes, next_cursor = get_all_quizzes(sno, **list_params())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return paginated_response(quizzes, next_cursor)
     except Exception as e:
         logger.error(f"获取测验列表失败: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -220,7 +288,12 @@ def get_student_quizzes():
 
 @app.route('/quizzes', methods=['GET'])
 def get_quizzes():
-    """获取所有作业"""
+    """
+    获取所有作业
+
+    支持 limit、cursor、sort、fields（见 list_params），
+    学生（sno）还可按课程过滤：cno（可重复或用逗号分隔）。
+    """
     try:        
         sno = request.args.get('sno')  
         tno = request.args.get('tno')
@@ -230,17 +303,22 @@ def get_quizzes():
         if not sno and not tno:
             print("缺少 sno/tno 参数")
             return jsonify({"error": "缺少 sno tno参数"}), 400
-        if sno:
-            quizzes = get_all_quizzes4student(sno)
-        else:
-            quizzes = get_all_quizzes4teacher(tno)
-        return jsonify(quizzes), 200
+        try:
+            if sno:
+                cnos = [cno for value in request.args.getlist('cno') for cno in value.split(',') if cno]
+                quizzes, next_cursor = get_all_quizzes4student(sno, cnos=cnos, **list_params())
+            else:
+                quizzes, next_cursor = get_all_quizzes4teacher(tno, **list_params())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return paginated_response(quizzes, next_cursor)
     except Exception as e:
         logger.error(f"获取作业列表失败: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
 
 @app.route('/classes', methods=['GET'])
+@conditional(lambda: ["course"])
 def get_classes():
     """获取所有班级"""
     try:
@@ -270,7 +348,24 @@ def publish_quiz(quiz_id):
 
 
 
+@app.route('/quizzes/batch', methods=['GET'])
+def get_quizzes_batch():
+    """批量获取测验（ids=1,2,3），返回按 ids 顺序排列的数组，不存在的测验跳过"""
+    try:
+        try:
+            quiz_ids = batch_ids()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        # 直接拼接各测验缓存的响应体，不再重新序列化
+        body = b"[" + b",".join(entry.body for entry in get_quizzes_by_ids(quiz_ids)) + b"]"
+        return app.response_class(body, mimetype='application/json'), 200
+    except Exception as e:
+        logger.error(f"批量获取测验失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/quizzes/<int:quiz_id>', methods=['GET'])
+@conditional()
 def get_quiz(quiz_id):
     """获取指定ID的测验"""
     try:
@@ -278,10 +373,9 @@ def get_quiz(quiz_id):
         # sno = request.args.get('sno') 
         # if not sno:
         #     return jsonify({"error": "缺少 sno 参数"}), 400
-        quiz = get_quiz_by_id(quiz_id)
-        print(quiz)
-        if quiz:
-            return jsonify(quiz), 200
+        body = get_quiz_body(quiz_id)
+        if body:
+            return app.response_class(body, mimetype='application/json'), 200
         return jsonify({"error": "测验不存在"}), 404
     except Exception as e:
         logger.error(f"获取测验失败1: {str(e)}")
@@ -293,6 +387,7 @@ def get_analyses():
     """
         1.获取学生所有的测验分析 
         2.获取老师已发布作业的分析
+        支持 limit、cursor、sort、fields（见 list_params）
     """
     try:        
         sno = request.args.get('sno')  
@@ -301,14 +396,14 @@ def get_analyses():
         if not sno and not tno:
             print("缺少 sno/tno 参数")
             return jsonify({"error": "缺少 sno tno参数"}), 400
-        if sno:
-            print("sno")
-            quizzes = get_all_analyses(sno)
-        else:
-            print("tno")
-            quizzes = get_teacher_analyses(tno)
-            # print(quizzes)
-        return jsonify(quizzes), 200
+        try:
+            if sno:
+                quizzes, next_cursor = get_all_analyses(sno, **list_params())
+            else:
+                quizzes, next_cursor = get_teacher_analyses(tno, **list_params())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return paginated_response(quizzes, next_cursor)
     except Exception as e:
         logger.error(f"获取失败: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -317,16 +412,40 @@ def get_analyses():
 # 获取老师所有的测验分析
 @app.route('/teacher_analyses', methods=['GET'])
 def get_teacher_all_analyses():
+    """支持 limit、cursor、sort、fields（见 list_params）"""
     try:
         tno = request.args.get('tno')
-        analyses = get_t_all_analyses(tno)
-        return jsonify(analyses), 200
+        if not tno:
+            return jsonify({"error": "缺少 tno 参数"}), 400
+        try:
+            analyses, next_cursor = get_t_all_analyses(tno, **list_params())
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return paginated_response(analyses, next_cursor)
     except Exception as e:
         logger.error(f"获取测验列表失败: {str(e)}")
-    return jsonify({"error": str(e)}), 500
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/analyses/batch', methods=['GET'])
+def get_analyses_batch():
+    """批量获取学生的分析结果（ids=1,2,3&sno=...），只返回属于该学生的结果"""
+    try:
+        sno = request.args.get('sno')
+        if not sno:
+            return jsonify({"error": "缺少 sno 参数"}), 400
+        try:
+            analysis_ids = batch_ids()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(get_analyses_by_ids('sno', sno, analysis_ids)), 200
+    except Exception as e:
+        logger.error(f"批量获取分析结果失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
 
 
 @app.route('/analyses/<int:analysis_id>', methods=['GET'])
+@conditional(lambda analysis_id: [f"analysis:{analysis_id}"])
 def get_analysis(analysis_id):
     """获取学生指定ID的分析结果"""
     try:
@@ -343,7 +462,25 @@ def get_analysis(analysis_id):
         return jsonify({"error": str(e)}), 500
 
 
+@app.route('/teacher_analyses/batch', methods=['GET'])
+def get_teacher_analyses_batch():
+    """批量获取老师的分析结果（ids=1,2,3&tno=...），只返回属于该老师的结果"""
+    try:
+        tno = request.args.get('tno')
+        if not tno:
+            return jsonify({"error": "缺少 tno 参数"}), 400
+        try:
+            analysis_ids = batch_ids()
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(get_analyses_by_ids('tno', tno, analysis_ids)), 200
+    except Exception as e:
+        logger.error(f"批量获取分析结果失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
 @app.route('/teacher_analyses/<int:analysis_id>', methods=['GET'])
+@conditional(lambda analysis_id: [f"analysis:{analysis_id}"])
 def get_teacher_analysis(analysis_id):
     """获取老师指定ID的分析结果"""
     try:
@@ -361,6 +498,7 @@ def get_teacher_analysis(analysis_id):
 
 
 @app.route('/homework', methods=['GET'])
+@conditional(lambda: ["homework", "course"])
 def get_Homework():
     try:
         tno = request.args.get('tno')
@@ -374,6 +512,7 @@ def get_Homework():
 
 
 @app.route('/error-rates/<int:quiz_id>', methods=['GET'])
+@conditional(lambda quiz_id: [f"quiz:{quiz_id}"])
 def get_error_rates(quiz_id):
     try:
         error_rates = get_quiz_error_rates(quiz_id)
@@ -388,11 +527,13 @@ def get_error_rates(quiz_id):
 
 
 @app.route('/word_cloud/<int:quiz_id>', methods=['GET'])
+@conditional(lambda quiz_id: [f"quiz:{quiz_id}"])
 def get_word_cloud(quiz_id):
     try:
         word_cloud = get_word_frequence_by_qid(quiz_id)
         # print(word_cloud)
         if (word_cloud):
+            tokenizer_service.record_first_word_cloud()
             return jsonify(word_cloud), 200
         return jsonify({"error": "词云分析结果不存在"}), 404
     except Exception as e:
@@ -401,5 +542,104 @@ def get_word_cloud(quiz_id):
         return jsonify({"error": str(e)}), 500  
 
 
+@app.route('/item-analysis/<int:quiz_id>', methods=['GET'])
+@conditional(lambda quiz_id: [f"quiz:{quiz_id}"])
+def get_item_analysis_route(quiz_id):
+    """作业的题目分析：难度、区分度、干扰项与 KR-20 信度"""
+    try:
+        analysis = get_item_analysis(quiz_id)
+        if analysis:
+            return jsonify(analysis), 200
+        return jsonify({"error": "该作业暂无提交"}), 404
+    except Exception as e:
+        logger.error(f"获取题目分析失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/teacher-dashboard', methods=['GET'])
+def get_teacher_dashboard_route():
+    """教师看板：所有课程 × 作业 × 题目的错误率"""
+    try:
+        tno = request.args.get('tno')
+        if not tno:
+            return jsonify({"error": "缺少 tno 参数"}), 400
+        return jsonify(get_teacher_dashboard(tno)), 200
+    except Exception as e:
+        logger.error(f"获取教师看板失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/students/<sno>/error-rates', methods=['GET'])
+def get_student_error_rates_route(sno):
+    """获取学生在各测验上的错误率"""
+    try:
+        return jsonify(get_student_error_rates(sno)), 200
+    except Exception as e:
+        logger.error(f"获取学生错误率失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/students/<sno>/progress', methods=['GET'])
+@conditional(lambda sno: [f"student:{sno}"])
+def get_student_progress_route(sno):
+    """
+    获取学生的作答趋势：period=week（默认）或 day，
+    可选 from/to（YYYY-MM-DD）限定周期起始日期范围
+    """
+    try:
+        try:
+            progress = get_student_progress(sno, request.args.get('period', 'week'),
+                                            request.args.get('from'), request.args.get('to'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return jsonify(progress), 200
+    except Exception as e:
+        logger.error(f"获取学生进度失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/search', methods=['GET'])
+def search_route():
+    """
+    在自己的测验中搜索题目：q 为关键词，tno 或 sno 指定归属人，
+    按相关度排序，limit（默认 20）与 cursor 分页同 list_params
+    """
+    try:
+        sno = request.args.get('sno')
+        tno = request.args.get('tno')
+        if not sno and not tno:
+            return jsonify({"error": "缺少 sno/tno 参数"}), 400
+        try:
+            results, next_cursor = search_questions(
+                'tno' if tno else 'sno', tno or sno, request.args.get('q', ''),
+                parse_limit(request.args.get('limit')) or 20, request.args.get('cursor'))
+        except ValueError as e:
+            return jsonify({"error": str(e)}), 400
+        return paginated_response(results, next_cursor)
+    except Exception as e:
+        logger.error(f"搜索失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/class-report/<int:quiz_id>', methods=['GET'])
+def get_class_report_route(quiz_id):
+    """获取作业的班级整体分析报告（缓存，新增提交达到阈值后刷新）"""
+    try:
+        force = request.args.get('refresh', 'false').lower() in ('true', '1', 't')
+        report = get_or_refresh_class_report(quiz_id, force)
+        if report:
+            return jsonify(report), 200
+        return jsonify({"error": "班级报告不存在"}), 404
+    except Exception as e:
+        logger.error(f"获取班级报告失败: {str(e)}")
+        return jsonify({"error": str(e)}), 500
+
+
+@app.route('/metrics', methods=['GET'])
+def get_metrics():
+    """输出进程内指标（模型调用 token 数、耗时等）"""
+    return jsonify(metrics.snapshot()), 200
+
+
 if __name__ == "__main__":
     app.run(debug=True)
\ No newline at end of file
@@ -0,0 +1,195 @@
+import os
+import re
+import json
+import time
+import logging
+import threading
+from llm_service import call_model
+from prompt_codec import compact_json, encode_records
+
+logger = logging.getLogger(__name__)
+
+# 批处理窗口（毫秒）与单批最大学生数，窗口为 0 时关闭批处理
+BATCH_WINDOW_MS = int(os.getenv('ANALYSIS_BATCH_WINDOW_MS', '200'))
+BATCH_MAX_SIZE = int(os.getenv('ANALYSIS_BATCH_MAX_SIZE', '8'))
+# 分析线程池大小。批次内每个学生的请求都占用一个线程阻塞等待，
+# 所以单批人数实际不会超过线程数
+ANALYSIS_WORKERS = int(os.getenv('ANALYSIS_WORKERS', '8'))
+
+SECTION_PATTERN = re.compile(r'^\s*<<<STUDENT\s+(\d+)>>>\s*$', re.MULTILINE)
+
+
+class _PendingAnalysis:
+    """等待批量分析结果的单个学生请求"""
+
+    def __init__(self, total_questions, correct_count, incorrect_questions):
+        self.total_questions = total_questions
+        self.correct_count = correct_count
+        self.incorrect_questions = incorrect_questions
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+
+
+class _Batch:
+    def __init__(self):
+        self.entries = []
+        self.full = threading.Event()
+        self.closed = False
+
+
+class AnalysisBatcher:
+    """
+    将同一测验在短时间窗口内到达的多个分析请求合并为一次模型调用。
+
+    第一个到达的请求作为 leader，等待窗口结束或批次装满后发起请求，
+    其余请求阻塞等待 leader 把拆分后的结果写回。
+    """
+
+    def __init__(self, window_ms=BATCH_WINDOW_MS, max_size=BATCH_MAX_SIZE, workers=ANALYSIS_WORKERS):
+        self.window = window_ms / 1000.0
+        # 超过线程数的批次永远装不满，leader 只能白等到窗口结束
+        self.max_size = max(1, min(max_size, workers))
+        self._lock = threading.Lock()
+        self._batches = {}
+
+    @property
+    def enabled(self):
+        return self.window > 0 and self.max_size > 1
+
+    def submit(self, quiz_id, total_questions, correct_count, incorrect_questions, generate_single):
+        """提交一个学生的分析请求，返回该学生的分析文本"""
+        entry = _PendingAnalysis(total_questions, correct_count, incorrect_questions)
+
+        with self._lock:
+            batch = self._batches.get(quiz_id)
+            is_leader = batch is None
+            if is_leader:
+                batch = _Batch()
+                self._batches[quiz_id] = batch
+            batch.entries.append(entry)
+            if len(batch.entries) >= self.max_size:
+                self._close(quiz_id, batch)
+
+        if is_leader:
+            batch.full.wait(self.window)
+            with self._lock:
+                self._close(quiz_id, batch)
+            self._run(batch, generate_single)
+
+        entry.done.wait()
+        if entry.error is not None:
+            raise entry.error
+        return entry.result
+
+    def _close(self, quiz_id, batch):
+        """关闭批次，之后到达的请求会开启新批次（调用方需持有锁）"""
+        if not batch.closed:
+            batch.closed = True
+            batch.full.set()
+            if self._batches.get(quiz_id) is batch:
+                del self._batches[quiz_id]
+
+    def _run(self, batch, generate_single):
+        entries = batch.entries
+        try:
+            if len(entries) == 1:
+                entry = entries[0]
+                entry.result = generate_single(entry.total_questions, entry.correct_count,
+                                               entry.incorrect_questions)
+                return
+
+            logger.info(f"批量生成知识点分析，共 {len(entries)} 名学生")
+            sections = generate_batch_analysis(entries)
+            for i, entry in enumerate(entries, start=1):
+                if sections.get(i):
+                    entry.result = sections[i]
+                else:
+                    # 拆分失败的学生单独补一次请求
+                    logger.warning(f"批量分析结果缺少第 {i} 名学生，单独重新生成")
+                    entry.result = generate_single(entry.total_questions, entry.correct_count,
+                                                   entry.incorrect_questions)
+        except Exception as e:
+            logger.error(f"批量生成分析失败: {str(e)}")
+            for entry in entries:
+                if entry.result is None:
+                    entry.error = e
+        finally:
+            for entry in entries:
+                entry.done.set()
+
+
+def build_batch_prompt(entries):
+    """构建多名学生共用的分析提示，相同题目只出现一次"""
+    question_ids = {}
+    questions = []
+    students = []
+
+    for entry in entries:
+        wrong = []
+        for item in entry.incorrect_questions:
+            key = (item.get('question'), json.dumps(item.get('options'), ensure_ascii=False))
+            if key not in question_ids:
+                question_ids[key] = f"Q{len(questions) + 1}"
+                questions.append({
+                    "id": question_ids[key],
+                    "question": item.get('question'),
+                    "options": item.get('options'),
+                    "correctAnswer": item.get('correctAnswer'),
+                    "type": item.get('type')
+                })
+            wrong.append({"id": question_ids[key], "userAnswer": item.get('userAnswer')})
+        students.append({
+            "total": entry.total_questions,
+            "correct": entry.correct_count,
+            "incorrect": len(entry.incorrect_questions),
+            "wrong": wrong
+        })
+
+    student_lines = [
+        f"学生 {i}: {compact_json(student)}"
+        for i, student in enumerate(students, start=1)
+    ]
+
+    return f"""
+    以下是同一份测验中 {len(students)} 名学生的结果，请分别为每名学生分析知识点掌握情况并提供改进建议。
+
+    错题题库（学生错题通过 id 引用）:
+    {encode_records(questions)}
+
+    学生结果（total 为总题数，correct 为正确数，wrong 为错题 id 及该学生的作答）:
+    {chr(10).join(student_lines)}
+
+    每名学生请提供:
+    1. 用户知识点不足的区域总结
+    2. 具体的改进建议
+    3. 错误答案中发现的任何模式
+
+    输出格式要求：
+    每名学生的分析必须以单独一行的 <<<STUDENT 序号>>> 开头（例如 <<<STUDENT 1>>>），
+    紧接着是以“测试结果分析“为题目的markdown格式分析，不要输出其他内容。
+    """
+
+
+def split_batch_response(text):
+    """按 <<<STUDENT n>>> 分隔符拆分批量响应，返回 {序号: 分析文本}"""
+    sections = {}
+    matches = list(SECTION_PATTERN.finditer(text))
+    for i, match in enumerate(matches):
+        end = matches[i + 1].start() if i + 1 < len(matches) else len(text)
+        content = text[match.end():end].strip()
+        if content:
+            sections[int(match.group(1))] = content
+    return sections
+
+
+def generate_batch_analysis(entries):
+    """一次模型调用生成多名学生的分析"""
+    prompt = build_batch_prompt(entries)
+    start = time.time()
+    text = call_model('analysis_batch', prompt)
+    logger.info(f"批量分析生成成功，耗时 {time.time() - start:.2f} 秒")
+    return split_batch_response(text)
+
+
+batcher = AnalysisBatcher()
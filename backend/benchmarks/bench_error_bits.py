@@ -0,0 +1,82 @@
+"""
+errorIndex 统计基准：比较逐字符解析 JSON 文本与按位压缩 + NumPy 归约两种方式。
+
+在 backend 目录下运行:
+    python benchmarks/bench_error_bits.py [提交数] [题目数]
+"""
+import os
+import sys
+import json
+import time
+import random
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from error_matrix import pack_error_index, load_error_matrix, grouped_error_counts  # noqa: E402
+
+
+def build_rows(submissions, questions, quizzes=50):
+    rng = random.Random(42)
+    rows = []
+    for _ in range(submissions):
+        error_index = "".join('1' if rng.random() < 0.3 else '0' for _ in range(questions))
+        analysis = {
+            "totalQuestions": questions,
+            "incorrectCount": error_index.count('1'),
+            "errorIndex": error_index,
+            "knowledgeAnalysis": "x" * 800,
+        }
+        rows.append((rng.randrange(quizzes), json.dumps(analysis), pack_error_index(error_index), questions))
+    return rows
+
+
+def legacy(rows):
+    per_quiz = {}
+    for quiz_id, analysis_json, _, _ in rows:
+        analysis_data = json.loads(analysis_json)
+        question_errors = per_quiz.setdefault(quiz_id, {})
+        for i, char in enumerate(analysis_data.get("errorIndex", "")):
+            if char == '1':
+                question_errors[i + 1] = question_errors.get(i + 1, 0) + 1
+    return per_quiz
+
+
+def packed(rows):
+    matrix, _ = load_error_matrix([(row[2], row[3]) for row in rows])
+    return grouped_error_counts(matrix, [row[0] for row in rows])
+
+
+def timed(label, func, rows, repeat=3):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(rows)
+        best = min(best, time.perf_counter() - start)
+    print(f"{label:<24}{best * 1000:>10.1f} ms")
+    return best
+
+
+def main():
+    submissions = int(sys.argv[1]) if len(sys.argv) > 1 else 100_000
+    questions = int(sys.argv[2]) if len(sys.argv) > 2 else 20
+    rows = build_rows(submissions, questions)
+
+    text_bytes = sum(len(row[1]) for row in rows)
+    bits_bytes = sum(len(row[2]) for row in rows)
+    print(f"{submissions} 份提交，每份 {questions} 题")
+    print(f"analysis_json 总大小 {text_bytes / 1024:.0f} KB，error_bits 总大小 {bits_bytes / 1024:.0f} KB")
+
+    slow = timed("逐字符解析 JSON", legacy, rows)
+    fast = timed("位矩阵 + NumPy 归约", packed, rows)
+    print(f"加速 {slow / fast:.1f} 倍")
+
+    # 校验两种方式结果一致
+    groups, _, counts = packed(rows)
+    expected = legacy(rows)
+    for i, quiz_id in enumerate(groups.tolist()):
+        for q, count in expected[quiz_id].items():
+            assert counts[i, q - 1] == count
+
+
+if __name__ == "__main__":
+    main()
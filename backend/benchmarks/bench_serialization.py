@@ -0,0 +1,109 @@
+"""
+响应序列化与压缩基准：比较 Flask 默认 JSON 序列化与 serializer 模块的耗时，
+以及典型响应在不压缩 / gzip / brotli 下的传输字节数。
+
+在 backend 目录下运行:
+    python benchmarks/bench_serialization.py [重复次数]
+"""
+import os
+import sys
+import json
+import time
+import random
+import base64
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import serializer  # noqa: E402
+import compression  # noqa: E402
+
+SENTENCE = "根据材料，下列关于函数极限与连续性的说法中，正确的是哪一项？"
+
+
+def build_quiz(questions=20):
+    elements = []
+    for i in range(questions):
+        elements.append({
+            "type": "radiogroup",
+            "name": f"question{i + 1}",
+            "title": SENTENCE * 2,
+            "choices": [f"选项{c}：{SENTENCE}" for c in "ABCD"],
+            "correctAnswer": f"选项A：{SENTENCE}",
+        })
+    return {"id": 1, "title": "第三章 函数极限 - medium难度 (20题)", "created_at": "2025-03-01 10:00:00",
+            "quiz_json": {"title": "测验", "pages": [{"name": "page1", "elements": elements}]}}
+
+
+def build_history(count=200, questions=20):
+    rng = random.Random(42)
+    history = []
+    for i in range(count):
+        error_index = "".join('1' if rng.random() < 0.3 else '0' for _ in range(questions))
+        history.append({
+            "id": i + 1, "quiz_id": rng.randrange(50), "created_at": "2025-03-01 10:00:00",
+            "quiz_title": "第三章 函数极限", "file_name": "chapter3.pdf",
+            "analysis_json": {
+                "totalQuestions": questions,
+                "correctCount": error_index.count('0'),
+                "incorrectCount": error_index.count('1'),
+                "errorIndex": error_index,
+                "knowledgeAnalysis": SENTENCE * 20,
+                "incorrectQuestions": [{"question": SENTENCE, "userAnswer": "B", "correctAnswer": "A"}] * 3,
+            },
+        })
+    return history
+
+
+def build_previews(pages=10, page_bytes=150_000):
+    # 预览图是已压缩的 PNG，用随机字节近似其熵
+    rng = random.Random(42)
+    previews = [{"page": i + 1, "image": "data:image/png;base64,"
+                 + base64.b64encode(rng.randbytes(page_bytes)).decode('ascii')} for i in range(pages)]
+    return {"success": True, "previews": previews, "totalPages": pages}
+
+
+def flask_default(obj):
+    # Flask DefaultJSONProvider 的默认行为：ensure_ascii、sort_keys
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True).encode('utf-8')
+
+
+def best_of(func, repeat):
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        best = min(best, time.perf_counter() - start)
+    return best * 1000, result
+
+
+def main():
+    repeat = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+    payloads = [("测验详情", build_quiz()), ("分析历史 200 条", build_history()), ("PDF 预览 10 页", build_previews())]
+    print(f"序列化实现: {serializer.JSON_BACKEND}，可用压缩: {', '.join(compression.ENCODINGS)}")
+
+    print(f"\n{'响应':<16}{'标准库 ms':>12}{serializer.JSON_BACKEND + ' ms':>12}{'加速':>8}")
+    for label, payload in payloads:
+        slow, _ = best_of(lambda: flask_default(payload), repeat)
+        fast, _ = best_of(lambda: serializer.dumps_bytes(payload), repeat)
+        print(f"{label:<16}{slow:>12.2f}{fast:>12.2f}{slow / fast:>7.1f}x")
+
+    print(f"\n{'响应':<16}{'标准库 KB':>12}{'未压缩 KB':>12}", end="")
+    for encoding in compression.ENCODINGS:
+        print(f"{encoding + ' KB':>10}{encoding + ' ms':>10}", end="")
+    print()
+    for label, payload in payloads:
+        default_size = len(flask_default(payload))
+        data = serializer.dumps_bytes(payload)
+        print(f"{label:<16}{default_size / 1024:>12.1f}{len(data) / 1024:>12.1f}", end="")
+        for encoding in compression.ENCODINGS:
+            elapsed, compressed = best_of(lambda: compression.compress(data, encoding), max(1, repeat // 4))
+            print(f"{len(compressed) / 1024:>10.1f}{elapsed:>10.2f}", end="")
+        print()
+
+    # 校验两种序列化结果一致
+    for _, payload in payloads:
+        assert json.loads(flask_default(payload)) == serializer.loads(serializer.dumps_bytes(payload))
+
+
+if __name__ == "__main__":
+    main()
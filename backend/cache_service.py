@@ -0,0 +1,147 @@
+import os
+import time
+import uuid
+import hashlib
+import threading
+from collections import OrderedDict
+from metrics import metrics
+
+# 缓存条目的最长存活时间（秒），作为多进程部署下版本号不同步时的兜底
+CACHE_TTL = float(os.getenv('CACHE_TTL', '300'))
+
+
+class VersionRegistry:
+    """
+    按作用域维护的数据版本号，写操作递增对应作用域的版本号，
+    缓存条目记录其依赖作用域的版本号，任一版本变化即视为失效。
+
+    作用域约定：quiz:<id>（该测验有新提交或分析被回填）、analysis:<id>（该分析结果被修改）、
+    homework（作业布置发生变化）、表名（经 db_sqlite 通用增删改写入该表）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._versions = {}
+        # 版本号只存在于进程内存，重启后从 0 开始，用进程标识区分重启前后的版本
+        self.epoch = uuid.uuid4().hex
+
+    def bump(self, *scopes):
+        with self._lock:
+            for scope in scopes:
+                self._versions[scope] = self._versions.get(scope, 0) + 1
+
+    def get(self, scope):
+        return self._versions.get(scope, 0)
+
+    def snapshot(self, scopes):
+        return {scope: self.get(scope) for scope in scopes}
+
+    def token(self, scopes):
+        """
+        scopes 当前版本的摘要，用于 HTTP ETag。
+        包含进程标识与 CACHE_TTL 时间片：多进程部署下其他进程的写入最多 CACHE_TTL 秒后也会体现出来。
+        """
+        state = (self.epoch, int(time.time() // CACHE_TTL), sorted(self.snapshot(scopes).items()))
+        return hashlib.blake2b(repr(state).encode('utf-8'), digest_size=8).hexdigest()
+
+
+versions = VersionRegistry()
+
+
+class DependencyCache:
+    """按依赖作用域版本号失效的内存缓存"""
+
+    def __init__(self, ttl=CACHE_TTL):
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries = {}
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return None
+        value, dependencies, created_at = entry
+        if time.time() - created_at > self.ttl or versions.snapshot(dependencies) != dependencies:
+            with self._lock:
+                self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key, value, dependencies):
+        """dependencies 为计算 value 之前取得的版本快照"""
+        with self._lock:
+            self._entries[key] = (value, dependencies, time.time())
+
+
+class LRUCache:
+    """
+    按占用字节数限额的 LRU 缓存，命中/未命中/淘汰次数与占用情况记录到 metrics（cache.<name>.*）。
+
+    get_or_load 对同一个键的并发未命中只调用一次 loader，其余请求等待其结果。
+    """
+
+    def __init__(self, name, max_bytes):
+        self.name = name
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (value, size)
+        self._loading = {}  # key -> Lock
+        self.bytes = 0
+
+    def _lookup(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                self._entries.move_to_end(key)
+        return entry
+
+    def get(self, key):
+        entry = self._lookup(key)
+        metrics.incr(f"cache.{self.name}.{'hits' if entry else 'misses'}")
+        return entry[0] if entry else None
+
+    def set(self, key, value, size):
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._entries[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self.bytes -= evicted_size
+                metrics.incr(f"cache.{self.name}.evictions")
+            metrics.gauge(f"cache.{self.name}.bytes", self.bytes)
+            metrics.gauge(f"cache.{self.name}.entries", len(self._entries))
+
+    def get_or_load(self, key, loader):
+        """
+        未命中时调用 loader()，其返回 (value, size) 或 None（不缓存）。
+        返回缓存或新加载的 value，loader 返回 None 时返回 None。
+        """
+        entry = self._lookup(key)
+        if entry is None:
+            with self._lock:
+                lock = self._loading.setdefault(key, threading.Lock())
+            with lock:
+                # 等锁期间其他请求可能已经加载完成
+                entry = self._lookup(key)
+                if entry is None:
+                    return self._load(key, loader)
+        metrics.incr(f"cache.{self.name}.hits")
+        return entry[0]
+
+    def _load(self, key, loader):
+        metrics.incr(f"cache.{self.name}.misses")
+        loaded = None
+        try:
+            loaded = loader()
+            if loaded is not None:
+                self.set(key, *loaded)
+        finally:
+            with self._lock:
+                self._loading.pop(key, None)
+        return loaded[0] if loaded is not None else None
@@ -0,0 +1,74 @@
+import os
+import gzip
+from flask import request
+from metrics import metrics
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 响应体不小于该字节数时才压缩，过小的响应压缩收益抵不上开销
+COMPRESS_MIN_SIZE = int(os.getenv('COMPRESS_MIN_SIZE', '1024'))
+COMPRESS_GZIP_LEVEL = int(os.getenv('COMPRESS_GZIP_LEVEL', '6'))
+COMPRESS_BROTLI_QUALITY = int(os.getenv('COMPRESS_BROTLI_QUALITY', '5'))
+
+COMPRESSIBLE_MIMETYPES = ('application/json', 'text/html', 'text/plain', 'text/css', 'application/javascript')
+
+# 按优先级排列的可用编码，brotli 需安装 brotli
+ENCODINGS = ('br', 'gzip') if brotli else ('gzip',)
+
+
+def compress(data, encoding):
+    if encoding == 'br':
+        return brotli.compress(data, quality=COMPRESS_BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=COMPRESS_GZIP_LEVEL)
+
+
+def choose_encoding(accept_encodings):
+    """根据请求的 Accept-Encoding 选择编码，客户端都不接受时返回 None"""
+    for encoding in ENCODINGS:
+        if accept_encodings[encoding]:
+            return encoding
+    return None
+
+
+def encoded_etag(etag, encoding):
+    """同一资源不同编码的表示使用不同的 ETag"""
+    return f"{etag}-{encoding}"
+
+
+def etag_variants(etag):
+    """资源 ETag 可能以哪些形式出现在 If-None-Match 中"""
+    return [etag] + [encoded_etag(etag, encoding) for encoding in ENCODINGS]
+
+
+def compress_response(response):
+    response.vary.add('Accept-Encoding')
+    if (response.status_code != 200 or response.direct_passthrough
+            or 'Content-Encoding' in response.headers
+            or response.mimetype not in COMPRESSIBLE_MIMETYPES
+            or 'no-transform' in response.headers.get('Cache-Control', '')):
+        return response
+
+    encoding = choose_encoding(request.accept_encodings)
+    if encoding is None:
+        return response
+
+    data = response.get_data()
+    if len(data) < COMPRESS_MIN_SIZE:
+        return response
+
+    compressed = compress(data, encoding)
+    response.set_data(compressed)
+    response.headers['Content-Encoding'] = encoding
+    etag, weak = response.get_etag()
+    if etag:
+        response.set_etag(encoded_etag(etag, encoding), weak=weak)
+    metrics.incr(f'http.compressed.{encoding}')
+    metrics.observe('http.compression_ratio', len(compressed) / len(data))
+    return response
+
+
+def init_app(app):
+    app.after_request(compress_response)
@@ -4,20 +4,35 @@ import logging
 import httpx
 from dotenv import load_dotenv
 import google.generativeai as genai
+from model_backend import (DEFAULT_EXAMPLE_JSON, RecordingBackend, ReplayBackend,
+                           SyntheticBackend)
 
 # 全局变量
 model = None
 logger = logging.getLogger(__name__)
 
+# 其他模块在导入时读取可选配置，因此需要在 config 被导入时就加载 .env
+load_dotenv()
+
 def init_configuration():
-    """初始化所有配置"""
+    """
+    初始化所有配置
+
+    MODEL_BACKEND 选择模型后端：gemini（默认）、record（调用 Gemini 并录制）、
+    replay（回放录制文件）、synthetic（本地合成响应）。后两者不需要网络和 API 密钥。
+    """
     global model
     
-    # 配置代理
-    setup_proxy()
-    
     # 加载环境变量
     load_dotenv()
+
+    backend = os.getenv('MODEL_BACKEND', 'gemini')
+    if backend in ('replay', 'synthetic'):
+        model = create_offline_backend(backend)
+        return
+
+    # 配置代理
+    setup_proxy()
     
     try:
         # 配置 Gemini API
@@ -60,10 +75,31 @@ def init_configuration():
         except Exception as e:
             logger.error(f"Gemini API 配置失败: {str(e)}")
             raise
+
+        if backend == 'record':
+            record_file = os.getenv('LLM_RECORD_FILE', 'llm_recordings.jsonl')
+            model = RecordingBackend(model, record_file)
+            logger.info(f"模型响应将录制到 {record_file}")
         
     except Exception as e:
         logger.error(f"初始化失败: {str(e)}", exc_info=True)
         raise
+def create_offline_backend(backend):
+    """创建不依赖网络的模型后端"""
+    os.environ.setdefault('EXAMPLE_JSON', json.dumps(DEFAULT_EXAMPLE_JSON, ensure_ascii=False))
+    latency = os.getenv('LLM_SIMULATED_LATENCY_MS', '0')
+    synthetic = SyntheticBackend(0 if latency == 'recorded' else float(latency))
+
+    if backend == 'synthetic':
+        logger.info("使用合成模型后端")
+        return synthetic
+
+    record_file = os.getenv('LLM_RECORD_FILE', 'llm_recordings.jsonl')
+    # 回放时 LLM_SIMULATED_LATENCY_MS=recorded 表示按录制时的实际耗时等待
+    fallback = synthetic if os.getenv('LLM_REPLAY_MISS', 'synthetic') == 'synthetic' else None
+    logger.info(f"使用回放模型后端: {record_file}")
+    return ReplayBackend(record_file, None if latency == 'recorded' else float(latency), fallback)
+
 def setup_proxy():
     """设置网络代理"""
     # 只在非生产环境使用代理
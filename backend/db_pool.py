@@ -0,0 +1,169 @@
+import os
+import queue
+import sqlite3
+import logging
+import threading
+from contextlib import contextmanager
+from flask import g, has_app_context
+
+logger = logging.getLogger(__name__)
+
+# 连接参数，均可通过环境变量调整
+DB_JOURNAL_MODE = os.getenv('DB_JOURNAL_MODE', 'WAL')
+DB_SYNCHRONOUS = os.getenv('DB_SYNCHRONOUS', 'NORMAL')  # WAL 模式下 NORMAL 不会损坏数据库
+DB_CACHE_SIZE_KB = int(os.getenv('DB_CACHE_SIZE_KB', '65536'))  # 每个连接的页缓存（KB）
+DB_MMAP_SIZE = int(os.getenv('DB_MMAP_SIZE', str(256 * 1024 * 1024)))
+DB_BUSY_TIMEOUT_MS = int(os.getenv('DB_BUSY_TIMEOUT_MS', '5000'))
+DB_STATEMENT_CACHE = int(os.getenv('DB_STATEMENT_CACHE', '512'))  # 每个连接缓存的预编译语句数
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', '8'))  # 每个数据库文件保留的空闲连接数
+
+
+class ConnectionPool:
+    """
+    所有线程共享的有界 SQLite 连接池。
+
+    每个数据库文件保留最多 DB_POOL_SIZE 个空闲连接，打开时统一设置 WAL 和性能相关的 PRAGMA，
+    页缓存和预编译语句缓存随连接跨请求、跨线程复用（开发服务器每个请求都是新线程也能复用）。
+    空闲连接用尽时临时打开新连接，归还时若空闲队列已满则关闭，因此嵌套获取连接不会阻塞，
+    内外层也各自持有独立连接，内层提交或回滚不影响外层事务。
+    """
+
+    def __init__(self, size=DB_POOL_SIZE):
+        self.size = max(1, size)
+        self._lock = threading.Lock()
+        self._idle = {}  # path -> 空闲连接队列
+        self._paths = {}  # 借出的连接 -> path
+        self._local = threading.local()
+
+    def _open(self, path):
+        conn = sqlite3.connect(
+            path,
+            timeout=DB_BUSY_TIMEOUT_MS / 1000,
+            cached_statements=DB_STATEMENT_CACHE,
+            check_same_thread=False,
+        )
+        conn.execute(f"PRAGMA journal_mode = {DB_JOURNAL_MODE}")
+        conn.execute(f"PRAGMA synchronous = {DB_SYNCHRONOUS}")
+        conn.execute(f"PRAGMA cache_size = -{DB_CACHE_SIZE_KB}")
+        conn.execute(f"PRAGMA mmap_size = {DB_MMAP_SIZE}")
+        conn.execute(f"PRAGMA busy_timeout = {DB_BUSY_TIMEOUT_MS}")
+        return conn
+
+    def _borrowed(self):
+        """当前线程借出且尚未归还的连接，请求结束时据此清理"""
+        if not hasattr(self._local, 'borrowed'):
+            self._local.borrowed = []
+        return self._local.borrowed
+
+    def get(self, path):
+        """借出一个连接，用完后必须调用 release"""
+        with self._lock:
+            idle = self._idle.setdefault(path, queue.LifoQueue(self.size))
+        try:
+            conn = idle.get_nowait()
+        except queue.Empty:
+            conn = self._open(path)
+        with self._lock:
+            self._paths[conn] = path
+        conn.row_factory = None
+        self._borrowed().append(conn)
+        return conn
+
+    def release(self, conn):
+        """归还连接：未提交的事务会被回滚；空闲队列已满时直接关闭"""
+        with self._lock:
+            path = self._paths.pop(conn, None)
+        borrowed = self._borrowed()
+        if conn in borrowed:
+            borrowed.remove(conn)
+        if path is None:
+            return
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+            self._idle[path].put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn.close()
+
+    def reset(self):
+        """归还当前线程所有仍被借出的连接（请求结束时调用）"""
+        for conn in list(self._borrowed()):
+            logger.warning("请求结束时连接仍未归还")
+            self.release(conn)
+
+    def close_all(self):
+        """关闭所有空闲连接"""
+        with self._lock:
+            idles = list(self._idle.values())
+        for idle in idles:
+            while True:
+                try:
+                    idle.get_nowait().close()
+                except queue.Empty:
+                    break
+
+
+pool = ConnectionPool()
+
+
+def _request_connections():
+    """当前请求（应用上下文）持有的连接：path -> [连接, 当前借出次数]"""
+    if 'db_connections' not in g:
+        g.db_connections = {}
+    return g.db_connections
+
+
+def get_connection(path):
+    """
+    借出连接，用完后必须调用 release_connection。
+
+    在 Flask 请求中，同一请求对同一数据库的多次借出共用一个连接（首次借出时从池中取出，
+    请求结束时归还）；外层尚未释放时的嵌套借出另取一个池中连接，避免内层提交或回滚外层事务。
+    请求之外（写入线程、后台线程、manage.py）直接使用连接池。
+    """
+    if not has_app_context():
+        return pool.get(path)
+    entries = _request_connections()
+    entry = entries.get(path)
+    if entry is None:
+        entry = entries[path] = [pool.get(path), 0]
+    if entry[1] > 0:
+        return pool.get(path)
+    entry[1] += 1
+    conn = entry[0]
+    conn.row_factory = None
+    return conn
+
+
+def release_connection(conn):
+    """归还连接：请求的连接只回滚未提交的事务，留到请求结束再还给连接池"""
+    if has_app_context():
+        for entry in _request_connections().values():
+            if entry[0] is conn:
+                entry[1] -= 1
+                if conn.in_transaction:
+                    conn.rollback()
+                return
+    pool.release(conn)
+
+
+@contextmanager
+def connection(path):
+    """借出连接的上下文管理器：正常结束时提交、异常时回滚，最后归还连接"""
+    conn = get_connection(path)
+    try:
+        with conn:
+            yield conn
+    finally:
+        release_connection(conn)
+
+
+def init_app(app):
+    """请求结束时把请求的连接还给连接池，并归还遗漏的连接，使每个请求都从干净的连接开始"""
+    @app.teardown_appcontext
+    def release_request_connections(exception=None):
+        for path, (conn, borrowed) in g.pop('db_connections', {}).items():
+            if borrowed > 0:
+                logger.warning(f"请求结束时连接仍未归还: {path}")
+            pool.release(conn)
+        pool.reset()
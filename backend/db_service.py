@@ -1,21 +1,68 @@
 import sqlite3
-import json
+import re
 import time
 import logging
 import os
-import jieba
 from collections import Counter
 from pathlib import Path
+import numpy as np
+from error_matrix import pack_error_index, load_error_matrix, grouped_error_counts
+from item_analysis import response_matrix, item_difficulty, point_biserial, kr20, finite_or_none
+import serializer
+from cache_service import versions, DependencyCache, LRUCache
+from pagination import fetch_page, encode_cursor, decode_cursor
+from migrations import (migrate, PROGRESS_PERIODS, rebuild_quiz_stats, rebuild_student_progress,
+                        rebuild_question_rows)
+from question_rows import answer_key, correct_options, insert_quiz_questions, insert_responses
+from search_index import SEARCH_WEIGHTS, search_rows, insert_search_rows, match_query, rebuild_search_index
+from word_counts import count_words, update_word_counts, rebuild_word_counts
+from db_pool import get_connection, release_connection, connection
+from write_queue import writer
+from analysis_payload import split_analysis, encode_payload, merge_analysis
 
 logger = logging.getLogger(__name__)
 
 DB_FILE = "database.db"
 
-with open('stop_words.txt', 'r', encoding='utf-8') as f:
-    STOP_WORDS = {line.strip() for line in f if line.strip()}
+# 教师看板缓存，新提交或作业变化时失效
+dashboard_cache = DependencyCache()
+# 作业题目分析缓存，该测验有新提交时失效
+item_analysis_cache = DependencyCache()
+
+# 测验保存后不再修改，解析后的测验按 LRU 常驻内存
+QUIZ_CACHE_MAX_BYTES = int(os.getenv('QUIZ_CACHE_MAX_BYTES', str(64 * 1024 * 1024)))
+# 解析后的 Python 对象通常是 JSON 文本的数倍大小，按此系数估算缓存占用
+PARSED_SIZE_FACTOR = 4
+quiz_cache = LRUCache('quiz', QUIZ_CACHE_MAX_BYTES)
+
+# 列表接口可返回的字段（fields 参数的白名单），只包含轻量列，不含 quiz_json/analysis_json
+QUIZ_LIST_COLUMNS = {
+    'id': 'q.id',
+    'title': 'q.title',
+    'file_name': 'q.file_name',
+    'question_count': 'q.question_count',
+    'difficulty': 'q.difficulty',
+    'created_at': 'q.created_at',
+}
+HOMEWORK_LIST_COLUMNS = dict(QUIZ_LIST_COLUMNS, cname='c.cname', cno='c.cno')
+ANALYSIS_LIST_COLUMNS = {
+    'id': 'ar.id',
+    'quiz_id': 'ar.quiz_id',
+    'created_at': 'ar.created_at',
+    'quiz_title': 'q.title',
+    'file_name': 'q.file_name',
+}
+
+# 读取完整分析结果：热数据列 + 压缩的冷数据（knowledgeAnalysis、incorrectQuestions）。
+# 列名逐一列出，error_bits 等仅供统计的列不会进入接口响应
+ANALYSIS_DETAIL_SQL = '''
+SELECT ar.id, ar.sno, ar.tno, ar.quiz_id, ar.analysis_json, ar.created_at, p.codec, p.payload
+FROM analysis_results ar
+LEFT JOIN analysis_payloads p ON p.analysis_id = ar.id
+'''
 
 def init_database():
-    """初始化数据库，创建必要的表"""
+    """初始化数据库：执行尚未应用的结构迁移（见 migrations.py）"""
     conn = None
     try:
         # 确保数据库目录存在
@@ -23,37 +70,11 @@ def init_database():
         if not db_path.parent.exists():
             db_path.parent.mkdir(parents=True)
 
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        # 创建 quizzes 表，存储测验题目，并添加 sno
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS quizzes (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sno TEXT NOT NULL,  -- 存储学号，确保不同用户的数据分开
-            tno TEXT NOT NULL,  -- 存储老师号，确保不同用户的数据分开
-            title TEXT NOT NULL,
-            file_name TEXT,
-            quiz_json TEXT NOT NULL,
-            question_count INTEGER,
-            difficulty TEXT,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-        )
-        ''')
-
-        # 创建 analysis_results 表，存储分析结果，并添加 sno
-        cursor.execute('''
-        CREATE TABLE IF NOT EXISTS analysis_results (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            sno TEXT NOT NULL,  -- 存储学号，确保分析数据与用户绑定
-            quiz_id INTEGER,
-            analysis_json TEXT NOT NULL,
-            created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
-            FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
-        )
-        ''')
+        conn = get_connection(DB_FILE)
+        applied = migrate(conn)
+        if applied:
+            logger.info(f"数据库结构已升级到版本 {applied[-1]}")
 
-        conn.commit()
         logger.info("数据库初始化成功")
     except Exception as e:
         logger.error(f"数据库初始化失败: {str(e)}")
@@ -62,415 +83,700 @@ def init_database():
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
 
 def save_quiz(tno, sno, title, file_name, quiz_json, question_count, difficulty):
     """保存测验题目到数据库，并绑定学号 sno"""
+    quiz_json_text = serializer.dumps(quiz_json)
+    # 分词在调用线程中完成，写入线程只负责插入
+    search_index_rows = search_rows(tno, sno, title, file_name, quiz_json)
+
+    def apply(cursor):
+        quiz_id = insert_quiz(cursor, tno, sno, title, file_name, quiz_json_text, question_count, difficulty)
+        insert_quiz_questions(cursor, quiz_id, quiz_json)
+        insert_search_rows(cursor, quiz_id, search_index_rows)
+        return quiz_id
+
+    try:
+        quiz_id = writer.execute(DB_FILE, apply)
+        logger.info(f"测验保存成功，ID: {quiz_id}，教师号：{tno}，学号: {sno}")
+        return quiz_id
+    except Exception as e:
+        logger.error(f"保存测验失败: {str(e)}")
+        raise
+
+
+def insert_quiz(cursor, tno, sno, title, file_name, quiz_json_text, question_count, difficulty):
+    cursor.execute('''
+    INSERT INTO quizzes (tno, sno, title, file_name, quiz_json, question_count, difficulty)
+    VALUES (?, ?, ?, ?, ?, ?,?)
+    ''', (tno, sno, title, file_name, quiz_json_text, question_count, difficulty))
+    return cursor.lastrowid
+
+
+def save_analysis(sno, quiz_id, analysis_json):
+    """保存学生分析结果到数据库，并绑定学号 sno"""
+    try:
+        analysis_id = submit_analysis(sno, None, quiz_id, analysis_json)
+        versions.bump(f"quiz:{quiz_id}", f"student:{sno}")
+        logger.info(f"分析结果保存成功，ID: {analysis_id}，学号: {sno}")
+        return analysis_id
+    except Exception as e:
+        logger.error(f"保存分析结果失败: {str(e)}")
+        raise
+
+def save_teacher_analysis(tno, quiz_id, analysis_json):
+    """保存教师分析结果到数据库，并绑定tno"""
+    try:
+        analysis_id = submit_analysis(None, tno, quiz_id, analysis_json)
+        versions.bump(f"quiz:{quiz_id}")
+        logger.info(f"分析结果保存成功，ID: {analysis_id}，教师号: {tno}")
+        return analysis_id
+    except Exception as e:
+        logger.error(f"保存分析结果失败: {str(e)}")
+        raise
+
+
+def submit_analysis(sno, tno, quiz_id, analysis_json):
+    """
+    序列化、分词在调用线程中完成，写入交给写合并队列，
+    插入分析结果与更新聚合表在同一个保存点内，返回新分析结果 ID。
+    """
+    error_index = analysis_json.get("errorIndex", "")
+    hot, cold = split_analysis(analysis_json)
+    codec, payload = encode_payload(cold)
+    row = (sno, tno, quiz_id, serializer.dumps(hot), pack_error_index(error_index), len(error_index),
+           hot.get("totalQuestions"), hot.get("correctCount"), hot.get("incorrectCount"))
+    word_counts = count_words(analysis_json.get("knowledgeAnalysis", ""))
+
+    def apply(cursor):
+        cursor.execute('''
+        INSERT INTO analysis_results (sno, tno, quiz_id, analysis_json, error_bits, question_count,
+                                      total_questions, correct_count, incorrect_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', row)
+        analysis_id = cursor.lastrowid
+        cursor.execute('''
+        INSERT INTO analysis_payloads (analysis_id, codec, payload) VALUES (?, ?, ?)
+        ''', (analysis_id, codec, payload))
+        if sno is not None:
+            update_quiz_stats(cursor, quiz_id, analysis_json)
+        update_word_counts(cursor, quiz_id, word_counts)
+        insert_responses(cursor, analysis_id, quiz_id, sno, analysis_json)
+        if sno is not None:
+            update_student_progress(cursor, analysis_id)
+        return analysis_id
+
+    return writer.execute(DB_FILE, apply)
+
+
+def update_student_progress(cursor, analysis_id):
+    """在保存分析结果的同一事务中把该次作答累加到学生的日/周汇总"""
+    for period, period_start in PROGRESS_PERIODS.items():
+        cursor.execute(f'''
+        INSERT INTO student_progress (sno, period, period_start, attempts, questions, correct, incorrect)
+        SELECT sno, ?, {period_start}, 1, COALESCE(total_questions, 0),
+               COALESCE(correct_count, 0), COALESCE(incorrect_count, 0)
+        FROM analysis_results
+        WHERE id = ?
+        ON CONFLICT(sno, period, period_start) DO UPDATE SET
+            attempts = attempts + excluded.attempts,
+            questions = questions + excluded.questions,
+            correct = correct + excluded.correct,
+            incorrect = incorrect + excluded.incorrect
+        ''', (period, analysis_id))
+
+
+def get_student_progress(sno, period='week', start=None, end=None):
+    """
+    获取学生按日（period=day）或按周（period=week）的作答汇总，按周期起始日期升序。
+    start/end 为 YYYY-MM-DD，限定周期起始日期范围（含两端）。
+
+    返回:
+        list: [{period_start, attempts, questions, correct, incorrect, accuracy}]
+    """
+    if period not in PROGRESS_PERIODS:
+        raise ValueError(f"period 只支持 {', '.join(PROGRESS_PERIODS)}")
+    for value in (start, end):
+        if value and not re.fullmatch(r'\d{4}-\d{2}-\d{2}', value):
+            raise ValueError(f"日期格式应为 YYYY-MM-DD: {value}")
+
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        
+
         cursor.execute('''
-        INSERT INTO quizzes (tno, sno, title, file_name, quiz_json, question_count, difficulty)
-        VALUES (?, ?, ?, ?, ?, ?,?)
-        ''', (tno, sno, title, file_name, json.dumps(quiz_json), question_count, difficulty))
-        
-        quiz_id = cursor.lastrowid
+        SELECT period_start, attempts, questions, correct, incorrect
+        FROM student_progress
+        WHERE sno = ? AND period = ? AND period_start BETWEEN ? AND ?
+        ORDER BY period_start
+        ''', (sno, period, start or '0000-00-00', end or '9999-99-99'))
+
+        progress = []
+        for row in cursor.fetchall():
+            item = dict(row)
+            item['accuracy'] = row['correct'] / row['questions'] if row['questions'] else 0
+            progress.append(item)
+        return progress
+    except Exception as e:
+        logger.error(f"获取学生进度失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def backfill_student_progress():
+    """根据已有分析结果重建 student_progress，返回汇总行数"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        count = rebuild_student_progress(conn.cursor())
         conn.commit()
-        logger.info(f"测验保存成功，ID: {quiz_id}，教师号：{tno}，学号: {sno}")
-        return quiz_id
+        logger.info(f"学生进度汇总重建完成，共 {count} 行")
+        return count
     except Exception as e:
-        logger.error(f"保存测验失败: {str(e)}")
+        logger.error(f"重建学生进度汇总失败: {str(e)}")
         if conn:
             conn.rollback()
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+def update_quiz_stats(cursor, quiz_id, analysis):
+    """在保存分析结果的同一事务中累加测验的错误率聚合，只统计学生提交（sno 非空）"""
+    cursor.execute('''
+    INSERT INTO quiz_stats (quiz_id, submission_count, incorrect_count, total_questions)
+    VALUES (?, 1, ?, ?)
+    ON CONFLICT(quiz_id) DO UPDATE SET
+        submission_count = submission_count + 1,
+        incorrect_count = incorrect_count + excluded.incorrect_count,
+        total_questions = MAX(total_questions, excluded.total_questions)
+    ''', (quiz_id, analysis.get("incorrectCount", 0), analysis.get("totalQuestions", 0)))
+
+    error_index = analysis.get("errorIndex", "")
+    cursor.executemany('''
+    INSERT INTO quiz_question_stats (quiz_id, question_no, error_count)
+    VALUES (?, ?, 1)
+    ON CONFLICT(quiz_id, question_no) DO UPDATE SET error_count = error_count + 1
+    ''', [(quiz_id, i + 1) for i, char in enumerate(error_index) if char == '1'])
+
+
+def quiz_error_rate(submission_count, incorrect_count, total_questions):
+    """测验总体错误率：错题总数 / (提交次数 × 题目数)，/error-rates 与教师看板共用"""
+    if not submission_count or not total_questions:
+        return 0
+    return incorrect_count / (submission_count * total_questions)
+
+
+def backfill_quiz_stats():
+    """根据已有分析结果重建 quiz_stats 与 quiz_question_stats，返回处理的分析结果数"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        count = rebuild_quiz_stats(conn.cursor())
+        conn.commit()
+        logger.info(f"错误率聚合重建完成，共处理 {count} 条分析结果")
+        return count
+    except Exception as e:
+        logger.error(f"重建错误率聚合失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
 
 
-def save_analysis(sno, quiz_id, analysis_json):
-    """保存学生分析结果到数据库，并绑定学号 sno"""
+def backfill_word_counts():
+    """根据已有分析结果重建 quiz_word_counts，返回处理的分析结果数"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        INSERT INTO analysis_results (sno, quiz_id, analysis_json)
-        VALUES (?, ?, ?)
-        ''', (sno, quiz_id, json.dumps(analysis_json)))
-        
-        analysis_id = cursor.lastrowid
+        conn = get_connection(DB_FILE)
+        count = rebuild_word_counts(conn.cursor())
         conn.commit()
-        logger.info(f"分析结果保存成功，ID: {analysis_id}，学号: {sno}")
-        return analysis_id
+        logger.info(f"词频索引重建完成，共处理 {count} 条分析结果")
+        return count
     except Exception as e:
-        logger.error(f"保存分析结果失败: {str(e)}")
+        logger.error(f"重建词频索引失败: {str(e)}")
         if conn:
             conn.rollback()
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+
+def search_questions(owner_column, owner, query, limit=20, cursor=None):
+    """
+    在 owner（owner_column 为 tno 或 sno）的测验中全文搜索，按 bm25 相关度排序分页。
+    question_no 为 0 的结果表示测验标题或文件名命中。
+
+    返回:
+        tuple: (结果列表, 下一页游标或 None)，结果为
+               [{quiz_id, question_no, quiz_title, file_name, question, type, choices, score}]
+    """
+    offset = decode_cursor(cursor, 1)[0] if cursor else 0
+    if not isinstance(offset, int) or offset < 0:
+        raise ValueError(f"无效的游标: {cursor}")
+    expression = match_query(query, owner_column, owner)
 
-def save_teacher_analysis(tno, quiz_id, analysis_json):
-    """保存教师分析结果到数据库，并绑定tno"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor_obj = conn.cursor()
+
+        # 先在全文索引内排序分页，再关联测验与题目取原文
+        cursor_obj.execute(f'''
+        SELECT s.quiz_id, s.question_no, s.score, q.title AS quiz_title, q.file_name,
+               qq.title AS question, qq.type, qq.choices
+        FROM (
+            SELECT quiz_id, question_no, rank AS score
+            FROM question_search
+            WHERE question_search MATCH ? AND rank MATCH 'bm25({", ".join(map(str, SEARCH_WEIGHTS))})'
+            ORDER BY rank
+            LIMIT ? OFFSET ?
+        ) s
+        JOIN quizzes q ON q.id = s.quiz_id
+        LEFT JOIN quiz_questions qq ON qq.quiz_id = s.quiz_id AND qq.question_no = s.question_no
+        ORDER BY s.score
+        ''', (expression, limit + 1, offset))
+        rows = cursor_obj.fetchall()
+
+        results = []
+        for row in rows[:limit]:
+            item = dict(row)
+            item['choices'] = serializer.loads(item['choices']) if item['choices'] else None
+            # bm25 越小越相关，取反后作为得分
+            item['score'] = round(-item['score'], 4)
+            results.append(item)
+        next_cursor = encode_cursor([offset + limit]) if len(rows) > limit else None
+        return results, next_cursor
+    except Exception as e:
+        logger.error(f"搜索题库失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def backfill_search_index():
+    """根据已有测验重建题库全文索引，返回测验数"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        count = rebuild_search_index(conn.cursor())
+        conn.commit()
+        logger.info(f"题库全文索引重建完成，共 {count} 份测验")
+        return count
+    except Exception as e:
+        logger.error(f"重建题库全文索引失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def backfill_question_rows():
+    """根据已有测验与分析结果重建 quiz_questions 与 responses，返回 (题目数, 作答数)"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        counts = rebuild_question_rows(conn.cursor())
+        conn.commit()
+        logger.info(f"题目与作答表重建完成，共 {counts[0]} 道题目、{counts[1]} 条作答")
+        return counts
+    except Exception as e:
+        logger.error(f"重建题目与作答表失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def update_analysis_knowledge(analysis_id, knowledge_analysis):
+    """用后台生成的模型分析回填已保存分析结果中的 knowledgeAnalysis"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
         cursor = conn.cursor()
-        
+
+        cursor.execute(ANALYSIS_DETAIL_SQL + "WHERE ar.id = ?", (analysis_id,))
+        row = cursor.fetchone()
+        if not row:
+            logger.warning(f"回填分析失败，分析结果不存在: {analysis_id}")
+            return False
+
+        quiz_id = row[3]
+        analysis = merge_analysis(row[4], row[6], row[7])
+        old_counts = count_words(analysis.get('knowledgeAnalysis', ""))
+        analysis['knowledgeAnalysis'] = knowledge_analysis
+        analysis['analysisSource'] = 'llm'
+
+        hot, cold = split_analysis(analysis)
+        codec, payload = encode_payload(cold)
         cursor.execute('''
-        INSERT INTO analysis_results (tno, quiz_id, analysis_json, sno)
-        VALUES (?, ?, ?, ?)
-        ''', (tno, quiz_id, json.dumps(analysis_json), None))
-        
-        analysis_id = cursor.lastrowid
+        UPDATE analysis_results SET analysis_json = ? WHERE id = ?
+        ''', (serializer.dumps(hot), analysis_id))
+        cursor.execute('''
+        INSERT INTO analysis_payloads (analysis_id, codec, payload) VALUES (?, ?, ?)
+        ON CONFLICT(analysis_id) DO UPDATE SET codec = excluded.codec, payload = excluded.payload
+        ''', (analysis_id, codec, payload))
+
+        # 词频中用新分析替换旧分析的贡献
+        word_delta = count_words(knowledge_analysis)
+        word_delta.subtract(old_counts)
+        update_word_counts(cursor, quiz_id, word_delta)
         conn.commit()
-        logger.info(f"分析结果保存成功，ID: {analysis_id}，教师号: {tno}")
-        return analysis_id
+        versions.bump(f"analysis:{analysis_id}", f"quiz:{quiz_id}")
+        logger.info(f"模型分析回填成功，ID: {analysis_id}")
+        return True
     except Exception as e:
-        logger.error(f"保存分析结果失败: {str(e)}")
+        logger.error(f"回填分析结果失败: {str(e)}")
         if conn:
             conn.rollback()
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+class CachedQuiz:
+    """缓存的测验：解析后的 dict 与预先序列化好的响应体"""
+
+    __slots__ = ('quiz', 'body')
+
+    def __init__(self, quiz, body):
+        self.quiz = quiz
+        self.body = body
+
 
 def get_quiz_by_id(quiz_id):
-    """根据ID获取测验题目"""
+    """
+    根据ID获取测验题目。
+
+    返回的 dict 为缓存中的共享对象，调用方不得修改。
+    """
+    entry = load_quiz(quiz_id)
+    return entry.quiz if entry else None
+
+
+def get_quiz_body(quiz_id):
+    """获取测验序列化后的 JSON 响应体（bytes），测验不存在时返回 None"""
+    entry = load_quiz(quiz_id)
+    return entry.body if entry else None
+
+
+def load_quiz(quiz_id):
+    return quiz_cache.get_or_load(int(quiz_id), lambda: read_quiz(quiz_id))
+
+
+def read_quiz(quiz_id):
+    """从数据库读取并解析测验，返回 (CachedQuiz, 估算字节数)，不存在时返回 None"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
-        
+
         cursor.execute('''
-        SELECT * FROM quizzes WHERE id = ? 
+        SELECT * FROM quizzes WHERE id = ?
         ''', (quiz_id, ))
-        
+
         row = cursor.fetchone()
         if row:
-            quiz = dict(row)
-            print(quiz)
-            quiz['quiz_json'] = json.loads(quiz['quiz_json'])
-            return quiz
+            return parse_quiz_row(row)
         return None
     except Exception as e:
         logger.error(f"获取测验失败2: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+
+def parse_quiz_row(row):
+    """quizzes 表的一行 -> (CachedQuiz, 估算字节数)"""
+    quiz = dict(row)
+    quiz_json_text = quiz['quiz_json']
+    quiz['quiz_json'] = serializer.loads(quiz_json_text)
+    body = serializer.dumps_bytes(quiz)
+    return CachedQuiz(quiz, body), len(body) + len(quiz_json_text) * PARSED_SIZE_FACTOR
+
+
+def get_quizzes_by_ids(quiz_ids):
+    """
+    批量获取测验，返回按 quiz_ids 顺序排列的 CachedQuiz 列表，不存在的测验跳过。
+    缓存未命中的测验用一条 IN 查询读取并放入缓存。
+    """
+    entries = {}
+    missing = []
+    for quiz_id in quiz_ids:
+        entry = quiz_cache.get(quiz_id)
+        if entry:
+            entries[quiz_id] = entry
+        else:
+            missing.append(quiz_id)
+
+    if missing:
+        conn = None
+        try:
+            conn = get_connection(DB_FILE)
+            conn.row_factory = sqlite3.Row
+            cursor = conn.cursor()
+
+            placeholders = ",".join("?" * len(missing))
+            cursor.execute(f"SELECT * FROM quizzes WHERE id IN ({placeholders})", missing)
+            for row in cursor.fetchall():
+                entry, size = parse_quiz_row(row)
+                quiz_cache.set(row['id'], entry, size)
+                entries[row['id']] = entry
+        except Exception as e:
+            logger.error(f"批量获取测验失败: {str(e)}")
+            raise
+        finally:
+            if conn:
+                release_connection(conn)
+
+    return [entries[quiz_id] for quiz_id in quiz_ids if quiz_id in entries]
+
+def row_to_analysis(row):
+    """ANALYSIS_DETAIL_SQL 的一行 -> 分析结果 dict，analysis_json 为解压合并后的完整内容"""
+    analysis = {key: row[key] for key in ('id', 'sno', 'tno', 'quiz_id', 'created_at')}
+    analysis['analysis_json'] = merge_analysis(row['analysis_json'], row['codec'], row['payload'])
+    return analysis
+
 
 def get_analysis_by_id(sno, analysis_id):
     """根据学生ID获取分析结果"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM analysis_results WHERE id = ? AND sno = ?
-        ''', (analysis_id, sno))
-        
+        cursor.execute(ANALYSIS_DETAIL_SQL + "WHERE ar.id = ? AND ar.sno = ?", (analysis_id, sno))
+
         row = cursor.fetchone()
         if row:
-            analysis = dict(row)
-            analysis['analysis_json'] = json.loads(analysis['analysis_json'])
-            return analysis
+            return row_to_analysis(row)
         return None
     except Exception as e:
         logger.error(f"获取分析结果失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
 
 def get_teacher_analysis_by_id(tno, analysis_id):
     """根据老师ID获取分析结果"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM analysis_results WHERE id = ? AND tno = ?
-        ''', (analysis_id, tno))
-        
+        cursor.execute(ANALYSIS_DETAIL_SQL + "WHERE ar.id = ? AND ar.tno = ?", (analysis_id, tno))
+
         row = cursor.fetchone()
         if row:
-            analysis = dict(row)
-            analysis['analysis_json'] = json.loads(analysis['analysis_json'])
-            print()
-            return analysis
+            return row_to_analysis(row)
         return None
     except Exception as e:
         logger.error(f"获取分析结果失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+
+def get_analyses_by_ids(owner_column, owner, analysis_ids):
+    """
+    批量获取属于 owner（owner_column 为 sno 或 tno）的分析结果，
+    与 get_analysis_by_id / get_teacher_analysis_by_id 的归属校验一致：不属于 owner 的结果与不存在的一样跳过。
+    返回按 analysis_ids 顺序排列的列表。
+    """
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        placeholders = ",".join("?" * len(analysis_ids))
+        cursor.execute(ANALYSIS_DETAIL_SQL + f"WHERE ar.id IN ({placeholders}) AND ar.{owner_column} = ?",
+                       (*analysis_ids, owner))
+        analyses = {row['id']: row_to_analysis(row) for row in cursor.fetchall()}
+        return [analyses[analysis_id] for analysis_id in analysis_ids if analysis_id in analyses]
+    except Exception as e:
+        logger.error(f"批量获取分析结果失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
 
 
 def get_analysis_by_quiz_id(sno, quiz_id):
     """根据测验ID获取分析结果"""
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
         
-        cursor.execute('''
-        SELECT * FROM analysis_results WHERE quiz_id = ? AND sno = ?
-        ORDER BY created_at DESC
+        cursor.execute(ANALYSIS_DETAIL_SQL + '''
+        WHERE ar.quiz_id = ? AND ar.sno = ?
+        ORDER BY ar.created_at DESC
         ''', (quiz_id, sno))
-        
+
         rows = cursor.fetchall()
-        analyses = []
-        for row in rows:
-            analysis = dict(row)
-            analysis['analysis_json'] = json.loads(analysis['analysis_json'])
-            analyses.append(analysis)
-        return analyses
+        return [row_to_analysis(row) for row in rows]
     except Exception as e:
         logger.error(f"获取分析结果失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
-# 获取所有测验
-def get_all_quizzes(sno):
-    """获取所有测验"""
+def list_quizzes(owner_column, owner, limit=None, cursor=None, descending=True, fields=None):
+    """
+    按所属人（sno 或 tno）分页获取测验列表。
+
+    参数:
+        limit: 每页条数，None 表示不分页
+        cursor: 上一页返回的游标（按 created_at, id 定位）
+        descending: 是否按创建时间倒序
+        fields: 只返回这些字段，None 表示返回全部列表字段
+
+    返回:
+        (测验列表, 下一页游标或 None)
+    """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT id, title, file_name, question_count, difficulty, created_at
-        FROM quizzes
-        WHERE sno = ?
-        ORDER BY created_at DESC
-        ''', (sno,))
-        
-        rows = cursor.fetchall()
-        quizzes = [dict(row) for row in rows]
-        return quizzes
+        cursor_obj = conn.cursor()
+
+        return fetch_page(
+            cursor_obj, QUIZ_LIST_COLUMNS, "FROM quizzes q",
+            [f"q.{owner_column} = ?"], [owner], ['created_at', 'id'],
+            limit, cursor, descending, fields
+        )
     except Exception as e:
         logger.error(f"获取所有测验失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
+
+# 获取所有测验
+def get_all_quizzes(sno, limit=None, cursor=None, descending=True, fields=None):
+    """获取所有测验"""
+    return list_quizzes('sno', sno, limit, cursor, descending, fields)
 
 # 获取所有作业
-def get_all_quizzes4student(sno):
+def get_all_quizzes4student(sno, limit=None, cursor=None, cnos=None, descending=True, fields=None):
+    """
+    获取学生所选课程下布置的全部作业，按创建时间排序。
+
+    参数:
+        limit: 每页条数，None 表示不分页
+        cursor: 上一页返回的游标（按 created_at, id 定位，同一测验布置到多门课程时再按 cno 区分）
+        cnos: 仅返回这些课程的作业
+        descending: 是否按创建时间倒序
+        fields: 只返回这些字段，None 表示返回全部列表字段
+
+    返回:
+        (作业列表, 下一页游标或 None)
+    """
     conn = None
     try:
-        # 连接数据库
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        # Step 1: 根据 sno 查询 student_course 表中的 cno
-        cursor.execute('''
-        SELECT DISTINCT cno 
-        FROM student_course 
-        WHERE sno = ?
-        ''', (sno,))
-        courses = cursor.fetchall()
-
-        if not courses:
-            logger.warning(f"学生号 {sno} 没有注册任何课程")
-            return []
+        cursor_obj = conn.cursor()
+
+        conditions = ["sc.sno = ?"]
+        params = [sno]
+        if cnos:
+            conditions.append(f"sc.cno IN ({','.join('?' * len(cnos))})")
+            params.extend(cnos)
+
+        quizzes, next_cursor = fetch_page(
+            cursor_obj, HOMEWORK_LIST_COLUMNS,
+            '''FROM student_course sc
+    JOIN course c ON c.cno = sc.cno
+    JOIN homework h ON h.cno = sc.cno
+    JOIN quizzes q ON q.id = h.qid''',
+            conditions, params, ['created_at', 'id', 'cno'],
+            limit, cursor, descending, fields, group_by="c.cno, q.id"
+        )
 
-        # Step 2: 遍历每门课程，获取 course 表中的 cname 和 homework 表中的 qid
-        quizzes_with_info = []
-        for course in courses:
-            cno = course['cno']
+        if not quizzes and not cursor:
+            logger.warning(f"学生号 {sno} 没有可见的作业")
 
-            # 获取课程名称 cname
-            cursor.execute('''
-            SELECT cname 
-            FROM course 
-            WHERE cno = ?
-            ''', (cno,))
-            course_info = cursor.fetchone()
-            if not course_info:
-                logger.warning(f"课程编号 {cno} 不存在对应的课程名称")
-                continue
-
-            cname = course_info['cname']
-
-            # 获取 homework 表中的 qid
-            cursor.execute('''
-            SELECT DISTINCT qid 
-            FROM homework 
-            WHERE cno = ?
-            ''', (cno,))
-            quizids = cursor.fetchall()
-
-            if not quizids:
-                logger.warning(f"课程 {cno} 没有相关的测验")
-                continue
-
-            # Step 3: 根据 qid 查询 quizzes 表中的测验信息
-            for quiz in quizids:
-                qid = quiz['qid']
-                cursor.execute('''
-                SELECT id, title, file_name, question_count, difficulty, created_at
-                FROM quizzes
-                WHERE id = ?
-                ''', (qid,))
-                quiz_row = cursor.fetchone()
-
-                if not quiz_row:
-                    logger.warning(f"测验编号 {qid} 不存在对应的测验信息")
-                    continue
-
-                # 将结果添加到返回列表中
-                quizzes_with_info.append({
-                    "id": quiz_row['id'],
-                    "title": quiz_row['title'],
-                    "file_name": quiz_row['file_name'],
-                    "question_count": quiz_row['question_count'],
-                    "difficulty": quiz_row['difficulty'],
-                    "created_at": quiz_row['created_at'],
-                    "cname": cname,
-                    "cno": cno
-                })
-
-        return quizzes_with_info
+        return quizzes, next_cursor
 
     except Exception as e:
         logger.error(f"获取所有作业失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
-def get_all_quizzes4teacher(tno):
+def get_all_quizzes4teacher(tno, limit=None, cursor=None, descending=True, fields=None):
     """获取老师发布的所有测验"""
+    return list_quizzes('tno', tno, limit, cursor, descending, fields)
+
+
+def list_analyses(owner_column, owner, limit=None, cursor=None, descending=True, fields=None):
+    """
+    按所属人（sno 或 tno）分页获取分析结果列表，参数与返回值同 list_quizzes。
+    """
     conn = None
     try:
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT id, title, file_name, question_count, difficulty, created_at
-        FROM quizzes
-        WHERE tno = ?
-        ORDER BY created_at DESC
-        ''', (tno,))
-        
-        rows = cursor.fetchall()
-        quizzes = [dict(row) for row in rows]
-        return quizzes
+        cursor_obj = conn.cursor()
+
+        return fetch_page(
+            cursor_obj, ANALYSIS_LIST_COLUMNS,
+            "FROM analysis_results ar JOIN quizzes q ON ar.quiz_id = q.id",
+            [f"ar.{owner_column} = ?"], [owner], ['created_at', 'id'],
+            limit, cursor, descending, fields
+        )
     except Exception as e:
-        logger.error(f"获取所有测验失败: {str(e)}")
+        logger.error(f"获取所有分析结果失败: {str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
 
 # 获取老师的所有测验分析
-def get_t_all_analyses(tno):
+def get_t_all_analyses(tno, limit=None, cursor=None, descending=True, fields=None):
     """获取所有分析结果"""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT ar.id, ar.quiz_id, ar.created_at, 
-               q.title AS quiz_title, q.file_name
-        FROM analysis_results ar
-        JOIN quizzes q ON ar.quiz_id = q.id
-        WHERE ar.tno = ?
-        ORDER BY ar.created_at DESC
-        ''', (tno,))
-        
-        rows = cursor.fetchall()
-        analyses = [dict(row) for row in rows]
-        return analyses
-    except Exception as e:
-        logger.error(f"获取所有分析结果失败: {str(e)}")
-        raise
-    finally:
-        if conn:
-            conn.close()
+    return list_analyses('tno', tno, limit, cursor, descending, fields)
 
 
-def get_all_analyses(sno):
+def get_all_analyses(sno, limit=None, cursor=None, descending=True, fields=None):
     """获取所有分析结果"""
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT ar.id, ar.quiz_id, ar.created_at, 
-               q.title AS quiz_title, q.file_name
-        FROM analysis_results ar
-        JOIN quizzes q ON ar.quiz_id = q.id
-        WHERE ar.sno = ?
-        ORDER BY ar.created_at DESC
-        ''', (sno,))
-        
-        rows = cursor.fetchall()
-        analyses = [dict(row) for row in rows]
-        return analyses
-    except Exception as e:
-        logger.error(f"获取所有分析结果失败: {str(e)}")
-        raise
-    finally:
-        if conn:
-            conn.close()
+    return list_analyses('sno', sno, limit, cursor, descending, fields)
+
+def get_teacher_analyses(tno, limit=None, cursor=None, descending=True, fields=None):
+    return list_analyses('tno', tno, limit, cursor, descending, fields)
 
-def get_teacher_analyses(tno):
-    conn = None
-    try:
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-        
-        cursor.execute('''
-        SELECT ar.id, ar.quiz_id, ar.created_at, 
-               q.title AS quiz_title, q.file_name
-        FROM analysis_results ar
-        JOIN quizzes q ON ar.quiz_id = q.id
-        WHERE ar.tno = ?
-        ORDER BY ar.created_at DESC
-        ''', (tno,))
-        
-        rows = cursor.fetchall()
-        analyses = [dict(row) for row in rows]
-        return analyses
-    except Exception as e:
-        logger.error(f"获取所有分析结果失败: {str(e)}")
-        raise
-    finally:
-        if conn:
-            conn.close()
-            
 def get_all_classes(tno):
     try:
         # 连接数据库
-        with sqlite3.connect(DB_FILE) as conn:
+        with connection(DB_FILE) as conn:
             conn.row_factory = sqlite3.Row  # 使用字典形式访问行
             cursor = conn.cursor()
 
@@ -496,7 +802,7 @@ def get_all_classes(tno):
   
 def insert_homework(cno, qid):
     try:
-        with sqlite3.connect(DB_FILE) as conn:
+        with connection(DB_FILE) as conn:
             cursor = conn.cursor()
 
             # 执行插入操作
@@ -510,6 +816,7 @@ def insert_homework(cno, qid):
 
             # 提交事务
             conn.commit()
+            versions.bump("homework")
 
             logger.info(f"成功插入 homework 记录: cno={cno}, qid={qid}, id={new_id}")
             return new_id
@@ -522,101 +829,167 @@ def get_course_quiz_error_rates(tno):
     """
     统计某一门课程不同 quizid 的总体错误率和单道题目错误率。
     """
+    result = []
+    for course in get_teacher_dashboard(tno):
+        for quiz in course['quizzes']:
+            result.append({
+                "courseid": course['cno'],
+                "quizid": quiz['quizid'],
+                "error_rate": quiz['error_rate'],
+                "question_error_rates": {
+                    item['question']: item['errorRate'] for item in quiz['question_error_rates']
+                }
+            })
+    return result
+
+def get_teacher_dashboard(tno):
+    """
+    教师看板：教师所有课程 × 作业 × 题目的错误率统计。
+
+    固定执行 3 条基于集合的查询（不随课程数、作业数增长），只统计学生提交，
+    结果缓存到有新提交、作业变化或课程名/测验标题修改为止。
+
+    返回:
+        list: [{cno, cname, quizzes: [{quizid, title, submission_count, incorrect_count,
+               total_questions, error_rate, question_error_rates: [{question, errorRate}]}]}]
+    """
+    cached = dashboard_cache.get(tno)
+    if cached is not None:
+        return cached
+
     conn = None
     try:
-        # 连接数据库
-        conn = sqlite3.connect(DB_FILE)
-        conn.row_factory = sqlite3.Row  # 使用字典形式访问行
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
         cursor = conn.cursor()
 
-        # Step 1: 根据 tno 查询教师教授的课程 cno
+        # 课程名、测验标题经 update_data 修改时按表名更新版本
+        dependencies = versions.snapshot(["homework", "course", "quizzes"])
+
+        # Step 1: 教师的全部课程及其作业
         cursor.execute('''
-        SELECT cno 
-        FROM course 
-        WHERE tno = ?
+        SELECT DISTINCT c.cno, c.cname, h.qid, q.title
+        FROM course c
+        JOIN homework h ON h.cno = c.cno
+        JOIN quizzes q ON q.id = h.qid
+        WHERE c.tno = ?
+        ORDER BY c.cno, h.qid
         ''', (tno,))
-        courses = cursor.fetchall()
+        homeworks = cursor.fetchall()
 
-        if not courses:
-            logger.warning(f"教师号 {tno} 没有教授任何课程")
-            return []
+        quiz_ids = sorted({row['qid'] for row in homeworks})
+        # 先记录版本再读统计，读取期间的新提交会使这次缓存立即失效
+        dependencies.update(versions.snapshot([f"quiz:{qid}" for qid in quiz_ids]))
 
-        # Step 2: 遍历每门课程，获取相关 quizid
-        result = []
-        for course in courses:
-            cno = course['cno']
+        # Step 2: 这些作业的整体聚合
+        cursor.execute('''
+        SELECT s.quiz_id, s.submission_count, s.incorrect_count, s.total_questions
+        FROM quiz_stats s
+        WHERE s.quiz_id IN (
+            SELECT h.qid FROM course c JOIN homework h ON h.cno = c.cno WHERE c.tno = ?
+        )
+        ''', (tno,))
+        quiz_stats = {row['quiz_id']: row for row in cursor.fetchall()}
 
-            # 根据 cno 查询 homework 表中的 quizid
-            cursor.execute('''
-            SELECT DISTINCT qid 
-            FROM homework 
-            WHERE cno = ?
-            ''', (cno,))
-            quizids = cursor.fetchall()
-
-            if not quizids:
-                logger.warning(f"课程 {cno} 没有相关的测验")
-                continue
-
-            # Step 3: 遍历每个 quizid，计算错误率
-            for quiz in quizids:
-                qid = quiz['qid']
-
-                # 根据 quizid 查询 analysis_results 表中的 analysis_json
-                cursor.execute('''
-                SELECT analysis_json 
-                FROM analysis_results 
-                WHERE quiz_id = ?
-                ''', (qid,))
-                analyses = cursor.fetchall()
-
-                total_questions = 0
-                incorrect_count = 0
-                question_errors = {}  # 记录每道题的错误次数
-
-                for analysis in analyses:
-                    analysis_data = json.loads(analysis['analysis_json'])
-                    total_questions = max(total_questions, analysis_data.get("totalQuestions", 0))
-                    incorrect_count += analysis_data.get("incorrectCount", 0)
-
-                    # 解析 errorIndex 字段
-                    error_index = analysis_data.get("errorIndex", "")
-                    for i, char in enumerate(error_index):
-                        if char == '1':  # 如果该位为 '1'，表示该题错误
-                            question_number = i + 1  # 题目编号从 1 开始
-                            question_errors[question_number] = question_errors.get(question_number, 0) + 1
-
-                # 计算总体错误率
-                error_rate = 0
-                if total_questions > 0:
-                    error_rate = incorrect_count / total_questions
-
-                # 计算每道题的错误率
-                question_error_rates = {}
-                for question_number, error_count in question_errors.items():
-                    question_error_rates[question_number] = error_count / len(analyses)
-
-                # 添加到结果列表
-                result.append({
-                    "courseid": cno,
-                    "quizid": qid,
-                    "error_rate": error_rate,
-                    "question_error_rates": question_error_rates
-                })
+        # Step 3: 这些作业的逐题错误次数
+        cursor.execute('''
+        SELECT qs.quiz_id, qs.question_no, qs.error_count
+        FROM quiz_question_stats qs
+        WHERE qs.error_count > 0 AND qs.quiz_id IN (
+            SELECT h.qid FROM course c JOIN homework h ON h.cno = c.cno WHERE c.tno = ?
+        )
+        ORDER BY qs.quiz_id, qs.question_no
+        ''', (tno,))
+        question_errors = {}
+        for row in cursor.fetchall():
+            question_errors.setdefault(row['quiz_id'], []).append(row)
+
+        courses = {}
+        for homework in homeworks:
+            course = courses.setdefault(homework['cno'], {
+                "cno": homework['cno'],
+                "cname": homework['cname'],
+                "quizzes": []
+            })
+            stats = quiz_stats.get(homework['qid'])
+            submission_count = stats['submission_count'] if stats else 0
+            incorrect_count = stats['incorrect_count'] if stats else 0
+            total_questions = stats['total_questions'] if stats else 0
+            course['quizzes'].append({
+                "quizid": homework['qid'],
+                "title": homework['title'],
+                "submission_count": submission_count,
+                "incorrect_count": incorrect_count,
+                "total_questions": total_questions,
+                "error_rate": quiz_error_rate(submission_count, incorrect_count, total_questions),
+                "question_error_rates": [
+                    {"question": row['question_no'], "errorRate": row['error_count'] / submission_count}
+                    for row in question_errors.get(homework['qid'], [])
+                ]
+            })
 
+        if not courses:
+            logger.warning(f"教师号 {tno} 没有布置任何作业")
+
+        result = list(courses.values())
+        dashboard_cache.set(tno, result, dependencies)
         return result
+    except Exception as e:
+        logger.error(f"获取教师看板失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+def get_student_error_rates(sno):
+    """
+    统计某学生在各测验上的作答次数、总体错误率和单道题目错误率。
+
+    返回:
+        list: [{quizid, attempts, error_rate, question_error_rates}]，
+              question_error_rates 的键为题目编号（从 1 开始），值为该生在该题上的错误率
+    """
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        SELECT quiz_id, error_bits, question_count
+        FROM analysis_results
+        WHERE sno = ? AND quiz_id IS NOT NULL
+        ''', (sno,))
+        rows = cursor.fetchall()
+
+        matrix, question_counts = load_error_matrix([(row['error_bits'], row['question_count']) for row in rows])
+        quiz_ids = np.array([row['quiz_id'] for row in rows], dtype=np.int64)
+        groups, submissions, error_counts = grouped_error_counts(matrix, quiz_ids)
 
+        result = []
+        for i, quiz_id in enumerate(groups.tolist()):
+            answered = int(question_counts[quiz_ids == quiz_id].sum())
+            result.append({
+                "quizid": quiz_id,
+                "attempts": int(submissions[i]),
+                "error_rate": int(error_counts[i].sum()) / answered if answered else 0,
+                "question_error_rates": {
+                    int(q) + 1: int(error_counts[i, q]) / int(submissions[i])
+                    for q in np.flatnonzero(error_counts[i])
+                }
+            })
+        return result
     except Exception as e:
-        logger.error(f"统计错误率失败: {str(e)}")
+        logger.error(f"统计学生错误率失败: sno={sno}, error={str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
 def get_homeworks_teacher(tno):
     try:
         # 连接数据库
-        with sqlite3.connect(DB_FILE) as conn:
+        with connection(DB_FILE) as conn:
             conn.row_factory = sqlite3.Row  # 使用字典形式访问行
             cursor = conn.cursor()
 
@@ -656,56 +1029,45 @@ def get_quiz_error_rates(quizid):
     conn = None
     try:
         # 连接数据库
-        conn = sqlite3.connect(DB_FILE)  # 替换为你的数据库文件路径
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row  # 使用字典形式访问行
         cursor = conn.cursor()
 
-        # Step 1: 根据 quizid 查询 analysis_results 表中的 analysis_json
+        # Step 1: 读取随分析结果增量维护的聚合数据
         cursor.execute('''
-        SELECT analysis_json 
-        FROM analysis_results 
+        SELECT submission_count, incorrect_count, total_questions
+        FROM quiz_stats
         WHERE quiz_id = ?
         ''', (quizid,))
-        analyses = cursor.fetchall()
+        stats = cursor.fetchone()
 
-        if not analyses:
+        if not stats or not stats['submission_count']:
             raise ValueError(f"测验编号 {quizid} 没有分析数据")
 
-        # Step 2: 解析 analysis_json 数据
-        total_questions = 0
-        incorrect_count = 0
-        question_errors = {}  # 记录每道题的错误次数
-
-        for analysis in analyses:
-            analysis_data = json.loads(analysis['analysis_json'])
-            total_questions = max(total_questions, analysis_data.get("totalQuestions", 0))
-            incorrect_count += analysis_data.get("incorrectCount", 0)
-
-            # 解析 errorIndex 字段
-            error_index = analysis_data.get("errorIndex", "")
-            for i, char in enumerate(error_index):
-                if char == '1':  # 如果该位为 '1'，表示该题错误
-                    question_number = i + 1  # 题目编号从 1 开始
-                    question_errors[question_number] = question_errors.get(question_number, 0) + 1
-
-        # Step 3: 计算总体错误率
-        error_rate = 0
-        if total_questions > 0:
-            error_rate = incorrect_count / total_questions
-
-        # Step 4: 计算每道题的错误率并按题目编号排序
+        cursor.execute('''
+        SELECT question_no, error_count
+        FROM quiz_question_stats
+        WHERE quiz_id = ? AND error_count > 0
+        ORDER BY question_no
+        ''', (quizid,))
+        question_errors = cursor.fetchall()
+
+        # Step 2: 计算总体错误率
+        error_rate = quiz_error_rate(stats['submission_count'], stats['incorrect_count'],
+                                     stats['total_questions'])
+
+        # Step 3: 计算每道题的正确率（已按题目编号排序）
         question_error_rates = []
-        for question_number in sorted(question_errors.keys()):  # 按题目编号排序
-            error_count = question_errors[question_number]
-            correct_rate = 1 - (error_count / len(analyses))  # 正确率 = 1 - 错误率
+        for row in question_errors:
+            correct_rate = 1 - (row['error_count'] / stats['submission_count'])  # 正确率 = 1 - 错误率
             question_error_rates.append({
-                "question": str(question_number),  # 转为字符串以适配前端需求
+                "question": str(row['question_no']),  # 转为字符串以适配前端需求
                 "correctRate": correct_rate
             })
 
         # 返回结果
         return {
-            "error_rate": error_rate / total_questions,
+            "error_rate": error_rate,
             "question_error_rates": question_error_rates
         }
 
@@ -714,54 +1076,271 @@ def get_quiz_error_rates(quizid):
         raise
     finally:
         if conn:
-            conn.close()
+            release_connection(conn)
 
-def get_word_frequence_by_qid(qid):
+def get_word_frequence_by_qid(qid, top_k=40):
     """
     获取指定测验的所有 knowledgeAnalysis 词频，用于制作词云图
     """
     conn = None
     try:
         # 连接数据库
-        conn = sqlite3.connect(DB_FILE)
+        conn = get_connection(DB_FILE)
         conn.row_factory = sqlite3.Row  # 使用字典形式访问行
         cursor = conn.cursor()
 
-        # Step 1: 查询analysis_json
+        # 词频在保存分析结果时已累计，这里只取 Top K
         cursor.execute('''
-        SELECT analysis_json 
-        FROM analysis_results 
+        SELECT word, count
+        FROM quiz_word_counts
         WHERE quiz_id = ?
-        ''', (qid,))
-        analyses = cursor.fetchall()
-
-        if not analyses:
-            raise ValueError(f"测验编号 {qid} 没有分析数据")
-
-        # Step 2: 提取所有knowledgeAnalysis内容
-        all_texts = []
-        for analysis in analyses:
-            analysis_data = json.loads(analysis['analysis_json'])
-            if knowledge_analysis := analysis_data.get("knowledgeAnalysis", ""):
-                all_texts.append(knowledge_analysis)
-
-        # Step 3: 文本处理和分词
-        combined_text = " ".join(all_texts)
-        words = [
-            word for word in jieba.lcut(combined_text)
-            if word.strip() and word not in STOP_WORDS
-        ]
-
-        # Step 4: 统计词频并取Top30
-        word_counts = Counter(words)
-        top20 = word_counts.most_common(40)
+        ORDER BY count DESC, word
+        LIMIT ?
+        ''', (qid, top_k))
+        words = cursor.fetchall()
+
+        if not words:
+            cursor.execute('''
+            SELECT 1 FROM analysis_results WHERE quiz_id = ? LIMIT 1
+            ''', (qid,))
+            if not cursor.fetchone():
+                raise ValueError(f"测验编号 {qid} 没有分析数据")
 
         # 转换为词云格式
-        return [{"text": word, "value": freq} for word, freq in top20]
+        return [{"text": row['word'], "value": row['count']} for row in words]
 
     except Exception as e:
         print(f"获取词频失败: qid={qid}, error={str(e)}")
         raise
     finally:
         if conn:
-            conn.close()
\ No newline at end of file
+            release_connection(conn)
+
+
+def get_quiz_submission_count(quiz_id):
+    """获取某测验的学生提交数"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        SELECT COUNT(*) FROM analysis_results WHERE quiz_id = ? AND sno IS NOT NULL
+        ''', (quiz_id,))
+        return cursor.fetchone()[0]
+    except Exception as e:
+        logger.error(f"获取提交数失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def get_quiz_answer_stats(quiz_id, top_wrong=3):
+    """
+    汇总某测验全部学生提交的逐题错误率与常见错误答案，用于生成班级报告。
+
+    返回:
+        dict: {submission_count, questions: [{question, title, correctAnswer, errorRate, wrongAnswers}]}
+              wrongAnswers 为 [{answer, count}]，按出现次数降序
+    """
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        SELECT COUNT(*) FROM analysis_results WHERE quiz_id = ? AND sno IS NOT NULL
+        ''', (quiz_id,))
+        submission_count = cursor.fetchone()[0]
+
+        # 逐题错误答案直接在 responses 上聚合，每题只取出现次数最多的 top_wrong 个，
+        # 错误次数为该题全部错误答案之和
+        cursor.execute('''
+        SELECT w.question_no, w.answer, w.count, w.errors, qq.title, qq.correct_answer
+        FROM (
+            SELECT question_no, answer, COUNT(*) AS count,
+                   SUM(COUNT(*)) OVER (PARTITION BY question_no) AS errors,
+                   ROW_NUMBER() OVER (PARTITION BY question_no ORDER BY COUNT(*) DESC, answer) AS rank
+            FROM responses
+            WHERE quiz_id = ? AND is_correct = 0 AND sno IS NOT NULL
+            GROUP BY question_no, answer
+        ) w
+        LEFT JOIN quiz_questions qq ON qq.quiz_id = ? AND qq.question_no = w.question_no
+        WHERE w.rank <= ?
+        ORDER BY w.question_no, w.rank
+        ''', (quiz_id, quiz_id, top_wrong))
+
+        questions = []
+        for row in cursor.fetchall():
+            if not questions or questions[-1]['question'] != row['question_no']:
+                questions.append({
+                    "question": row['question_no'],
+                    "title": row['title'],
+                    "correctAnswer": row['correct_answer'],
+                    "errorRate": row['errors'] / submission_count,
+                    "wrongAnswers": []
+                })
+            questions[-1]['wrongAnswers'].append({"answer": answer_key(row['answer']), "count": row['count']})
+
+        return {"submission_count": submission_count, "questions": questions}
+    except Exception as e:
+        logger.error(f"汇总班级答题数据失败: quiz_id={quiz_id}, error={str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def get_item_analysis(quiz_id):
+    """
+    作业的题目分析：逐题难度（通过率）、区分度（点二列相关）、选择题干扰项选择频率，
+    以及整份测验的 KR-20 信度。基于学生提交的错误矩阵用 NumPy 向量化计算，
+    结果缓存到该测验有新提交为止。
+
+    返回:
+        dict: {quiz_id, submission_count, question_count, mean_score, reliability,
+               questions: [{question, title, type, attempts, difficulty, discrimination,
+                            distractors: [{answer, count, rate}]}]}；
+              没有提交时返回 None。无法计算的指标为 None。
+    """
+    cached = item_analysis_cache.get(quiz_id)
+    if cached is not None:
+        return cached
+
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        # 先记录版本再读数据，读取期间的新提交会使这次缓存立即失效
+        dependencies = versions.snapshot([f"quiz:{quiz_id}"])
+
+        cursor.execute('''
+        SELECT error_bits, question_count
+        FROM analysis_results
+        WHERE quiz_id = ? AND sno IS NOT NULL
+        ''', (quiz_id,))
+        rows = cursor.fetchall()
+        if not rows:
+            return None
+
+        matrix, question_counts = load_error_matrix([(row['error_bits'], row['question_count']) for row in rows])
+        correct, answered = response_matrix(matrix, question_counts)
+        attempts = answered.sum(axis=0)
+        difficulty = item_difficulty(correct, answered)
+        discrimination = point_biserial(correct)
+
+        # 干扰项直接在 responses 上聚合
+        cursor.execute('''
+        SELECT question_no, answer, COUNT(*) AS count
+        FROM responses
+        WHERE quiz_id = ? AND is_correct = 0 AND sno IS NOT NULL
+        GROUP BY question_no, answer
+        ''', (quiz_id,))
+        wrong_answers = {}
+        for row in cursor.fetchall():
+            wrong_answers.setdefault(row['question_no'], Counter())[row['answer']] = row['count']
+
+        cursor.execute('''
+        SELECT question_no, type, title, correct_answer, choices FROM quiz_questions WHERE quiz_id = ?
+        ''', (quiz_id,))
+        elements = {row['question_no']: row for row in cursor.fetchall()}
+
+        questions = []
+        for q in range(matrix.shape[1]):
+            element = elements.get(q + 1)
+            item = {
+                "question": q + 1,
+                "title": element['title'] if element else None,
+                "type": element['type'] if element else None,
+                "attempts": int(attempts[q]),
+                "difficulty": finite_or_none(difficulty[q]),
+                "discrimination": finite_or_none(discrimination[q]),
+                "distractors": [],
+            }
+            if element and element['choices'] and attempts[q]:
+                counts = wrong_answers.get(q + 1, Counter())
+                key = correct_options(element['type'], element['correct_answer'])
+                # 列出全部错误选项（包括无人选择的），以及选项之外的其他错误答案（如多选组合），
+                # 标准答案中的选项（包括多选题只选了部分正确选项的作答）不算干扰项
+                options = [answer_key(value) for value in serializer.loads(element['choices'])]
+                options = [value for value in options if value not in key]
+                options += sorted(answer for answer in counts if answer not in options and answer not in key)
+                item["distractors"] = [
+                    {"answer": answer, "count": counts[answer], "rate": round(counts[answer] / int(attempts[q]), 4)}
+                    for answer in options
+                ]
+            questions.append(item)
+
+        result = {
+            "quiz_id": quiz_id,
+            "submission_count": len(rows),
+            "question_count": matrix.shape[1],
+            "mean_score": finite_or_none(correct.sum(axis=1).mean()),
+            "reliability": finite_or_none(kr20(correct)),
+            "questions": questions,
+        }
+        item_analysis_cache.set(quiz_id, result, dependencies)
+        return result
+    except Exception as e:
+        logger.error(f"题目分析失败: quiz_id={quiz_id}, error={str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def get_class_report(quiz_id):
+    """获取缓存的班级报告"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        conn.row_factory = sqlite3.Row
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        SELECT * FROM class_reports WHERE quiz_id = ?
+        ''', (quiz_id,))
+        row = cursor.fetchone()
+        if row:
+            report = dict(row)
+            report['stats_json'] = serializer.loads(report['stats_json'])
+            return report
+        return None
+    except Exception as e:
+        logger.error(f"获取班级报告失败: {str(e)}")
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
+
+
+def save_class_report(quiz_id, report, stats, submission_count):
+    """保存（覆盖）班级报告缓存"""
+    conn = None
+    try:
+        conn = get_connection(DB_FILE)
+        cursor = conn.cursor()
+
+        cursor.execute('''
+        INSERT INTO class_reports (quiz_id, report, stats_json, submission_count, updated_at)
+        VALUES (?, ?, ?, ?, CURRENT_TIMESTAMP)
+        ON CONFLICT(quiz_id) DO UPDATE SET
+            report = excluded.report,
+            stats_json = excluded.stats_json,
+            submission_count = excluded.submission_count,
+            updated_at = excluded.updated_at
+        ''', (quiz_id, report, serializer.dumps(stats), submission_count))
+        conn.commit()
+        logger.info(f"班级报告保存成功，测验ID: {quiz_id}，提交数: {submission_count}")
+    except Exception as e:
+        logger.error(f"保存班级报告失败: {str(e)}")
+        if conn:
+            conn.rollback()
+        raise
+    finally:
+        if conn:
+            release_connection(conn)
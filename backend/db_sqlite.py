@@ -1,11 +1,13 @@
 # -*- coding: utf-8 -*-
 import sqlite3
+from db_pool import get_connection, release_connection
+from cache_service import versions
 
 
-# 建立数据库连接
+# 建立数据库连接（从连接池借出当前线程的连接）
 def open_db():
     database = "database.db"
-    conn = sqlite3.connect(database)
+    conn = get_connection(database)
     # conn.row_factory = sqlite3.Row
     return conn
 
@@ -26,9 +28,9 @@ def get_sql(conn, sql):
 
 '''
 
-# 关闭数据库连接
+# 关闭数据库连接（归还连接池）
 def close_db(conn):
-    conn.close()
+    release_connection(conn)
 
 def get_sql(sql, conn=None):
     close_conn = False
@@ -74,6 +76,7 @@ def update_data(data, tablename):
     cursor.execute(sql)
     conn.commit()
     close_db(conn)
+    versions.bump(tablename)
 
 
 # 增
@@ -89,6 +92,7 @@ def insert_data(data, tablename):
     cusor.execute(sql, values)
     conn.commit()
     close_db(conn)
+    versions.bump(tablename)
 
 
 # 删
@@ -103,3 +107,4 @@ def delete_data_by_id(id1, id2, value1, value2, tablename):
     cursor.execute(sql, (value1, value2))
     conn.commit()
     close_db(conn)
+    versions.bump(tablename)
@@ -0,0 +1,60 @@
+import numpy as np
+
+
+def pack_error_index(error_index):
+    """把 '0'/'1' 组成的 errorIndex 字符串压缩为按位存储的字节串"""
+    if not error_index:
+        return b''
+    bits = np.frombuffer(error_index.encode('ascii'), dtype=np.uint8) == ord('1')
+    return np.packbits(bits).tobytes()
+
+
+def unpack_error_matrix(blobs, width):
+    """
+    把多条压缩的 errorIndex 解成 (提交数, width) 的 0/1 矩阵，
+    第 i 行第 j 列为 1 表示第 i 份提交的第 j+1 题答错。
+    """
+    if not blobs or not width:
+        return np.zeros((len(blobs), width or 0), dtype=np.uint8)
+
+    nbytes = (width + 7) // 8
+    blobs = [blob or b'' for blob in blobs]
+    if all(len(blob) == nbytes for blob in blobs):
+        # 常见情况：同一测验的提交长度一致，直接整体拼接
+        packed = np.frombuffer(b''.join(blobs), dtype=np.uint8).reshape(len(blobs), nbytes)
+    else:
+        packed = np.zeros((len(blobs), nbytes), dtype=np.uint8)
+        for i, blob in enumerate(blobs):
+            blob = blob[:nbytes]
+            packed[i, :len(blob)] = np.frombuffer(blob, dtype=np.uint8)
+    return np.unpackbits(packed, axis=1)[:, :width]
+
+
+def grouped_error_counts(matrix, keys):
+    """
+    按 keys 对提交分组，返回 (分组键, 每组提交数, 每组逐题错误次数矩阵)。
+
+    逐题错误次数矩阵形状为 (分组数, 题目数)，每行为该组各题的错误次数。
+    """
+    keys = np.asarray(keys)
+    if len(keys) == 0:
+        return keys, np.zeros(0, dtype=np.int64), np.zeros((0, matrix.shape[1]), dtype=np.int64)
+
+    groups, inverse = np.unique(keys, return_inverse=True)
+    order = np.argsort(inverse, kind='stable')
+    sorted_inverse = inverse[order]
+    starts = np.flatnonzero(np.r_[True, sorted_inverse[1:] != sorted_inverse[:-1]])
+    counts = np.add.reduceat(matrix[order].astype(np.int64), starts, axis=0)
+    submissions = np.bincount(inverse, minlength=len(groups))
+    return groups, submissions, counts
+
+
+def load_error_matrix(rows):
+    """
+    从 (error_bits, question_count) 行构建错误矩阵，
+    返回 (矩阵, 每份提交的题目数数组)。
+    """
+    question_counts = np.array([row[1] or 0 for row in rows], dtype=np.int64)
+    width = int(question_counts.max()) if len(question_counts) else 0
+    matrix = unpack_error_matrix([row[0] for row in rows], width)
+    return matrix, question_counts
@@ -0,0 +1,54 @@
+import os
+import hashlib
+from functools import wraps
+from flask import request, make_response
+from cache_service import versions
+from compression import etag_variants
+from metrics import metrics
+
+# 不可变资源（保存后不再修改，如测验）的浏览器缓存时间（秒）
+HTTP_IMMUTABLE_MAX_AGE = int(os.getenv('HTTP_IMMUTABLE_MAX_AGE', str(365 * 24 * 3600)))
+
+
+def request_etag(*parts):
+    """请求路径 + 查询参数（排序后）+ 额外标识 -> ETag 值"""
+    args = sorted(request.args.items(multi=True))
+    digest = hashlib.blake2b(repr((request.path, args) + parts).encode('utf-8'), digest_size=12)
+    return digest.hexdigest()
+
+
+def conditional(scopes=None):
+    """
+    为 GET 视图加上 ETag 校验，If-None-Match 命中时直接返回 304，不执行视图（不访问数据库）。
+
+    scopes 为 None 时视为不可变资源：强 ETag 只由请求决定，并允许客户端长期缓存；
+    否则 scopes(**view_args) 返回响应所依赖的版本作用域，使用弱 ETag，
+    写操作递增作用域版本号后 ETag 随之变化，客户端每次使用前需重新校验。
+    压缩后的响应 ETag 带编码后缀（见 compression.encoded_etag），校验时同样视为命中。
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(*args, **kwargs):
+            if scopes is None:
+                etag, weak = request_etag(), False
+                cache_control = f"private, max-age={HTTP_IMMUTABLE_MAX_AGE}, immutable"
+                contains = request.if_none_match.contains
+            else:
+                etag, weak = request_etag(versions.token(scopes(**kwargs))), True
+                cache_control = "private, no-cache"
+                contains = request.if_none_match.contains_weak
+
+            matched = next((tag for tag in etag_variants(etag) if contains(tag)), None)
+            if matched:
+                metrics.incr('http.not_modified')
+                response = make_response('', 304)
+                etag = matched
+            else:
+                response = make_response(view(*args, **kwargs))
+                if response.status_code != 200:
+                    return response
+            response.set_etag(etag, weak=weak)
+            response.headers['Cache-Control'] = cache_control
+            return response
+        return wrapper
+    return decorator
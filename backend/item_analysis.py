@@ -0,0 +1,55 @@
+import numpy as np
+
+
+def response_matrix(error_matrix, question_counts):
+    """
+    由错误矩阵构建作答矩阵，返回 (correct, answered)，形状均为 (提交数, 题目数)。
+    correct 为 1 表示答对；answered 为 False 表示该份提交的题目数不足，没有这一题。
+    """
+    width = error_matrix.shape[1]
+    answered = np.arange(width) < np.asarray(question_counts)[:, None]
+    correct = ((1 - error_matrix) * answered).astype(np.float64)
+    return correct, answered
+
+
+def item_difficulty(correct, answered):
+    """逐题难度（通过率）：答对人数 / 作答人数，无人作答的题为 nan"""
+    attempts = answered.sum(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where(attempts > 0, correct.sum(axis=0) / attempts, np.nan)
+
+
+def point_biserial(correct):
+    """
+    逐题区分度：该题得分与其余题总分的点二列相关（校正后的题总相关，避免该题自身抬高相关）。
+    该题或其余题总分没有差异时为 nan。
+    """
+    n = correct.shape[0]
+    if n < 2:
+        return np.full(correct.shape[1], np.nan)
+    rest = correct.sum(axis=1, keepdims=True) - correct
+    item_mean = correct.mean(axis=0)
+    rest_mean = rest.mean(axis=0)
+    covariance = (correct * rest).mean(axis=0) - item_mean * rest_mean
+    item_std = correct.std(axis=0)
+    rest_std = rest.std(axis=0)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        return np.where((item_std > 0) & (rest_std > 0), covariance / (item_std * rest_std), np.nan)
+
+
+def kr20(correct):
+    """KR-20 信度系数，题目少于 2 道或总分没有差异时为 nan"""
+    n, k = correct.shape
+    if n < 2 or k < 2:
+        return np.nan
+    total_variance = correct.sum(axis=1).var()
+    if total_variance == 0:
+        return np.nan
+    p = correct.mean(axis=0)
+    return k / (k - 1) * (1 - (p * (1 - p)).sum() / total_variance)
+
+
+def finite_or_none(value, digits=4):
+    """nan -> None，其余保留 digits 位小数，便于序列化为 JSON"""
+    value = float(value)
+    return round(value, digits) if np.isfinite(value) else None
@@ -0,0 +1,49 @@
+import os
+import time
+import logging
+from config import get_model
+from metrics import metrics
+from prompt_codec import squeeze_prompt, estimate_tokens
+
+logger = logging.getLogger(__name__)
+
+# 单次请求的提示 token 上限（0 表示不限制）
+LLM_MAX_PROMPT_TOKENS = int(os.getenv('LLM_MAX_PROMPT_TOKENS', '0'))
+
+
+def _usage_tokens(response, field):
+    """优先使用模型返回的实际用量，不可用时返回 None"""
+    usage = getattr(response, 'usage_metadata', None)
+    return getattr(usage, field, None) if usage else None
+
+
+def call_model(endpoint, prompt):
+    """
+    调用模型并按 endpoint 记录提示/响应 token 数与耗时，返回响应文本。
+
+    超过 LLM_MAX_PROMPT_TOKENS 的提示会直接拒绝，不发起请求。
+    """
+    prompt = squeeze_prompt(prompt)
+    prompt_tokens = estimate_tokens(prompt)
+    if LLM_MAX_PROMPT_TOKENS and prompt_tokens > LLM_MAX_PROMPT_TOKENS:
+        metrics.incr(f"llm.{endpoint}.rejected")
+        raise ValueError(f"提示长度约 {prompt_tokens} tokens，超过上限 {LLM_MAX_PROMPT_TOKENS}")
+
+    start = time.time()
+    try:
+        response = get_model().generate_content(prompt)
+        text = response.text
+    except Exception:
+        metrics.incr(f"llm.{endpoint}.errors")
+        raise
+    latency = time.time() - start
+
+    prompt_tokens = _usage_tokens(response, 'prompt_token_count') or prompt_tokens
+    response_tokens = _usage_tokens(response, 'candidates_token_count') or estimate_tokens(text)
+
+    metrics.incr(f"llm.{endpoint}.calls")
+    metrics.incr(f"llm.{endpoint}.prompt_tokens", prompt_tokens)
+    metrics.incr(f"llm.{endpoint}.response_tokens", response_tokens)
+    metrics.observe(f"llm.{endpoint}.latency_seconds", latency)
+    logger.debug(f"模型调用 {endpoint}: 提示 {prompt_tokens} tokens，响应 {response_tokens} tokens，耗时 {latency:.2f} 秒")
+    return text
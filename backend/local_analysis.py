@@ -0,0 +1,119 @@
+import logging
+from collections import Counter
+from difflib import SequenceMatcher
+from tokenizer_service import extract_keywords as extract_tags
+
+logger = logging.getLogger(__name__)
+
+TYPE_NAMES = {
+    "radiogroup": "选择题",
+    "checkbox": "多选题",
+    "text": "填空题",
+}
+
+
+def extract_keywords(incorrect_questions, top_k=8):
+    """从错题题干中提取知识点关键词"""
+    text = "\n".join(q.get('question') or "" for q in incorrect_questions)
+    if not text.strip():
+        return []
+    return extract_tags(text, top_k)
+
+
+def _normalize(answer):
+    if answer is None:
+        return ""
+    if isinstance(answer, list):
+        return ",".join(sorted(str(a) for a in answer))
+    return str(answer).strip().lower()
+
+
+def find_error_patterns(incorrect_questions):
+    """根据错题的作答情况归纳错误模式，返回描述列表"""
+    patterns = []
+    unanswered = 0
+    near_miss = 0
+    choice_positions = Counter()
+    choice_wrong = 0
+
+    for q in incorrect_questions:
+        user_answer = _normalize(q.get('userAnswer'))
+        correct_answer = _normalize(q.get('correctAnswer'))
+
+        if not user_answer:
+            unanswered += 1
+            continue
+
+        if q.get('type') == 'text':
+            similar = SequenceMatcher(None, user_answer, correct_answer).ratio() >= 0.6
+            if similar or (correct_answer and (correct_answer in user_answer or user_answer in correct_answer)):
+                near_miss += 1
+        elif q.get('options'):
+            choice_wrong += 1
+            options = [_normalize(o) for o in q['options']]
+            if user_answer in options:
+                choice_positions[options.index(user_answer)] += 1
+
+    if unanswered:
+        patterns.append(f"有 {unanswered} 道题未作答，可能存在时间分配不足或知识点完全陌生的情况。")
+    if near_miss:
+        patterns.append(f"有 {near_miss} 道填空题答案与正确答案接近，多为表述不完整或笔误，需注意答案的准确性。")
+    if choice_wrong >= 2 and choice_positions:
+        position, count = choice_positions.most_common(1)[0]
+        if count >= 2 and count / choice_wrong >= 0.5:
+            patterns.append(f"错选的选择题中有 {count} 道都选择了 {chr(ord('A') + position)} 选项，可能存在猜测作答的倾向。")
+    if not patterns:
+        patterns.append("错误分布较为分散，未发现明显的系统性错误。")
+    return patterns
+
+
+def generate_local_analysis(total_questions, correct_count, incorrect_questions):
+    """
+    不依赖大模型，基于规则生成知识点分析（markdown 格式）。
+
+    输出完全由输入决定，用作即时首个响应、模型超时或熔断时的降级结果，
+    以及低风险测验的默认分析方式。
+    """
+    if not incorrect_questions:
+        return "恭喜！您回答了所有问题正确。"
+
+    accuracy = correct_count / total_questions if total_questions else 0
+    if accuracy >= 0.8:
+        level = "整体掌握良好，仅有个别知识点需要巩固"
+    elif accuracy >= 0.6:
+        level = "基本掌握，但部分知识点存在明显不足"
+    else:
+        level = "掌握较为薄弱，建议系统复习相关内容"
+
+    type_counts = Counter(TYPE_NAMES.get(q.get('type'), "其他题型") for q in incorrect_questions)
+    keywords = extract_keywords(incorrect_questions)
+    patterns = find_error_patterns(incorrect_questions)
+
+    lines = [
+        "# 测试结果分析",
+        "",
+        "## 总体情况",
+        f"- 总题数：{total_questions}，正确：{correct_count}，错误：{len(incorrect_questions)}",
+        f"- 正确率：{accuracy:.0%}，{level}",
+        "- 错题题型：" + "，".join(f"{name} {count} 道" for name, count in type_counts.most_common()),
+        "",
+        "## 知识点不足的区域",
+    ]
+    if keywords:
+        lines.append("错题主要涉及以下知识点：" + "、".join(f"**{word}**" for word in keywords))
+    for q in incorrect_questions:
+        lines.append(f"- {q.get('question')}（正确答案：{q.get('correctAnswer')}）")
+
+    lines += ["", "## 错误模式"]
+    lines += [f"- {pattern}" for pattern in patterns]
+
+    lines += [
+        "",
+        "## 改进建议",
+        "1. 针对上述知识点回顾教材或课堂笔记，重点理解概念之间的区别与联系。",
+        "2. 对照正确答案逐题订正，写下每道错题的错误原因。",
+        "3. 完成同类题目的练习后再次测验，检验薄弱环节是否已经改善。",
+        "",
+        "> 本分析由本地规则生成。",
+    ]
+    return "\n".join(lines)
@@ -0,0 +1,87 @@
+import os
+import sys
+import sqlite3
+import argparse
+import logging
+
+import db_service
+from db_service import (init_database, backfill_quiz_stats, backfill_word_counts, backfill_student_progress,
+                        backfill_question_rows, backfill_search_index)
+from migrations import MIGRATIONS, get_schema_version, check_query_plans
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(levelname)s - %(message)s'
+)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Quiz Mage 后端维护命令")
+    subparsers = parser.add_subparsers(dest="command", required=True)
+
+    subparsers.add_parser("backfill-stats", help="根据已有分析结果重建测验错误率聚合表")
+    subparsers.add_parser("backfill-word-counts", help="根据已有分析结果重建词云词频表")
+    subparsers.add_parser("backfill-progress", help="根据已有分析结果重建学生日/周进度汇总表")
+    subparsers.add_parser("backfill-responses", help="根据已有测验与分析结果重建题目表与逐题作答表")
+    subparsers.add_parser("backfill-search", help="根据已有测验重建题库全文索引")
+    subparsers.add_parser("migrate", help="执行尚未应用的数据库结构迁移")
+    subparsers.add_parser("check-plans", help="检查热点查询的执行计划，出现整表扫描时返回非 0")
+    subparsers.add_parser("vacuum", help="整理数据库文件，回收迁移后释放的空间")
+
+    args = parser.parse_args()
+    init_database()
+
+    if args.command == "migrate":
+        conn = sqlite3.connect(db_service.DB_FILE)
+        try:
+            version = get_schema_version(conn)
+        finally:
+            conn.close()
+        print(f"数据库结构版本: {version}（最新 {MIGRATIONS[-1][0]}）")
+    elif args.command == "check-plans":
+        conn = sqlite3.connect(db_service.DB_FILE)
+        try:
+            results = check_query_plans(conn)
+        finally:
+            conn.close()
+        failed = 0
+        for result in results:
+            if result["skipped"]:
+                print(f"[跳过] {result['name']}: {result['skipped']}")
+                continue
+            status = "整表扫描" if result["table_scans"] else "OK"
+            failed += bool(result["table_scans"])
+            print(f"[{status}] {result['name']}")
+            for detail in result["plan"]:
+                print(f"    {detail}")
+        if failed:
+            print(f"{failed} 条查询出现整表扫描")
+            sys.exit(1)
+    elif args.command == "vacuum":
+        conn = sqlite3.connect(db_service.DB_FILE)
+        try:
+            before = os.path.getsize(db_service.DB_FILE)
+            conn.execute("VACUUM")
+        finally:
+            conn.close()
+        after = os.path.getsize(db_service.DB_FILE)
+        print(f"数据库文件 {before / 1024:.0f} KB -> {after / 1024:.0f} KB")
+    elif args.command == "backfill-stats":
+        count = backfill_quiz_stats()
+        print(f"已重建 {count} 条分析结果的错误率聚合")
+    elif args.command == "backfill-word-counts":
+        count = backfill_word_counts()
+        print(f"已重建 {count} 条分析结果的词频")
+    elif args.command == "backfill-progress":
+        count = backfill_student_progress()
+        print(f"已重建 {count} 行学生进度汇总")
+    elif args.command == "backfill-responses":
+        questions, responses = backfill_question_rows()
+        print(f"已重建 {questions} 道题目、{responses} 条逐题作答")
+    elif args.command == "backfill-search":
+        count = backfill_search_index()
+        print(f"已重建 {count} 份测验的全文索引")
+
+
+if __name__ == "__main__":
+    main()
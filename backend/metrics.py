@@ -0,0 +1,41 @@
+import threading
+
+
+class Metrics:
+    """进程内指标注册表：计数器、当前值与数值分布（count/sum/min/max），供 /metrics 输出"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters = {}
+        self._gauges = {}
+        self._distributions = {}
+
+    def incr(self, name, value=1):
+        with self._lock:
+            self._counters[name] = self._counters.get(name, 0) + value
+
+    def gauge(self, name, value):
+        """记录当前值（如缓存占用字节数），覆盖上一次的值"""
+        with self._lock:
+            self._gauges[name] = value
+
+    def observe(self, name, value):
+        with self._lock:
+            dist = self._distributions.get(name)
+            if dist is None:
+                self._distributions[name] = {"count": 1, "sum": value, "min": value, "max": value}
+            else:
+                dist["count"] += 1
+                dist["sum"] += value
+                dist["min"] = min(dist["min"], value)
+                dist["max"] = max(dist["max"], value)
+
+    def snapshot(self):
+        with self._lock:
+            distributions = {}
+            for name, dist in self._distributions.items():
+                distributions[name] = dict(dist, avg=dist["sum"] / dist["count"])
+            return {"counters": dict(self._counters), "gauges": dict(self._gauges), "distributions": distributions}
+
+
+metrics = Metrics()
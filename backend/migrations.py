@@ -0,0 +1,607 @@
+import sqlite3
+import logging
+import numpy as np
+import serializer
+from error_matrix import pack_error_index, load_error_matrix, grouped_error_counts
+from analysis_payload import split_analysis, encode_payload, merge_analysis
+from question_rows import insert_quiz_questions, insert_responses
+from search_index import rebuild_search_index
+from word_counts import rebuild_word_counts
+
+logger = logging.getLogger(__name__)
+
+# 学生进度汇总的统计周期 -> 由 analysis_results.created_at（UTC）计算周期起始日期的 SQL 表达式，
+# 按服务器本地时区划分自然日，周从周一开始
+PROGRESS_PERIODS = {
+    'day': "date(created_at, 'localtime')",
+    'week': "date(created_at, 'localtime', 'weekday 0', '-6 days')",
+}
+
+
+def ensure_column(cursor, table, column, definition):
+    """表中缺少该列时补充添加（兼容旧数据库）"""
+    columns = [row[1] for row in cursor.execute(f"PRAGMA table_info({table})")]
+    if column not in columns:
+        cursor.execute(f"ALTER TABLE {table} ADD COLUMN {column} {definition}")
+        logger.info(f"已为 {table} 表添加列 {column}")
+
+
+def table_exists(cursor, table):
+    return cursor.execute('''
+    SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?
+    ''', (table,)).fetchone() is not None
+
+
+def create_index_if_table_exists(cursor, index_name, table, columns):
+    """为可能尚未创建的表建立索引"""
+    if table_exists(cursor, table):
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {index_name} ON {table} ({columns})")
+
+
+def backfill_error_bits(cursor):
+    """为尚未压缩 errorIndex 的旧分析结果补写 error_bits 与 question_count"""
+    rows = cursor.execute('''
+    SELECT id, analysis_json FROM analysis_results WHERE error_bits IS NULL
+    ''').fetchall()
+    updates = []
+    for analysis_id, analysis_json in rows:
+        error_index = serializer.loads(analysis_json).get("errorIndex", "")
+        updates.append((pack_error_index(error_index), len(error_index), analysis_id))
+    cursor.executemany('''
+    UPDATE analysis_results SET error_bits = ?, question_count = ? WHERE id = ?
+    ''', updates)
+    if updates:
+        logger.info(f"已压缩 {len(updates)} 条分析结果的 errorIndex")
+    return len(updates)
+
+
+# ---------------------------------------------------------------------------
+# 迁移脚本：按版本号顺序执行，每个迁移在单独的事务中完成并写入 PRAGMA user_version。
+# 旧数据库的 user_version 为 0，但可能已经由早期的 init_database 建过部分表和列，
+# 因此迁移内部同样要写成可重复执行的形式。
+# ---------------------------------------------------------------------------
+
+def migration_001_base_tables(cursor):
+    # 创建 quizzes 表，存储测验题目，并添加 sno
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quizzes (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sno TEXT NOT NULL,  -- 存储学号，确保不同用户的数据分开
+        tno TEXT NOT NULL,  -- 存储老师号，确保不同用户的数据分开
+        title TEXT NOT NULL,
+        file_name TEXT,
+        quiz_json TEXT NOT NULL,
+        question_count INTEGER,
+        difficulty TEXT,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+    )
+    ''')
+
+    # 创建 analysis_results 表，存储分析结果，并添加 sno
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analysis_results (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sno TEXT NOT NULL,  -- 存储学号，确保分析数据与用户绑定
+        quiz_id INTEGER,
+        analysis_json TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+
+    # errorIndex 按位压缩存储，便于批量统计
+    ensure_column(cursor, 'analysis_results', 'error_bits', 'BLOB')
+    ensure_column(cursor, 'analysis_results', 'question_count', 'INTEGER')
+    backfill_error_bits(cursor)
+
+    # 创建 quiz_stats / quiz_question_stats 表，随分析结果保存增量维护的错误率聚合
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quiz_stats (
+        quiz_id INTEGER PRIMARY KEY,
+        submission_count INTEGER NOT NULL DEFAULT 0,
+        incorrect_count INTEGER NOT NULL DEFAULT 0,  -- 所有提交的错题数之和
+        total_questions INTEGER NOT NULL DEFAULT 0,  -- 各提交中最大的题目数
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quiz_question_stats (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,  -- 题目编号从 1 开始
+        error_count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+
+    # 创建 quiz_word_counts 表，保存每个测验 knowledgeAnalysis 的词频，供词云直接查询
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quiz_word_counts (
+        quiz_id INTEGER NOT NULL,
+        word TEXT NOT NULL,
+        count INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (quiz_id, word),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_quiz_word_counts_top
+    ON quiz_word_counts (quiz_id, count DESC)
+    ''')
+
+    # 创建 class_reports 表，缓存每份作业的班级整体分析报告
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS class_reports (
+        quiz_id INTEGER PRIMARY KEY,
+        report TEXT NOT NULL,
+        stats_json TEXT NOT NULL,
+        submission_count INTEGER NOT NULL,  -- 生成报告时的提交数，用于判断是否需要刷新
+        updated_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+
+
+def migration_002_analysis_owner(cursor):
+    """
+    analysis_results 增加 tno 列，sno 改为可空：教师分析只有 tno、没有 sno，
+    原表 sno NOT NULL 导致 save_teacher_analysis 写入失败。
+    SQLite 不能修改列约束，这里按官方推荐的方式重建表。
+    """
+    columns = {row[1]: row for row in cursor.execute("PRAGMA table_info(analysis_results)")}
+    # row[3] 为 notnull 标记
+    if 'tno' in columns and not columns['sno'][3]:
+        return
+
+    cursor.execute('''
+    CREATE TABLE analysis_results_new (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        sno TEXT,  -- 学生提交的分析绑定学号
+        tno TEXT,  -- 教师提交的分析绑定教师号
+        quiz_id INTEGER,
+        analysis_json TEXT NOT NULL,
+        created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+        error_bits BLOB,
+        question_count INTEGER,
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    )
+    ''')
+    kept = [name for name in
+            ('id', 'sno', 'tno', 'quiz_id', 'analysis_json', 'created_at', 'error_bits', 'question_count')
+            if name in columns]
+    cursor.execute(f'''
+    INSERT INTO analysis_results_new ({', '.join(kept)})
+    SELECT {', '.join(kept)} FROM analysis_results
+    ''')
+    cursor.execute("DROP TABLE analysis_results")
+    cursor.execute("ALTER TABLE analysis_results_new RENAME TO analysis_results")
+    logger.info("已重建 analysis_results 表（新增 tno 列，sno 允许为空）")
+
+
+def migration_003_hot_path_indexes(cursor):
+    # 测验列表：按所属人过滤并按 (created_at, id) 分页
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_created ON quizzes (created_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_sno_created ON quizzes (sno, created_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quizzes_tno_created ON quizzes (tno, created_at, id)")
+    # 分析结果列表：学生 / 教师各自的历史
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_analysis_sno_created ON analysis_results (sno, created_at, id)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_analysis_tno_created ON analysis_results (tno, created_at, id)")
+    # 按测验统计提交、查找学生在某测验上的分析
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_analysis_quiz_sno ON analysis_results (quiz_id, sno)")
+
+
+def migration_004_analysis_payloads(cursor):
+    """
+    analysis_results 拆分冷热数据：题目数、正确数、错题数成为独立列，
+    knowledgeAnalysis 与 incorrectQuestions 压缩后移到 analysis_payloads，
+    analysis_json 只保留其余的小字段。
+    """
+    ensure_column(cursor, 'analysis_results', 'total_questions', 'INTEGER')
+    ensure_column(cursor, 'analysis_results', 'correct_count', 'INTEGER')
+    ensure_column(cursor, 'analysis_results', 'incorrect_count', 'INTEGER')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS analysis_payloads (
+        analysis_id INTEGER PRIMARY KEY,
+        codec TEXT NOT NULL,  -- zlib 或 zstd
+        payload BLOB NOT NULL,  -- 压缩后的 {knowledgeAnalysis, incorrectQuestions} JSON
+        FOREIGN KEY (analysis_id) REFERENCES analysis_results(id) ON DELETE CASCADE
+    )
+    ''')
+
+    rows = cursor.execute('''
+    SELECT ar.id, ar.analysis_json
+    FROM analysis_results ar
+    WHERE NOT EXISTS (SELECT 1 FROM analysis_payloads p WHERE p.analysis_id = ar.id)
+    ''').fetchall()
+    for analysis_id, analysis_json in rows:
+        hot, cold = split_analysis(serializer.loads(analysis_json))
+        codec, payload = encode_payload(cold)
+        cursor.execute('''
+        INSERT INTO analysis_payloads (analysis_id, codec, payload) VALUES (?, ?, ?)
+        ''', (analysis_id, codec, payload))
+        cursor.execute('''
+        UPDATE analysis_results
+        SET analysis_json = ?, total_questions = ?, correct_count = ?, incorrect_count = ?
+        WHERE id = ?
+        ''', (serializer.dumps(hot), hot.get("totalQuestions"), hot.get("correctCount"),
+              hot.get("incorrectCount"), analysis_id))
+    if rows:
+        logger.info(f"已拆分压缩 {len(rows)} 条分析结果，可执行 python manage.py vacuum 回收空间")
+
+
+def migration_005_generated_columns(cursor):
+    """
+    errorIndex 作为 json_extract 生成列暴露给 SQL（VIRTUAL，不占存储），
+    并用 SQL 补齐旧数据的题目数/正确数/错题数列；
+    按测验聚合的覆盖索引取代 idx_analysis_quiz_sno，统计提交时只读索引不读表。
+    """
+    ensure_column(cursor, 'analysis_results', 'error_index',
+                  "TEXT GENERATED ALWAYS AS (json_extract(analysis_json, '$.errorIndex')) VIRTUAL")
+    cursor.execute('''
+    UPDATE analysis_results
+    SET total_questions = json_extract(analysis_json, '$.totalQuestions'),
+        correct_count = json_extract(analysis_json, '$.correctCount'),
+        incorrect_count = json_extract(analysis_json, '$.incorrectCount')
+    WHERE total_questions IS NULL
+    ''')
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_analysis_quiz_scores
+    ON analysis_results (quiz_id, sno, total_questions, correct_count, incorrect_count, error_index)
+    ''')
+    cursor.execute("DROP INDEX IF EXISTS idx_analysis_quiz_sno")
+
+
+def rebuild_quiz_stats(cursor):
+    """
+    根据已有学生分析结果重建 quiz_stats 与 quiz_question_stats，返回处理的分析结果数：
+    整体统计直接用 SQL 聚合题目数/错题数列，逐题错误次数用 error_bits 按位归约。
+    """
+    cursor.execute("DELETE FROM quiz_stats")
+    cursor.execute("DELETE FROM quiz_question_stats")
+    cursor.execute('''
+    INSERT INTO quiz_stats (quiz_id, submission_count, incorrect_count, total_questions)
+    SELECT quiz_id, COUNT(*), COALESCE(SUM(incorrect_count), 0), COALESCE(MAX(total_questions), 0)
+    FROM analysis_results
+    WHERE quiz_id IS NOT NULL AND sno IS NOT NULL
+    GROUP BY quiz_id
+    ''')
+
+    rows = cursor.execute('''
+    SELECT quiz_id, error_bits, question_count
+    FROM analysis_results
+    WHERE quiz_id IS NOT NULL AND sno IS NOT NULL
+    ''').fetchall()
+
+    matrix, _ = load_error_matrix([(row[1], row[2]) for row in rows])
+    quiz_ids = np.array([row[0] for row in rows], dtype=np.int64)
+    groups, _, error_counts = grouped_error_counts(matrix, quiz_ids)
+
+    question_stats = []
+    for i, quiz_id in enumerate(groups.tolist()):
+        question_stats.extend((quiz_id, int(q) + 1, int(error_counts[i, q]))
+                              for q in np.flatnonzero(error_counts[i]))
+    cursor.executemany('''
+    INSERT INTO quiz_question_stats (quiz_id, question_no, error_count)
+    VALUES (?, ?, ?)
+    ''', question_stats)
+    return len(rows)
+
+
+def rebuild_student_progress(cursor):
+    """根据已有学生分析结果重建 student_progress，返回写入的汇总行数"""
+    cursor.execute("DELETE FROM student_progress")
+    for period, period_start in PROGRESS_PERIODS.items():
+        cursor.execute(f'''
+        INSERT INTO student_progress (sno, period, period_start, attempts, questions, correct, incorrect)
+        SELECT sno, ?, {period_start}, COUNT(*), COALESCE(SUM(total_questions), 0),
+               COALESCE(SUM(correct_count), 0), COALESCE(SUM(incorrect_count), 0)
+        FROM analysis_results
+        WHERE sno IS NOT NULL
+        GROUP BY sno, {period_start}
+        ''', (period,))
+    return cursor.execute("SELECT COUNT(*) FROM student_progress").fetchone()[0]
+
+
+def migration_006_student_progress(cursor):
+    """学生按日/周的作答汇总（次数、题目数、答对/答错数），保存分析结果时增量更新"""
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS student_progress (
+        sno TEXT NOT NULL,
+        period TEXT NOT NULL,
+        period_start TEXT NOT NULL,
+        attempts INTEGER NOT NULL DEFAULT 0,
+        questions INTEGER NOT NULL DEFAULT 0,
+        correct INTEGER NOT NULL DEFAULT 0,
+        incorrect INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (sno, period, period_start)
+    ) WITHOUT ROWID
+    ''')
+    rebuild_student_progress(cursor)
+
+
+def rebuild_question_rows(cursor):
+    """根据已有测验与分析结果重建 quiz_questions 与 responses，返回 (题目数, 作答数)"""
+    cursor.execute("DELETE FROM quiz_questions")
+    cursor.execute("DELETE FROM responses")
+    for quiz_id, quiz_json in cursor.execute("SELECT id, quiz_json FROM quizzes").fetchall():
+        try:
+            insert_quiz_questions(cursor, quiz_id, quiz_json)
+        except ValueError as e:
+            logger.warning(f"测验 {quiz_id} 的 quiz_json 无法解析，跳过: {str(e)}")
+
+    rows = cursor.execute('''
+    SELECT ar.id, ar.quiz_id, ar.sno, ar.analysis_json, p.codec, p.payload
+    FROM analysis_results ar
+    LEFT JOIN analysis_payloads p ON p.analysis_id = ar.id
+    WHERE ar.quiz_id IS NOT NULL
+    ''').fetchall()
+    for analysis_id, quiz_id, sno, analysis_json, codec, payload in rows:
+        insert_responses(cursor, analysis_id, quiz_id, sno, merge_analysis(analysis_json, codec, payload))
+
+    return (cursor.execute("SELECT COUNT(*) FROM quiz_questions").fetchone()[0],
+            cursor.execute("SELECT COUNT(*) FROM responses").fetchone()[0])
+
+
+def migration_007_question_rows(cursor):
+    """
+    题目与作答的规范化存储：quiz_questions 每题一行，responses 每份提交每题一行，
+    干扰项、常见错误答案与跨测验的题目统计可以直接用 SQL 聚合，不必解析 JSON。
+    """
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS quiz_questions (
+        quiz_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        name TEXT,
+        type TEXT,
+        title TEXT,
+        correct_answer TEXT,  -- 多选题为逗号连接的选项
+        choices TEXT,  -- 选项值的 JSON 数组，非选择题为 NULL
+        PRIMARY KEY (quiz_id, question_no),
+        FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    ''')
+    cursor.execute('''
+    CREATE TABLE IF NOT EXISTS responses (
+        analysis_id INTEGER NOT NULL,
+        question_no INTEGER NOT NULL,
+        quiz_id INTEGER NOT NULL,
+        sno TEXT,  -- 教师自测的作答为 NULL
+        is_correct INTEGER NOT NULL,
+        answer TEXT,  -- 答错时的作答，答对时为 NULL
+        PRIMARY KEY (analysis_id, question_no),
+        FOREIGN KEY (analysis_id) REFERENCES analysis_results(id) ON DELETE CASCADE
+    ) WITHOUT ROWID
+    ''')
+    # 按测验逐题聚合（干扰项、常见错误答案、与 quiz_questions 关联）只读索引
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_responses_quiz_question
+    ON responses (quiz_id, question_no, is_correct, answer, sno)
+    ''')
+    # 学生跨测验的逐题作答
+    cursor.execute('''
+    CREATE INDEX IF NOT EXISTS idx_responses_sno ON responses (sno, quiz_id, question_no, is_correct)
+    ''')
+    # 同一道题出现在多份测验中时按题干关联
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_quiz_questions_title ON quiz_questions (title)")
+    rebuild_question_rows(cursor)
+
+
+def migration_008_question_search(cursor):
+    """测验标题、文件名、题干与选项的 FTS5 全文索引（jieba 预分词，见 search_index）"""
+    cursor.execute('''
+    CREATE VIRTUAL TABLE IF NOT EXISTS question_search USING fts5(
+        quiz_id UNINDEXED,
+        question_no UNINDEXED,
+        owner,
+        title,
+        file_name,
+        question,
+        choices,
+        tokenize = 'unicode61'
+    )
+    ''')
+    count = rebuild_search_index(cursor)
+    if count:
+        logger.info(f"已为 {count} 份测验建立全文索引")
+
+
+def migration_009_quiz_stats(cursor):
+    """
+    用已有分析结果填充错误率聚合表：001 只建了空表，升级后的数据库要等新提交才有统计，
+    /error-rates 与教师看板会报告没有数据。同时按只统计学生提交的口径重算。
+    """
+    count = rebuild_quiz_stats(cursor)
+    if count:
+        logger.info(f"已根据 {count} 条分析结果重建错误率聚合")
+
+
+def migration_010_word_counts(cursor):
+    """用已有分析结果填充词频表：001 只建了空表，升级后的数据库 /word_cloud 会对已有测验返回 404"""
+    count = rebuild_word_counts(cursor)
+    if count:
+        logger.info(f"已根据 {count} 条分析结果重建词频")
+
+
+def migration_011_drop_error_index_column(cursor):
+    """
+    errorIndex 的统计都改为读 error_bits 与 responses 后，error_index 生成列已没有查询使用，
+    去掉它在覆盖索引中的位置（每次插入分析结果都要计算并维护），再删除该列。
+    """
+    cursor.execute("DROP INDEX IF EXISTS idx_analysis_quiz_scores")
+    cursor.execute('''
+    CREATE INDEX idx_analysis_quiz_scores
+    ON analysis_results (quiz_id, sno, total_questions, correct_count, incorrect_count)
+    ''')
+    columns = [row[1] for row in cursor.execute("PRAGMA table_xinfo(analysis_results)")]
+    if 'error_index' in columns:
+        cursor.execute("ALTER TABLE analysis_results DROP COLUMN error_index")
+
+
+MIGRATIONS = [
+    (1, "基础表结构", migration_001_base_tables),
+    (2, "analysis_results 增加 tno 列", migration_002_analysis_owner),
+    (3, "热点查询索引", migration_003_hot_path_indexes),
+    (4, "分析结果冷热拆分与压缩", migration_004_analysis_payloads),
+    (5, "errorIndex 生成列与聚合覆盖索引", migration_005_generated_columns),
+    (6, "学生进度汇总表", migration_006_student_progress),
+    (7, "题目与作答规范化表", migration_007_question_rows),
+    (8, "题库全文索引", migration_008_question_search),
+    (9, "错误率聚合回填", migration_009_quiz_stats),
+    (10, "词频回填", migration_010_word_counts),
+    (11, "删除 errorIndex 生成列", migration_011_drop_error_index_column),
+]
+
+# course / homework / student_course 由用户管理模块创建，可能晚于本模块的迁移，
+# 所以这些索引不进入版本号，而是每次启动时检查
+EXTERNAL_INDEXES = [
+    ('idx_course_tno', 'course', 'tno'),
+    ('idx_homework_cno_qid', 'homework', 'cno, qid'),
+    ('idx_student_course_sno', 'student_course', 'sno, cno'),
+]
+
+
+def get_schema_version(conn):
+    return conn.execute("PRAGMA user_version").fetchone()[0]
+
+
+def pending_migrations(conn):
+    version = get_schema_version(conn)
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def migrate(conn):
+    """
+    依次执行尚未应用的迁移，每个迁移一个事务，失败时回滚该迁移并抛出异常。
+
+    返回:
+        list: 本次应用的迁移版本号
+    """
+    applied = []
+    isolation_level = conn.isolation_level
+    # 由本函数显式控制事务，保证 DDL 与 user_version 一起提交
+    conn.isolation_level = None
+    try:
+        for version, description, apply in pending_migrations(conn):
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            try:
+                # 多进程同时启动时，拿到写锁后再确认一次版本号
+                if get_schema_version(conn) >= version:
+                    cursor.execute("COMMIT")
+                    continue
+                apply(cursor)
+                cursor.execute(f"PRAGMA user_version = {int(version)}")
+                cursor.execute("COMMIT")
+            except Exception:
+                cursor.execute("ROLLBACK")
+                raise
+            applied.append(version)
+            logger.info(f"已应用数据库迁移 {version:03d}: {description}")
+
+        cursor = conn.cursor()
+        for index_name, table, columns in EXTERNAL_INDEXES:
+            create_index_if_table_exists(cursor, index_name, table, columns)
+    finally:
+        conn.isolation_level = isolation_level
+    return applied
+
+
+# ---------------------------------------------------------------------------
+# 查询计划检查：对 db_service 中的热点查询执行 EXPLAIN QUERY PLAN，
+# 出现整表扫描（SCAN <表> 且未使用索引）即视为回退。
+# ---------------------------------------------------------------------------
+
+QUERY_PLAN_CHECKS = [
+    ("测验列表（学生）", '''
+     SELECT q.id, q.title FROM quizzes q WHERE q.sno = ? ORDER BY q.created_at DESC, q.id DESC LIMIT 20
+     ''', ('s',)),
+    ("测验列表（教师）", '''
+     SELECT q.id, q.title FROM quizzes q WHERE q.tno = ? ORDER BY q.created_at DESC, q.id DESC LIMIT 20
+     ''', ('t',)),
+    ("分析列表（学生）", '''
+     SELECT ar.id, q.title FROM analysis_results ar JOIN quizzes q ON ar.quiz_id = q.id
+     WHERE ar.sno = ? ORDER BY ar.created_at DESC, ar.id DESC LIMIT 20
+     ''', ('s',)),
+    ("分析列表（教师）", '''
+     SELECT ar.id, q.title FROM analysis_results ar JOIN quizzes q ON ar.quiz_id = q.id
+     WHERE ar.tno = ? ORDER BY ar.created_at DESC, ar.id DESC LIMIT 20
+     ''', ('t',)),
+    ("学生某测验的分析", '''
+     SELECT ar.id, ar.sno, ar.tno, ar.quiz_id, ar.analysis_json, ar.created_at, p.codec, p.payload
+     FROM analysis_results ar LEFT JOIN analysis_payloads p ON p.analysis_id = ar.id
+     WHERE ar.quiz_id = ? AND ar.sno = ? ORDER BY ar.created_at DESC
+     ''', (1, 's')),
+    ("测验提交统计", '''
+     SELECT COUNT(*) FROM analysis_results WHERE quiz_id = ? AND sno IS NOT NULL
+     ''', (1,)),
+    ("测验成绩聚合", '''
+     SELECT COUNT(*), SUM(incorrect_count), SUM(total_questions) FROM analysis_results
+     WHERE quiz_id = ? AND sno IS NOT NULL
+     ''', (1,)),
+    ("学生错误率", '''
+     SELECT quiz_id, error_bits FROM analysis_results WHERE sno = ? AND quiz_id IS NOT NULL
+     ''', ('s',)),
+    ("词云", '''
+     SELECT word, count FROM quiz_word_counts WHERE quiz_id = ? ORDER BY count DESC LIMIT 40
+     ''', (1,)),
+    ("学生作业列表", '''
+     SELECT q.id, c.cno FROM student_course sc
+     JOIN course c ON c.cno = sc.cno
+     JOIN homework h ON h.cno = sc.cno
+     JOIN quizzes q ON q.id = h.qid
+     WHERE sc.sno = ?
+     ''', ('s',)),
+    ("教师看板作业", '''
+     SELECT c.cno, h.qid FROM course c JOIN homework h ON h.cno = c.cno WHERE c.tno = ?
+     ''', ('t',)),
+    ("学生进度", '''
+     SELECT period_start, attempts FROM student_progress
+     WHERE sno = ? AND period = ? AND period_start BETWEEN ? AND ? ORDER BY period_start
+     ''', ('s', 'week', '2024-01-01', '2024-12-31')),
+    ("干扰项统计", '''
+     SELECT question_no, answer, COUNT(*) FROM responses
+     WHERE quiz_id = ? AND is_correct = 0 AND sno IS NOT NULL GROUP BY question_no, answer
+     ''', (1,)),
+    ("跨测验同题统计", '''
+     SELECT qq.quiz_id, qq.question_no, AVG(r.is_correct) FROM quiz_questions qq
+     JOIN responses r ON r.quiz_id = qq.quiz_id AND r.question_no = qq.question_no
+     WHERE qq.title = ? GROUP BY qq.quiz_id, qq.question_no
+     ''', ('t',)),
+    ("学生逐题作答", '''
+     SELECT quiz_id, question_no, is_correct FROM responses WHERE sno = ?
+     ''', ('s',)),
+]
+
+
+def explain(conn, sql, params):
+    """返回查询计划的 detail 列表"""
+    return [row[-1] for row in conn.execute(f"EXPLAIN QUERY PLAN {sql}", params)]
+
+
+def is_table_scan(detail):
+    # 形如 "SCAN quizzes"；"SCAN q USING INDEX ..." 为按索引顺序遍历，不算整表扫描
+    return detail.startswith("SCAN ") and "USING" not in detail
+
+
+def check_query_plans(conn):
+    """
+    检查热点查询的执行计划。
+
+    返回:
+        list: [{name, plan, table_scans, skipped}]，skipped 表示依赖的表不存在
+    """
+    results = []
+    for name, sql, params in QUERY_PLAN_CHECKS:
+        try:
+            plan = explain(conn, sql, params)
+        except sqlite3.OperationalError as e:
+            results.append({"name": name, "plan": [], "table_scans": [], "skipped": str(e)})
+            continue
+        results.append({
+            "name": name,
+            "plan": plan,
+            "table_scans": [detail for detail in plan if is_table_scan(detail)],
+            "skipped": None,
+        })
+    return results
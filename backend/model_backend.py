@@ -0,0 +1,153 @@
+import re
+import json
+import time
+import random
+import hashlib
+import logging
+import threading
+
+logger = logging.getLogger(__name__)
+
+# 离线模式下未配置 EXAMPLE_JSON 时使用的测验格式示例
+DEFAULT_EXAMPLE_JSON = {
+    "title": "测验标题",
+    "pages": [{
+        "elements": [{
+            "type": "radiogroup",
+            "name": "question1",
+            "title": "题目内容",
+            "isRequired": True,
+            "choices": ["选项A", "选项B", "选项C", "选项D"],
+            "correctAnswer": "选项A"
+        }]
+    }]
+}
+
+
+class SimpleResponse:
+    """与 Gemini 响应对象兼容的最小结构，只提供 text"""
+
+    def __init__(self, text):
+        self.text = text
+
+
+def prompt_key(prompt):
+    return hashlib.sha256(prompt.encode('utf-8')).hexdigest()
+
+
+class RecordingBackend:
+    """透传给真实模型，并把 提示→响应 追加写入 JSONL 文件"""
+
+    def __init__(self, inner, path):
+        self.inner = inner
+        self.path = path
+        self._lock = threading.Lock()
+
+    def generate_content(self, prompt):
+        start = time.time()
+        response = self.inner.generate_content(prompt)
+        record = {
+            "key": prompt_key(prompt),
+            "prompt": prompt,
+            "response": response.text,
+            "latency": time.time() - start
+        }
+        with self._lock:
+            with open(self.path, 'a', encoding='utf-8') as f:
+                f.write(json.dumps(record, ensure_ascii=False) + "\n")
+        return response
+
+
+class ReplayBackend:
+    """
+    从录制文件回放响应。
+
+    latency_ms 为 None 时按录制时的实际耗时等待，否则固定等待该毫秒数。
+    未录制的提示交给 fallback 处理（为 None 时抛出 KeyError）。
+    """
+
+    def __init__(self, path, latency_ms=None, fallback=None):
+        self.latency_ms = latency_ms
+        self.fallback = fallback
+        self.records = {}
+        with open(path, 'r', encoding='utf-8') as f:
+            for line in f:
+                if line.strip():
+                    record = json.loads(line)
+                    self.records[record['key']] = record
+        logger.info(f"已加载 {len(self.records)} 条录制的模型响应: {path}")
+
+    def generate_content(self, prompt):
+        record = self.records.get(prompt_key(prompt))
+        if record is None:
+            if self.fallback is None:
+                raise KeyError("录制文件中没有该提示的响应")
+            return self.fallback.generate_content(prompt)
+        delay = record.get('latency', 0) if self.latency_ms is None else self.latency_ms / 1000.0
+        time.sleep(delay)
+        return SimpleResponse(record['response'])
+
+
+class SyntheticBackend:
+    """根据提示类型生成合法的测验 JSON 或分析文本，同一提示的输出固定"""
+
+    def __init__(self, latency_ms=0):
+        self.latency_ms = latency_ms
+
+    def generate_content(self, prompt):
+        time.sleep(self.latency_ms / 1000.0)
+        rng = random.Random(prompt_key(prompt))
+
+        if "JSON格式生成" in prompt:
+            return SimpleResponse(json.dumps(self._quiz(prompt, rng), ensure_ascii=False))
+
+        students = re.findall(r'学生 (\d+):', prompt)
+        if "<<<STUDENT" in prompt and students:
+            sections = [f"<<<STUDENT {i}>>>\n{self._analysis(rng)}" for i in students]
+            return SimpleResponse("\n".join(sections))
+
+        return SimpleResponse(self._analysis(rng))
+
+    def _quiz(self, prompt, rng):
+        match = re.search(r'生成(\d+)道', prompt)
+        count = int(match.group(1)) if match else 5
+        if "请仅生成填空题" in prompt:
+            types = ['text']
+        elif "请混合生成" in prompt:
+            types = ['radiogroup', 'text']
+        else:
+            types = ['radiogroup']
+
+        elements = []
+        for i in range(1, count + 1):
+            question_type = rng.choice(types)
+            if question_type == 'text':
+                elements.append({
+                    "type": "text",
+                    "name": f"question{i}",
+                    "title": f"合成填空题 {i}",
+                    "isRequired": True,
+                    "correctAnswer": f"答案{i}"
+                })
+            else:
+                choices = [f"选项{i}-{c}" for c in "ABCD"]
+                elements.append({
+                    "type": "radiogroup",
+                    "name": f"question{i}",
+                    "title": f"合成选择题 {i}",
+                    "isRequired": True,
+                    "choices": choices,
+                    "correctAnswer": rng.choice(choices)
+                })
+        return {"title": "合成测验", "pages": [{"elements": elements}]}
+
+    def _analysis(self, rng):
+        return "\n".join([
+            "# 测试结果分析",
+            "",
+            "## 知识点不足的区域",
+            f"- 合成知识点 {rng.randint(1, 100)}",
+            "",
+            "## 改进建议",
+            "1. 复习相关章节并完成练习。",
+        ])
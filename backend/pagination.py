@@ -0,0 +1,115 @@
+import json
+import base64
+
+# 分页接口单页最大条数
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(values):
+    """把排序键（如 [created_at, id]）编码为不透明的游标字符串"""
+    raw = json.dumps(values, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor, size=2):
+    """解析游标，格式不正确时抛出 ValueError"""
+    try:
+        padded = cursor + '=' * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode('ascii')))
+    except (ValueError, UnicodeError) as e:
+        raise ValueError(f"无效的游标: {cursor}") from e
+    if not isinstance(values, list) or len(values) != size:
+        raise ValueError(f"无效的游标: {cursor}")
+    return values
+
+
+def parse_limit(value):
+    """解析 limit 参数，未提供时返回 None（不分页）"""
+    if value in (None, ''):
+        return None
+    limit = int(value)
+    if limit <= 0:
+        raise ValueError("limit 必须为正整数")
+    return min(limit, MAX_PAGE_SIZE)
+
+
+def split_page(rows, limit, cursor_key):
+    """
+    按 limit + 1 条查询结果切出当前页，返回 (当前页, 下一页游标或 None)。
+    cursor_key(row) 返回该行的排序键列表。
+    """
+    if limit is None or len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(cursor_key(page[-1]))
+
+
+def parse_sort(value):
+    """
+    解析 sort 参数：-created_at（按创建时间倒序，默认）或 created_at（正序）。
+    返回是否倒序。
+    """
+    if value in (None, '', '-created_at'):
+        return True
+    if value == 'created_at':
+        return False
+    raise ValueError(f"不支持的排序方式: {value}")
+
+
+def parse_fields(value):
+    """解析 fields 参数（逗号分隔），未提供时返回 None（返回全部字段）"""
+    if value in (None, ''):
+        return None
+    return [field.strip() for field in value.split(',') if field.strip()]
+
+
+def fetch_page(cursor_obj, columns, from_sql, conditions, params, keys,
+               limit=None, cursor=None, descending=True, fields=None, group_by=None):
+    """
+    执行按排序键做 keyset 分页的列表查询，LIMIT 与定位条件都下推到 SQL。
+
+    参数:
+        columns: 输出字段名 -> SQL 表达式，同时作为 fields 的白名单
+        from_sql: FROM/JOIN 子句
+        conditions, params: WHERE 条件及其参数
+        keys: 排序键字段名（须唯一确定一行），如 ['created_at', 'id']
+        fields: 只返回这些字段，None 表示返回 columns 中的全部字段
+
+    返回:
+        (当前页, 下一页游标或 None)
+    """
+    fields = fields or list(columns)
+    unknown = [field for field in fields if field not in columns]
+    if unknown:
+        raise ValueError(f"不支持的字段: {', '.join(unknown)}")
+
+    # 排序键即使未被请求也要查出来，用于生成下一页游标
+    selected = fields + [key for key in keys if key not in fields]
+    key_exprs = [columns[key] for key in keys]
+    conditions = list(conditions)
+    params = list(params)
+    if cursor:
+        values = decode_cursor(cursor, size=len(keys))
+        conditions.append(
+            f"({', '.join(key_exprs)}) {'<' if descending else '>'} ({', '.join('?' * len(keys))})"
+        )
+        params.extend(values)
+
+    direction = 'DESC' if descending else 'ASC'
+    sql = f'''
+    SELECT {', '.join(f'{columns[name]} AS {name}' for name in selected)}
+    {from_sql}
+    WHERE {' AND '.join(conditions)}
+    {f'GROUP BY {group_by}' if group_by else ''}
+    ORDER BY {', '.join(f'{expr} {direction}' for expr in key_exprs)}
+    '''
+    if limit is not None:
+        sql += " LIMIT ?"
+        params.append(limit + 1)
+
+    cursor_obj.execute(sql, params)
+    rows = [dict(row) for row in cursor_obj.fetchall()]
+    page, next_cursor = split_page(rows, limit, lambda row: [row[key] for key in keys])
+    if len(selected) > len(fields):
+        page = [{field: row[field] for field in fields} for row in page]
+    return page, next_cursor
@@ -0,0 +1,42 @@
+import re
+import json
+import math
+
+CJK_PATTERN = re.compile(r'[\u3000-\u303f\u3400-\u4dbf\u4e00-\u9fff\uff00-\uffef]')
+
+
+def compact_json(obj):
+    """不带缩进和多余空白的 JSON，中文不转义"""
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':'))
+
+
+def encode_records(records):
+    """
+    将字典列表编码为列式 JSON：{"cols": [...], "rows": [[...], ...]}，
+    字段名只出现一次，值全为空的字段整列省略。
+    """
+    if not records or not all(isinstance(r, dict) for r in records):
+        return compact_json(records)
+
+    cols = []
+    for record in records:
+        for key, value in record.items():
+            if key not in cols and value is not None:
+                cols.append(key)
+    rows = [[record.get(col) for col in cols] for record in records]
+    return compact_json({"cols": cols, "rows": rows})
+
+
+def squeeze_prompt(prompt):
+    """去掉提示中代码缩进带来的行首空白和空行"""
+    return "\n".join(line.strip() for line in prompt.splitlines() if line.strip())
+
+
+def estimate_tokens(text):
+    """
+    本地估算 token 数：中日韩字符按每字 1 个 token，其余字符按每 4 个字符 1 个 token。
+    """
+    if not text:
+        return 0
+    cjk = len(CJK_PATTERN.findall(text))
+    return cjk + math.ceil((len(text) - cjk) / 4)
@@ -0,0 +1,77 @@
+import serializer
+
+# quiz_questions / responses 两张规范化表的写入。
+# 题号 question_no 从 1 开始：测验中为题目按页展开后的位置，作答中为 errorIndex 的位置，
+# 与 quiz_question_stats 等统计的题号含义一致。
+
+
+def answer_key(answer):
+    """把作答/标准答案统一为字符串，多选答案用逗号连接"""
+    if isinstance(answer, list):
+        answer = ",".join(str(a) for a in answer)
+    return str(answer) if answer else "（未作答）"
+
+
+def correct_options(question_type, correct_answer):
+    """标准答案包含的全部选项：多选题的 correct_answer 是逗号连接的多个选项"""
+    if not correct_answer:
+        return set()
+    if question_type == 'checkbox':
+        return set(correct_answer.split(","))
+    return {correct_answer}
+
+
+def quiz_elements(quiz_json):
+    """测验 JSON（dict 或文本）中的全部题目，按页展开"""
+    if isinstance(quiz_json, str):
+        quiz_json = serializer.loads(quiz_json)
+    if not isinstance(quiz_json, dict):
+        return []
+    return [element for page in quiz_json.get('pages', []) for element in page.get('elements', [])]
+
+
+def quiz_question_rows(quiz_id, quiz_json):
+    """测验 JSON -> quiz_questions 的行"""
+    rows = []
+    for question_no, element in enumerate(quiz_elements(quiz_json), start=1):
+        choices = element.get('choices')
+        correct_answer = element.get('correctAnswer')
+        rows.append((
+            quiz_id, question_no, element.get('name'), element.get('type'), element.get('title'),
+            answer_key(correct_answer) if correct_answer else None,
+            serializer.dumps([choice.get('value') if isinstance(choice, dict) else choice for choice in choices])
+            if choices else None,
+        ))
+    return rows
+
+
+def response_rows(analysis_id, quiz_id, sno, analysis):
+    """
+    完整分析结果 -> responses 的行：errorIndex 的每一位对应一道题，
+    答错时 answer 为 incorrectQuestions 中的作答，答对时为 NULL（即标准答案）。
+    """
+    incorrect_questions = iter(analysis.get("incorrectQuestions") or [])
+    rows = []
+    for position, char in enumerate(analysis.get("errorIndex", ""), start=1):
+        if char == '1':
+            # errorIndex 中为 '1' 的位置与 incorrectQuestions 按顺序一一对应
+            item = next(incorrect_questions, None)
+            answer = answer_key(item.get('userAnswer')) if item else None
+            rows.append((analysis_id, position, quiz_id, sno, 0, answer))
+        else:
+            rows.append((analysis_id, position, quiz_id, sno, 1, None))
+    return rows
+
+
+def insert_quiz_questions(cursor, quiz_id, quiz_json):
+    cursor.executemany('''
+    INSERT OR REPLACE INTO quiz_questions (quiz_id, question_no, name, type, title, correct_answer, choices)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', quiz_question_rows(quiz_id, quiz_json))
+
+
+def insert_responses(cursor, analysis_id, quiz_id, sno, analysis):
+    cursor.executemany('''
+    INSERT OR REPLACE INTO responses (analysis_id, question_no, quiz_id, sno, is_correct, answer)
+    VALUES (?, ?, ?, ?, ?, ?)
+    ''', response_rows(analysis_id, quiz_id, sno, analysis))
@@ -1,13 +1,13 @@
 import os
 import json
 import logging
-from config import get_model
+from llm_service import call_model
+from prompt_codec import compact_json
 
 logger = logging.getLogger(__name__)
 
 def generate_quiz(content, question_count, difficulty, include_multiple_choice=True, include_fill_in_blank=False, notes=None):
     """生成测验题目"""
-    model = get_model()
     example_json = json.loads(os.getenv('EXAMPLE_JSON'))
     
     # 构建题型要求
@@ -51,13 +51,12 @@ def generate_quiz(content, question_count, difficulty, include_multiple_choice=T
     {content[:3000]}
     
     请严格按照以下JSON格式生成（不要添加任何其他文本）:
-    {json.dumps(example_json, indent=2, ensure_ascii=False)}
+    {compact_json(example_json)}
     """
 
     try:
-        response = model.generate_content(prompt)
+        response_text = call_model('generate_quiz', prompt).strip()
         logger.info("测验内容生成成功")
-        response_text = response.text.strip()
         
         # 尝试清理响应文本以获取有效的JSON
         # 找到第一个 { 和最后一个 }
@@ -0,0 +1,105 @@
+import os
+import logging
+import threading
+from llm_service import call_model
+from prompt_codec import encode_records
+from db_service import (get_quiz_submission_count, get_quiz_answer_stats,
+                        get_class_report, save_class_report)
+
+logger = logging.getLogger(__name__)
+
+# 新增多少份提交后才重新生成班级报告
+CLASS_REPORT_REFRESH_THRESHOLD = int(os.getenv('CLASS_REPORT_REFRESH_THRESHOLD', '10'))
+
+_refresh_locks = {}
+_refresh_locks_guard = threading.Lock()
+
+
+def _refresh_lock(quiz_id):
+    with _refresh_locks_guard:
+        return _refresh_locks.setdefault(quiz_id, threading.Lock())
+
+
+def build_class_report_prompt(stats, previous_report=None):
+    """构建班级报告提示，已有报告时要求模型在其基础上增量更新"""
+    prompt = f"""
+    你是一名教学分析专家。以下是一份作业全班 {stats['submission_count']} 名学生的答题统计，
+    questions 中为出错的题目：errorRate 为错误率，wrongAnswers 为最常见的错误答案及人数。
+
+    {encode_records(stats['questions'])}
+
+    请以“班级测试结果分析“为题目，使用markdown格式输出:
+    1. 全班共性的知识薄弱点（按严重程度排序）
+    2. 典型错误答案反映出的误解
+    3. 针对性的教学建议
+    """
+    if previous_report:
+        prompt += f"""
+    以下是基于较早提交数据生成的上一版报告，请结合最新统计进行更新，保留仍然成立的结论:
+    {previous_report}
+    """
+    return prompt
+
+
+def render_local_class_report(stats):
+    """模型不可用时，根据统计数据直接生成班级报告"""
+    lines = [
+        "# 班级测试结果分析",
+        "",
+        f"共 {stats['submission_count']} 名学生提交。",
+        "",
+        "## 错误率较高的题目",
+    ]
+    ranked = sorted(stats['questions'], key=lambda q: q['errorRate'], reverse=True)
+    if not ranked:
+        lines.append("全班所有题目均回答正确。")
+    for q in ranked[:10]:
+        wrong = "，".join(f"{w['answer']}（{w['count']}人）" for w in q['wrongAnswers'])
+        lines.append(f"- 第{q['question']}题 {q['title']}：错误率 {q['errorRate']:.0%}，"
+                     f"正确答案 {q['correctAnswer']}，常见错误答案 {wrong}")
+    lines += ["", "> 本报告由统计数据直接生成。"]
+    return "\n".join(lines)
+
+
+def refresh_class_report(quiz_id, previous=None):
+    """重新汇总统计并调用一次模型生成班级报告，写入缓存"""
+    with _refresh_lock(quiz_id):
+        # 等锁期间其他线程可能已经刷新过
+        latest = get_class_report(quiz_id)
+        if latest and previous and latest['submission_count'] > previous['submission_count']:
+            return latest
+
+        stats = get_quiz_answer_stats(quiz_id)
+        if not stats['submission_count']:
+            return None
+
+        previous_report = latest['report'] if latest else None
+        try:
+            report = call_model('class_report', build_class_report_prompt(stats, previous_report))
+            logger.info(f"班级报告生成成功，测验ID: {quiz_id}")
+        except Exception as e:
+            logger.error(f"班级报告生成失败，使用统计报告: {str(e)}")
+            if latest:
+                return latest
+            report = render_local_class_report(stats)
+
+        save_class_report(quiz_id, report, stats, stats['submission_count'])
+        return get_class_report(quiz_id)
+
+
+def get_or_refresh_class_report(quiz_id, force=False):
+    """
+    获取班级报告。
+
+    缓存存在时直接返回；新增提交数达到阈值后在后台刷新，本次仍返回缓存（stale 为 True）。
+    无缓存或 force 时同步生成。
+    """
+    cached = get_class_report(quiz_id)
+    if cached is None or force:
+        return refresh_class_report(quiz_id, cached)
+
+    new_submissions = get_quiz_submission_count(quiz_id) - cached['submission_count']
+    cached['stale'] = new_submissions >= CLASS_REPORT_REFRESH_THRESHOLD
+    if cached['stale'] and not _refresh_lock(quiz_id).locked():
+        threading.Thread(target=refresh_class_report, args=(quiz_id, cached), daemon=True).start()
+    return cached
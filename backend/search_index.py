@@ -0,0 +1,75 @@
+import re
+import serializer
+import tokenizer_service
+from question_rows import quiz_elements
+
+# question_search 为 FTS5 全文索引，每份测验一行（question_no 为 0，测验标题与文件名）
+# 加每道题一行（题干与选项）。中文先用 jieba 分词再以空格连接写入，
+# FTS5 的 unicode61 分词器只需按空格切分；查询词也用 jieba 分词后逐词匹配。
+# owner 列保存归属人标记（见 owner_token），查询时作为 MATCH 条件之一，由索引直接过滤。
+
+# bm25 各列权重，顺序同建表列：quiz_id, question_no, owner, title, file_name, question, choices
+SEARCH_WEIGHTS = (0.0, 0.0, 0.0, 5.0, 3.0, 2.0, 1.0)
+
+# 只保留含字母、数字或汉字的词，去掉标点与空白
+WORD_PATTERN = re.compile(r'\w', re.UNICODE)
+
+
+def owner_token(column, value):
+    """归属人 -> 只含字母数字的索引词，如 tno + 教师号的十六进制"""
+    return column + str(value).encode('utf-8').hex()
+
+
+def segment(text, for_search=True):
+    """分词并以空格连接，for_search 时额外切出长词中的短词以提高召回"""
+    if not text:
+        return ""
+    cut = tokenizer_service.lcut_for_search if for_search else tokenizer_service.lcut
+    return " ".join(word for word in cut(str(text)) if WORD_PATTERN.search(word))
+
+
+def search_rows(tno, sno, title, file_name, quiz_json):
+    """
+    测验 -> question_search 的行（不含 quiz_id），分词较慢，应在写入线程之外调用。
+    返回 [(question_no, owner, title, file_name, question, choices)]
+    """
+    owner = " ".join(owner_token(column, value) for column, value in (('tno', tno), ('sno', sno)) if value)
+    rows = [(0, owner, segment(title), segment(file_name), "", "")]
+    for question_no, element in enumerate(quiz_elements(quiz_json), start=1):
+        choices = [choice.get('text', choice.get('value')) if isinstance(choice, dict) else choice
+                   for choice in element.get('choices') or []]
+        rows.append((question_no, owner, "", "", segment(element.get('title')),
+                     segment(" ".join(str(choice) for choice in choices))))
+    return rows
+
+
+def insert_search_rows(cursor, quiz_id, rows):
+    cursor.executemany('''
+    INSERT INTO question_search (quiz_id, question_no, owner, title, file_name, question, choices)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+    ''', [(quiz_id, *row) for row in rows])
+
+
+def match_query(query, owner_column, owner):
+    """
+    用户输入 -> FTS5 MATCH 表达式：分词后每个词作为短语，全部命中才算匹配，并限定归属人。
+    没有可检索的词时抛出 ValueError。
+    """
+    words = [word for word in tokenizer_service.lcut(query) if WORD_PATTERN.search(word)]
+    if not words:
+        raise ValueError("缺少搜索关键词")
+    phrases = " ".join('"' + word.replace('"', '""') + '"' for word in dict.fromkeys(words))
+    return f'owner : {owner_token(owner_column, owner)} AND ({phrases})'
+
+
+def rebuild_search_index(cursor):
+    """根据已有测验重建 question_search，返回索引的测验数"""
+    cursor.execute("DELETE FROM question_search")
+    quizzes = cursor.execute("SELECT id, tno, sno, title, file_name, quiz_json FROM quizzes").fetchall()
+    for quiz_id, tno, sno, title, file_name, quiz_json in quizzes:
+        try:
+            quiz_json = serializer.loads(quiz_json)
+        except ValueError:
+            quiz_json = {}
+        insert_search_rows(cursor, quiz_id, search_rows(tno, sno, title, file_name, quiz_json))
+    return len(quizzes)
@@ -0,0 +1,65 @@
+import os
+import json
+import logging
+from flask.json.provider import JSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# JSON 序列化实现：orjson（需安装 orjson，默认可用时优先）或 json（标准库）
+JSON_BACKEND = os.getenv('JSON_BACKEND') or ('orjson' if orjson else 'json')
+
+if JSON_BACKEND == 'orjson' and orjson is None:
+    logger.warning("未安装 orjson，JSON 序列化改用标准库 json")
+    JSON_BACKEND = 'json'
+
+if JSON_BACKEND == 'orjson':
+    # 非字符串键（如题号 int）与标准库一样转为字符串
+    ORJSON_OPTIONS = orjson.OPT_NON_STR_KEYS
+
+
+def dumps_bytes(obj):
+    """obj -> UTF-8 编码的紧凑 JSON（bytes），中文不转义"""
+    if JSON_BACKEND == 'orjson':
+        try:
+            return orjson.dumps(obj, option=ORJSON_OPTIONS)
+        except TypeError:
+            # orjson 不支持的类型（如超出 64 位的整数）交给标准库处理
+            pass
+    return json.dumps(obj, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def dumps(obj):
+    """obj -> JSON 文本（str），用于写入数据库的 JSON 列"""
+    return dumps_bytes(obj).decode('utf-8')
+
+
+def loads(data):
+    """JSON 文本（str 或 bytes）-> Python 对象"""
+    if JSON_BACKEND == 'orjson':
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class FastJSONProvider(JSONProvider):
+    """让 jsonify / request.get_json 使用同一套序列化实现"""
+
+    mimetype = 'application/json'
+
+    def dumps(self, obj, **kwargs):
+        return dumps(obj)
+
+    def loads(self, s, **kwargs):
+        return loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps_bytes(obj), mimetype=self.mimetype)
+
+
+def init_app(app):
+    app.json = FastJSONProvider(app)
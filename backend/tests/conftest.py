@@ -0,0 +1,38 @@
+import os
+import sys
+
+import pytest
+
+# 测试直接导入 backend 下的模块
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import db_service
+from cache_service import DependencyCache, LRUCache
+
+
+@pytest.fixture
+def db_path(tmp_path, monkeypatch):
+    """每个测试使用独立的数据库文件与空缓存，返回数据库路径（尚未建表）"""
+    monkeypatch.chdir(tmp_path)
+    path = str(tmp_path / "database.db")
+    # 绝对路径使连接池与写入线程不会复用其他测试的连接
+    monkeypatch.setattr(db_service, "DB_FILE", path)
+    monkeypatch.setattr(db_service, "dashboard_cache", DependencyCache())
+    monkeypatch.setattr(db_service, "item_analysis_cache", DependencyCache())
+    monkeypatch.setattr(db_service, "quiz_cache", LRUCache("quiz", db_service.QUIZ_CACHE_MAX_BYTES))
+    return path
+
+
+@pytest.fixture
+def database(db_path):
+    """已执行全部迁移的空数据库"""
+    db_service.init_database()
+    return db_path
+
+
+@pytest.fixture
+def client(db_path, monkeypatch):
+    """Flask 测试客户端，使用离线的合成模型后端"""
+    monkeypatch.setenv("MODEL_BACKEND", "synthetic")
+    import app
+    return app.app.test_client()
@@ -0,0 +1,41 @@
+import json
+
+import db_service
+
+QUIZ = {
+    "pages": [{
+        "elements": [
+            {"type": "radiogroup", "name": "question1", "title": "1 + 1 = ?",
+             "choices": ["1", "2"], "correctAnswer": "2"},
+        ]
+    }]
+}
+
+ANALYSIS = {
+    "totalQuestions": 1,
+    "correctCount": 0,
+    "incorrectCount": 1,
+    "errorIndex": "1",
+    "knowledgeAnalysis": "加法",
+    "incorrectQuestions": [{"question": "1 + 1 = ?", "correctAnswer": "2", "userAnswer": "1"}],
+}
+
+DETAIL_KEYS = {'id', 'sno', 'tno', 'quiz_id', 'created_at', 'analysis_json'}
+
+
+def test_analysis_readers_return_only_json_columns(database):
+    quiz_id = db_service.save_quiz('t-read', '', '加法', 'quiz.pdf', QUIZ, 1, 'easy')
+    analysis_id = db_service.save_analysis('s-read', quiz_id, ANALYSIS)
+    teacher_analysis_id = db_service.save_teacher_analysis('t-read', quiz_id, ANALYSIS)
+
+    results = [
+        db_service.get_analysis_by_id('s-read', analysis_id),
+        db_service.get_teacher_analysis_by_id('t-read', teacher_analysis_id),
+        *db_service.get_analysis_by_quiz_id('s-read', quiz_id),
+    ]
+
+    for result in results:
+        assert set(result) == DETAIL_KEYS
+        # 能直接序列化为 JSON 响应（不含 error_bits 等 BLOB 列）
+        json.dumps(result, ensure_ascii=False)
+        assert result['analysis_json']['incorrectQuestions'] == ANALYSIS['incorrectQuestions']
@@ -0,0 +1,40 @@
+import threading
+
+import batch_service
+from batch_service import AnalysisBatcher
+
+
+def test_batch_size_is_capped_by_analysis_workers():
+    assert AnalysisBatcher(window_ms=200, max_size=16, workers=4).max_size == 4
+    assert AnalysisBatcher(window_ms=200, max_size=3, workers=8).max_size == 3
+
+
+def test_requests_for_one_quiz_share_one_model_call(monkeypatch):
+    calls = []
+
+    def generate_batch(entries):
+        calls.append(len(entries))
+        return {i: f"分析{entry.correct_count}" for i, entry in enumerate(entries, start=1)}
+
+    monkeypatch.setattr(batch_service, "generate_batch_analysis", generate_batch)
+    batcher = AnalysisBatcher(window_ms=2000, max_size=3, workers=8)
+    results = {}
+
+    def submit(correct_count):
+        results[correct_count] = batcher.submit(1, 5, correct_count, [{"question": "q"}],
+                                                lambda *args: "单独分析")
+
+    threads = [threading.Thread(target=submit, args=(i,)) for i in range(3)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    # 批次装满即发起请求，不必等到窗口结束
+    assert calls == [3]
+    assert results == {0: "分析0", 1: "分析1", 2: "分析2"}
+
+
+def test_single_request_uses_single_generator():
+    batcher = AnalysisBatcher(window_ms=1, max_size=3, workers=8)
+    assert batcher.submit(1, 5, 4, [{"question": "q"}], lambda *args: "单独分析") == "单独分析"
@@ -0,0 +1,59 @@
+import time
+
+import analysis_service
+from analysis_service import CircuitBreaker
+
+INCORRECT = [{"question": "1 + 1 = ?", "correctAnswer": "2", "userAnswer": "3", "type": "radiogroup"}]
+
+
+def open_breaker(cooldown):
+    breaker = CircuitBreaker(threshold=2, cooldown=cooldown)
+    breaker.record_failure()
+    breaker.record_failure()
+    return breaker
+
+
+def test_breaker_opens_after_threshold_failures():
+    breaker = CircuitBreaker(threshold=2, cooldown=60)
+    breaker.record_failure()
+    assert not breaker.is_open()
+    breaker.record_failure()
+    assert breaker.is_open()
+
+
+def test_half_open_allows_a_single_probe():
+    breaker = open_breaker(cooldown=0.01)
+    time.sleep(0.02)
+
+    assert not breaker.is_open()  # 第一个请求成为试探请求
+    assert breaker.is_open()      # 试探完成前其他请求仍走本地分析
+    assert breaker.is_open()
+
+    breaker.record_success()
+    assert not breaker.is_open()
+    assert not breaker.is_open()
+
+
+def test_failed_probe_restarts_cooldown():
+    breaker = open_breaker(cooldown=0.05)
+    time.sleep(0.06)
+    assert not breaker.is_open()
+
+    breaker.record_failure()
+    assert breaker.is_open()
+    time.sleep(0.06)
+    assert not breaker.is_open()
+
+
+def test_open_breaker_returns_local_analysis(monkeypatch):
+    monkeypatch.setattr(analysis_service, "circuit_breaker", open_breaker(cooldown=60))
+
+    def fail(*args):
+        raise AssertionError("熔断期间不应调用模型")
+
+    monkeypatch.setattr(analysis_service, "_call_llm_analysis", fail)
+    text, source, pending = analysis_service.resolve_knowledge_analysis(1, 1, 0, INCORRECT, mode='llm')
+
+    assert source == "local"
+    assert pending is None
+    assert text
@@ -0,0 +1,67 @@
+import threading
+
+from flask import Flask
+
+import db_pool
+
+
+def make_app():
+    app = Flask(__name__)
+    db_pool.init_app(app)
+    return app
+
+
+def test_request_reuses_one_connection(tmp_path):
+    path = str(tmp_path / "pool.db")
+    app = make_app()
+
+    with app.app_context():
+        first = db_pool.get_connection(path)
+        db_pool.release_connection(first)
+        second = db_pool.get_connection(path)
+        # 外层未释放时的嵌套借出使用独立连接
+        nested = db_pool.get_connection(path)
+        assert second is first
+        assert nested is not first
+        db_pool.release_connection(nested)
+        db_pool.release_connection(second)
+
+    # 请求结束后连接回到连接池，下一个请求继续使用
+    with app.app_context():
+        conn = db_pool.get_connection(path)
+        assert conn is first or conn is nested
+        db_pool.release_connection(conn)
+
+
+def test_request_connection_rolls_back_uncommitted_work(tmp_path):
+    path = str(tmp_path / "pool.db")
+    app = make_app()
+
+    with app.app_context():
+        conn = db_pool.get_connection(path)
+        conn.execute("CREATE TABLE t (a INTEGER)")
+        conn.commit()
+        conn.execute("INSERT INTO t VALUES (1)")
+        db_pool.release_connection(conn)
+
+        conn = db_pool.get_connection(path)
+        assert conn.execute("SELECT COUNT(*) FROM t").fetchone()[0] == 0
+        # 未归还的连接在请求结束时由 teardown 回收
+
+
+def test_pool_is_shared_across_threads(tmp_path):
+    path = str(tmp_path / "pool.db")
+    seen = set()
+
+    def work():
+        conn = db_pool.get_connection(path)
+        seen.add(id(conn))
+        db_pool.release_connection(conn)
+
+    for _ in range(10):
+        thread = threading.Thread(target=work)
+        thread.start()
+        thread.join()
+
+    # 每个请求一个新线程（开发服务器）时连接仍然复用
+    assert len(seen) == 1
@@ -0,0 +1,59 @@
+import db_service
+
+QUIZ = {
+    "pages": [{
+        "elements": [
+            {"type": "radiogroup", "name": f"question{i}", "title": f"第{i}题",
+             "choices": ["A", "B", "C"], "correctAnswer": "A"}
+            for i in range(1, 5)
+        ]
+    }]
+}
+
+
+def analysis(error_index):
+    return {
+        "totalQuestions": len(error_index),
+        "correctCount": error_index.count('0'),
+        "incorrectCount": error_index.count('1'),
+        "errorIndex": error_index,
+        "knowledgeAnalysis": "",
+        "incorrectQuestions": [{"userAnswer": "B"} for char in error_index if char == '1'],
+    }
+
+
+def test_quiz_error_rate_is_incorrect_over_submissions_times_questions():
+    assert db_service.quiz_error_rate(2, 4, 4) == 0.5
+    assert db_service.quiz_error_rate(0, 0, 4) == 0
+    assert db_service.quiz_error_rate(3, 0, 0) == 0
+
+
+def test_error_rates_count_only_student_submissions(database):
+    quiz_id = db_service.save_quiz('t-rates', '', '错误率', 'quiz.pdf', QUIZ, 4, 'easy')
+    db_service.save_analysis('s1', quiz_id, analysis("1000"))
+    db_service.save_analysis('s2', quiz_id, analysis("1110"))
+    # 教师自测不计入统计
+    db_service.save_teacher_analysis('t-rates', quiz_id, analysis("1111"))
+
+    rates = db_service.get_quiz_error_rates(quiz_id)
+
+    # 4 个错题 / (2 份提交 × 4 题)
+    assert rates["error_rate"] == 0.5
+    assert rates["question_error_rates"] == [
+        {"question": "1", "correctRate": 0.0},
+        {"question": "2", "correctRate": 0.5},
+        {"question": "3", "correctRate": 0.5},
+    ]
+
+
+def test_backfill_matches_incremental_stats(database):
+    quiz_id = db_service.save_quiz('t-rates', '', '错误率', 'quiz.pdf', QUIZ, 4, 'easy')
+    db_service.save_analysis('s1', quiz_id, analysis("0101"))
+    db_service.save_analysis('s2', quiz_id, analysis("0001"))
+    db_service.save_teacher_analysis('t-rates', quiz_id, analysis("1111"))
+    incremental = db_service.get_quiz_error_rates(quiz_id)
+
+    db_service.backfill_quiz_stats()
+
+    assert db_service.get_quiz_error_rates(quiz_id) == incremental
+    assert incremental["error_rate"] == 3 / 8
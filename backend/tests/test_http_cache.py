@@ -0,0 +1,53 @@
+import db_service
+
+QUIZ = {
+    "pages": [{
+        "elements": [
+            {"type": "radiogroup", "name": "question1", "title": "1 + 1 = ?",
+             "choices": ["1", "2"], "correctAnswer": "2"},
+        ]
+    }]
+}
+
+
+def analysis(error_index):
+    return {
+        "totalQuestions": 1,
+        "correctCount": error_index.count('0'),
+        "incorrectCount": error_index.count('1'),
+        "errorIndex": error_index,
+        "knowledgeAnalysis": "",
+        "incorrectQuestions": [{"userAnswer": "1"}] if error_index == "1" else [],
+    }
+
+
+def test_immutable_quiz_revalidates_with_304(database, client):
+    quiz_id = db_service.save_quiz('t-etag', '', '加法', 'quiz.pdf', QUIZ, 1, 'easy')
+
+    response = client.get(f'/quizzes/{quiz_id}')
+    assert response.status_code == 200
+    assert 'immutable' in response.headers['Cache-Control']
+    etag = response.headers['ETag']
+
+    response = client.get(f'/quizzes/{quiz_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 304
+    assert response.data == b''
+
+
+def test_versioned_etag_changes_after_new_submission(database, client):
+    quiz_id = db_service.save_quiz('t-etag', '', '加法', 'quiz.pdf', QUIZ, 1, 'easy')
+    db_service.save_analysis('s1', quiz_id, analysis("1"))
+
+    response = client.get(f'/error-rates/{quiz_id}')
+    assert response.status_code == 200
+    assert response.headers['Cache-Control'] == 'private, no-cache'
+    etag = response.headers['ETag']
+    assert etag.startswith('W/')
+    assert client.get(f'/error-rates/{quiz_id}', headers={'If-None-Match': etag}).status_code == 304
+
+    # 新提交使该测验的版本号递增，旧 ETag 不再命中
+    db_service.save_analysis('s2', quiz_id, analysis("0"))
+    response = client.get(f'/error-rates/{quiz_id}', headers={'If-None-Match': etag})
+    assert response.status_code == 200
+    assert response.get_json()["error_rate"] == 0.5
+    assert response.headers['ETag'] != etag
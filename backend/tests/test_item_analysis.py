@@ -0,0 +1,49 @@
+import db_service
+from question_rows import correct_options
+
+QUIZ = {
+    "pages": [{
+        "elements": [
+            {"type": "checkbox", "name": "question1", "title": "哪些是质数？",
+             "choices": ["2", "3", "4", "9"], "correctAnswer": ["2", "3"]},
+            {"type": "radiogroup", "name": "question2", "title": "1 + 1 = ?",
+             "choices": ["1", "2", "3"], "correctAnswer": "2"},
+        ]
+    }]
+}
+
+
+def analysis(error_index, user_answers):
+    return {
+        "totalQuestions": len(error_index),
+        "correctCount": error_index.count('0'),
+        "incorrectCount": error_index.count('1'),
+        "errorIndex": error_index,
+        "knowledgeAnalysis": "",
+        "incorrectQuestions": [{"userAnswer": answer} for answer in user_answers],
+    }
+
+
+def test_correct_options_splits_checkbox_key():
+    assert correct_options("checkbox", "2,3") == {"2", "3"}
+    assert correct_options("radiogroup", "2,3") == {"2,3"}
+    assert correct_options("checkbox", None) == set()
+
+
+def test_checkbox_distractors_exclude_every_correct_option(database):
+    quiz_id = db_service.save_quiz('t1', '', '质数', 'quiz.pdf', QUIZ, 2, 'easy')
+    db_service.save_analysis('s1', quiz_id, analysis("10", [["2"]]))
+    db_service.save_analysis('s2', quiz_id, analysis("11", [["2", "4"], "3"]))
+    db_service.save_analysis('s3', quiz_id, analysis("10", [["4"]]))
+    db_service.save_analysis('s4', quiz_id, analysis("00", []))
+
+    result = db_service.get_item_analysis(quiz_id)
+    checkbox, radio = result["questions"]
+
+    assert checkbox["type"] == "checkbox"
+    assert [d["answer"] for d in checkbox["distractors"]] == ["4", "9", "2,4"]
+    assert {d["answer"]: d["count"] for d in checkbox["distractors"]} == {"4": 1, "9": 0, "2,4": 1}
+    assert checkbox["distractors"][0]["rate"] == 0.25
+
+    assert [d["answer"] for d in radio["distractors"]] == ["1", "3"]
+    assert {d["answer"]: d["count"] for d in radio["distractors"]} == {"1": 0, "3": 1}
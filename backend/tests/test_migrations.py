@@ -0,0 +1,118 @@
+import json
+import sqlite3
+
+import pytest
+
+import db_service
+from migrations import MIGRATIONS
+
+# 引入版本化迁移之前 init_database 创建的表结构
+BASELINE_SCHEMA = '''
+CREATE TABLE quizzes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sno TEXT NOT NULL,
+    tno TEXT NOT NULL,
+    title TEXT NOT NULL,
+    file_name TEXT,
+    quiz_json TEXT NOT NULL,
+    question_count INTEGER,
+    difficulty TEXT,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
+);
+CREATE TABLE analysis_results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    sno TEXT NOT NULL,
+    quiz_id INTEGER,
+    analysis_json TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    FOREIGN KEY (quiz_id) REFERENCES quizzes(id) ON DELETE CASCADE
+);
+'''
+
+QUIZ = {
+    "pages": [{
+        "elements": [
+            {"type": "radiogroup", "name": "question1", "title": "函数的导数是什么？",
+             "choices": ["斜率", "面积"], "correctAnswer": "斜率"},
+            {"type": "radiogroup", "name": "question2", "title": "极限存在的条件？",
+             "choices": ["左右极限相等", "函数连续"], "correctAnswer": "左右极限相等"},
+        ]
+    }]
+}
+
+
+def legacy_analysis(error_index, knowledge_analysis):
+    return {
+        "totalQuestions": len(error_index),
+        "correctCount": error_index.count('0'),
+        "incorrectCount": error_index.count('1'),
+        "errorIndex": error_index,
+        "knowledgeAnalysis": knowledge_analysis,
+        "incorrectQuestions": [{"question": "函数的导数是什么？", "correctAnswer": "斜率", "userAnswer": "面积"}
+                               for char in error_index if char == '1'],
+    }
+
+
+def create_baseline_database(path):
+    conn = sqlite3.connect(path)
+    conn.executescript(BASELINE_SCHEMA)
+    conn.execute('''
+    INSERT INTO quizzes (sno, tno, title, file_name, quiz_json, question_count, difficulty)
+    VALUES ('', 't-legacy', '微积分', 'calculus.pdf', ?, 2, 'easy')
+    ''', (json.dumps(QUIZ, ensure_ascii=False),))
+    for sno, error_index in (('s1', '10'), ('s2', '11')):
+        conn.execute('''
+        INSERT INTO analysis_results (sno, quiz_id, analysis_json) VALUES (?, 1, ?)
+        ''', (sno, json.dumps(legacy_analysis(error_index, "导数 极限 导数"), ensure_ascii=False)))
+    conn.commit()
+    conn.close()
+
+
+@pytest.fixture
+def baseline_database(db_path):
+    """含两份学生分析结果的旧版数据库（尚未迁移）"""
+    create_baseline_database(db_path)
+    return db_path
+
+
+def test_baseline_database_upgrades_to_latest_version(baseline_database):
+    db_service.init_database()
+
+    conn = sqlite3.connect(baseline_database)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == MIGRATIONS[-1][0]
+    assert conn.execute("SELECT COUNT(*) FROM analysis_payloads").fetchone()[0] == 2
+    conn.close()
+
+
+def test_upgraded_database_serves_error_rates_and_word_cloud(baseline_database, client):
+    # client 必须在 baseline_database 之后创建：应用首次导入时会执行迁移
+    db_service.init_database()
+
+    response = client.get('/error-rates/1')
+    assert response.status_code == 200
+    # 3 个错题 / (2 份提交 × 2 题)
+    assert response.get_json() == {
+        "error_rate": 0.75,
+        "question_error_rates": [
+            {"question": "1", "correctRate": 0.0},
+            {"question": "2", "correctRate": 0.5},
+        ],
+    }
+
+    response = client.get('/word_cloud/1')
+    assert response.status_code == 200
+    assert {item['text']: item['value'] for item in response.get_json()} == {"导数": 4, "极限": 2}
+
+
+def test_migrations_are_idempotent_on_current_schema(database):
+    quiz_id = db_service.save_quiz('t-legacy', '', '微积分', 'calculus.pdf', QUIZ, 2, 'easy')
+    db_service.save_analysis('s1', quiz_id, legacy_analysis("01", "极限"))
+    before = db_service.get_quiz_error_rates(quiz_id)
+
+    conn = sqlite3.connect(db_service.DB_FILE)
+    conn.execute("PRAGMA user_version = 0")
+    conn.close()
+    db_service.init_database()
+
+    assert db_service.get_quiz_error_rates(quiz_id) == before
+    assert db_service.get_word_frequence_by_qid(quiz_id) == [{"text": "极限", "value": 1}]
@@ -0,0 +1,38 @@
+import db_service
+
+QUIZ = {"pages": [{"elements": [{"type": "text", "name": "question1", "title": "简答"}]}]}
+
+
+def walk(client, url):
+    """按 X-Next-Cursor 逐页读取，返回每页的 id 列表"""
+    pages = []
+    cursor = None
+    while True:
+        response = client.get(url + (f"&cursor={cursor}" if cursor else ""))
+        assert response.status_code == 200
+        pages.append([item['id'] for item in response.get_json()])
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            return pages
+
+
+def test_keyset_pages_cover_every_quiz_once(database, client):
+    # 同一秒内创建的测验 created_at 相同，依靠 id 区分先后
+    ids = [db_service.save_quiz('t-page', 's-page', f'测验{i}', 'quiz.pdf', QUIZ, 1, 'easy')
+           for i in range(5)]
+
+    pages = walk(client, '/auto_quiz?sno=s-page&limit=2')
+    assert pages == [ids[::-1][0:2], ids[::-1][2:4], ids[::-1][4:5]]
+
+    pages = walk(client, '/auto_quiz?sno=s-page&limit=2&sort=created_at')
+    assert sum(pages, []) == ids
+
+
+def test_fields_projection_and_invalid_cursor(database, client):
+    db_service.save_quiz('t-page', 's-page', '测验', 'quiz.pdf', QUIZ, 1, 'easy')
+
+    response = client.get('/auto_quiz?sno=s-page&fields=id,title')
+    assert [set(item) for item in response.get_json()] == [{'id', 'title'}]
+
+    assert client.get('/auto_quiz?sno=s-page&limit=2&cursor=not-a-cursor').status_code == 400
+    assert client.get('/auto_quiz?sno=s-page&fields=quiz_json').status_code == 400
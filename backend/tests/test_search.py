@@ -0,0 +1,47 @@
+import db_service
+
+
+def quiz(*titles):
+    return {"pages": [{"elements": [
+        {"type": "radiogroup", "name": f"question{i}", "title": title, "choices": ["是", "否"], "correctAnswer": "是"}
+        for i, title in enumerate(titles, start=1)
+    ]}]}
+
+
+def test_search_finds_questions_of_the_owner_only(database, client):
+    mine = db_service.save_quiz('t-search', '', '微积分', 'calculus.pdf',
+                                quiz("导数描述函数的变化率", "定积分表示曲边梯形面积"), 2, 'easy')
+    db_service.save_quiz('t-other', '', '微积分', 'calculus.pdf', quiz("导数的几何意义"), 1, 'easy')
+
+    response = client.get('/search?tno=t-search&q=导数')
+    assert response.status_code == 200
+    results = response.get_json()
+    assert [(item['quiz_id'], item['question_no']) for item in results] == [(mine, 1)]
+    assert results[0]['question'] == "导数描述函数的变化率"
+
+    # 测验标题命中时 question_no 为 0
+    results = client.get('/search?tno=t-search&q=微积分').get_json()
+    assert [(item['quiz_id'], item['question_no']) for item in results] == [(mine, 0)]
+
+
+def test_search_pages_with_cursor(database, client):
+    titles = [f"第{i}道关于极限的题目" for i in range(5)]
+    db_service.save_quiz('t-search', '', '极限练习', 'limits.pdf', quiz(*titles), 5, 'easy')
+
+    seen = []
+    cursor = None
+    while True:
+        response = client.get('/search?tno=t-search&q=极限&limit=2' + (f"&cursor={cursor}" if cursor else ""))
+        page = response.get_json()
+        assert len(page) <= 2
+        seen += [(item['quiz_id'], item['question_no']) for item in page]
+        cursor = response.headers.get('X-Next-Cursor')
+        if not cursor:
+            break
+
+    # 5 道题加测验标题，各出现一次
+    assert sorted(seen) == [(1, n) for n in range(6)]
+
+
+def test_search_requires_owner(database, client):
+    assert client.get('/search?q=导数').status_code == 400
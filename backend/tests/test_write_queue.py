@@ -0,0 +1,74 @@
+import sqlite3
+import threading
+
+import pytest
+
+from write_queue import WriteQueue
+
+
+@pytest.fixture
+def path(tmp_path):
+    path = str(tmp_path / "writes.db")
+    conn = sqlite3.connect(path)
+    conn.execute("CREATE TABLE items (id INTEGER PRIMARY KEY, name TEXT UNIQUE)")
+    conn.commit()
+    conn.close()
+    return path
+
+
+def insert(name):
+    def apply(cursor):
+        cursor.execute("INSERT INTO items (name) VALUES (?)", (name,))
+        return cursor.lastrowid
+    return apply
+
+
+def test_concurrent_writes_are_committed_with_their_own_results(path):
+    queue = WriteQueue(window_ms=50, max_size=64)
+    results = {}
+
+    def write(i):
+        results[i] = queue.execute(path, insert(f"item{i}"))
+
+    threads = [threading.Thread(target=write, args=(i,)) for i in range(20)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    conn = sqlite3.connect(path)
+    rows = dict(conn.execute("SELECT name, id FROM items").fetchall())
+    conn.close()
+    # 返回时数据已提交，且每个调用方拿到自己插入行的 id
+    assert rows == {f"item{i}": results[i] for i in range(20)}
+
+
+def test_failed_write_only_rolls_back_itself(path):
+    queue = WriteQueue(window_ms=50, max_size=64)
+    errors = []
+    barrier = threading.Barrier(3)
+
+    def write(name):
+        barrier.wait()
+        try:
+            queue.execute(path, insert(name))
+        except sqlite3.IntegrityError as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=write, args=(name,)) for name in ("a", "b", "a")]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    conn = sqlite3.connect(path)
+    names = sorted(row[0] for row in conn.execute("SELECT name FROM items"))
+    conn.close()
+    assert names == ["a", "b"]
+    assert len(errors) == 1
+
+
+def test_disabled_queue_writes_in_calling_thread(path):
+    queue = WriteQueue(window_ms=0)
+    assert queue.execute(path, insert("direct")) == 1
+    assert queue._thread is None
@@ -0,0 +1,95 @@
+import os
+import time
+import logging
+import threading
+import jieba
+import jieba.analyse
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+STOP_WORDS_FILE = os.path.join(BASE_DIR, 'stop_words.txt')
+# jieba 前缀词典缓存目录，放在项目内以便重启后复用
+JIEBA_CACHE_DIR = os.getenv('JIEBA_CACHE_DIR') or os.path.join(BASE_DIR, '.cache')
+# 课程术语词典（jieba 用户词典格式：每行 "词语 [词频] [词性]"）
+JIEBA_USER_DICT = os.getenv('JIEBA_USER_DICT', '')
+# 分词器预热方式：background（启动后后台加载，默认）、eager（启动时同步加载）、lazy（首次使用时加载）
+TOKENIZER_WARMUP = os.getenv('TOKENIZER_WARMUP', 'background')
+
+PROCESS_START = time.time()
+
+_init_lock = threading.Lock()
+_initialized = False
+_stop_words = None
+_first_word_cloud_recorded = False
+
+
+def get_stop_words():
+    """停用词表（frozenset），首次调用时从模块所在目录加载"""
+    global _stop_words
+    if _stop_words is None:
+        with open(STOP_WORDS_FILE, 'r', encoding='utf-8') as f:
+            _stop_words = frozenset(line.strip() for line in f if line.strip())
+    return _stop_words
+
+
+def initialize():
+    """加载 jieba 词典（优先读取持久化缓存）、课程术语词典和停用词，只执行一次"""
+    global _initialized
+    if _initialized:
+        return
+    with _init_lock:
+        if _initialized:
+            return
+        start = time.time()
+        os.makedirs(JIEBA_CACHE_DIR, exist_ok=True)
+        jieba.dt.tmp_dir = JIEBA_CACHE_DIR
+        jieba.dt.cache_file = 'jieba.cache'
+        jieba.initialize()
+        if JIEBA_USER_DICT:
+            jieba.load_userdict(JIEBA_USER_DICT)
+            logger.info(f"已加载课程术语词典: {JIEBA_USER_DICT}")
+        get_stop_words()
+        _initialized = True
+
+        elapsed = time.time() - start
+        metrics.observe("tokenizer.init_seconds", elapsed)
+        logger.info(f"分词器初始化完成，耗时 {elapsed:.2f} 秒")
+
+
+def warm_up(mode=None):
+    """按 TOKENIZER_WARMUP 在进程启动时预热分词器"""
+    mode = mode or TOKENIZER_WARMUP
+    if mode == 'eager':
+        initialize()
+    elif mode == 'background':
+        threading.Thread(target=initialize, name='tokenizer-warmup', daemon=True).start()
+
+
+def lcut(text):
+    initialize()
+    return jieba.lcut(text)
+
+
+def lcut_for_search(text):
+    """搜索引擎模式分词：在精确分词基础上再切出长词中的短词"""
+    initialize()
+    return jieba.lcut_for_search(text)
+
+
+def extract_keywords(text, top_k=8):
+    """TF-IDF 关键词提取"""
+    initialize()
+    return jieba.analyse.extract_tags(text, topK=top_k)
+
+
+def record_first_word_cloud():
+    """记录进程启动到第一次返回词云的耗时"""
+    global _first_word_cloud_recorded
+    if _first_word_cloud_recorded:
+        return
+    _first_word_cloud_recorded = True
+    elapsed = time.time() - PROCESS_START
+    metrics.observe("startup.time_to_first_word_cloud_seconds", elapsed)
+    logger.info(f"启动后首次返回词云，距进程启动 {elapsed:.2f} 秒")
@@ -0,0 +1,49 @@
+from collections import Counter
+import tokenizer_service
+from analysis_payload import decode_payload
+
+# quiz_word_counts 保存每个测验全部分析结果 knowledgeAnalysis 的词频，供 /word_cloud 直接查询。
+# 保存、回填分析结果时在同一事务中增量更新；迁移与 manage.py 用 rebuild_word_counts 全量重建。
+
+
+def count_words(text):
+    """对分析文本分词并过滤停用词，返回词频 Counter"""
+    if not text:
+        return Counter()
+    stop_words = tokenizer_service.get_stop_words()
+    return Counter(
+        word for word in tokenizer_service.lcut(text)
+        if word.strip() and word not in stop_words
+    )
+
+
+def update_word_counts(cursor, quiz_id, word_counts):
+    """把一份分析的词频（可为负数的增量）累加到 quiz_word_counts"""
+    cursor.executemany('''
+    INSERT INTO quiz_word_counts (quiz_id, word, count)
+    VALUES (?, ?, ?)
+    ON CONFLICT(quiz_id, word) DO UPDATE SET count = count + excluded.count
+    ''', [(quiz_id, word, count) for word, count in word_counts.items() if count])
+    cursor.execute('''
+    DELETE FROM quiz_word_counts WHERE quiz_id = ? AND count <= 0
+    ''', (quiz_id,))
+
+
+def rebuild_word_counts(cursor):
+    """根据已有分析结果重建 quiz_word_counts，返回处理的分析结果数"""
+    rows = cursor.execute('''
+    SELECT ar.quiz_id, p.codec, p.payload
+    FROM analysis_results ar
+    JOIN analysis_payloads p ON p.analysis_id = ar.id
+    WHERE ar.quiz_id IS NOT NULL
+    ''').fetchall()
+
+    per_quiz = {}
+    for quiz_id, codec, payload in rows:
+        knowledge_analysis = decode_payload(codec, payload).get("knowledgeAnalysis", "")
+        per_quiz.setdefault(quiz_id, Counter()).update(count_words(knowledge_analysis))
+
+    cursor.execute("DELETE FROM quiz_word_counts")
+    for quiz_id, word_counts in per_quiz.items():
+        update_word_counts(cursor, quiz_id, word_counts)
+    return len(rows)
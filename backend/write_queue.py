@@ -0,0 +1,131 @@
+import os
+import time
+import queue
+import logging
+import threading
+from concurrent.futures import Future
+from db_pool import get_connection, release_connection
+from metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# 写合并窗口（毫秒）与单个事务最多包含的写操作数，窗口为 0 时在调用线程中直接写入
+WRITE_BATCH_WINDOW_MS = float(os.getenv('WRITE_BATCH_WINDOW_MS', '5'))
+WRITE_BATCH_MAX_SIZE = int(os.getenv('WRITE_BATCH_MAX_SIZE', '64'))
+
+
+class _WriteOp:
+    def __init__(self, path, apply):
+        self.path = path
+        self.apply = apply
+        self.future = Future()
+        self.enqueued_at = time.monotonic()
+
+
+class WriteQueue:
+    """
+    写合并队列：单个写线程从队列中取出写操作，把窗口内到达的操作合并到一个事务中提交。
+
+    每个操作在各自的 SAVEPOINT 中执行，失败时只回滚该操作并把异常交还给对应的调用方；
+    调用方阻塞到所在事务提交后才拿到返回值（如新行 id），因此返回时数据已经持久化。
+    """
+
+    def __init__(self, window_ms=WRITE_BATCH_WINDOW_MS, max_size=WRITE_BATCH_MAX_SIZE):
+        self.window = window_ms / 1000.0
+        self.max_size = max(1, max_size)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._thread = None
+
+    @property
+    def enabled(self):
+        return self.window > 0
+
+    def execute(self, path, apply):
+        """
+        执行写操作 apply(cursor)，在其事务提交后返回 apply 的返回值。
+
+        apply 只能通过传入的 cursor 读写，不能自行 commit/rollback。
+        """
+        op = _WriteOp(path, apply)
+        # 关闭合并或在写线程内部嵌套调用时直接执行，避免等待自己
+        if not self.enabled or threading.current_thread() is self._thread:
+            self._commit(path, [op])
+        else:
+            self._ensure_started()
+            self._queue.put(op)
+        return op.future.result()
+
+    def _ensure_started(self):
+        if self._thread is not None:
+            return
+        with self._lock:
+            if self._thread is None:
+                thread = threading.Thread(target=self._loop, name='db-writer', daemon=True)
+                thread.start()
+                self._thread = thread
+
+    def _loop(self):
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.window
+            while len(batch) < self.max_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            groups = {}
+            for op in batch:
+                groups.setdefault(op.path, []).append(op)
+            for path, ops in groups.items():
+                self._commit(path, ops)
+
+    def _commit(self, path, ops):
+        """在一个事务中依次执行 ops，提交后再回填各自的结果"""
+        started = time.monotonic()
+        for op in ops:
+            metrics.observe("db.write_queue_latency_ms", (started - op.enqueued_at) * 1000)
+        metrics.observe("db.write_batch_size", len(ops))
+
+        results = []
+        conn = None
+        try:
+            conn = get_connection(path)
+            cursor = conn.cursor()
+            cursor.execute("BEGIN IMMEDIATE")
+            for op in ops:
+                cursor.execute("SAVEPOINT write_op")
+                try:
+                    results.append((op, op.apply(cursor), None))
+                    cursor.execute("RELEASE write_op")
+                except Exception as e:
+                    cursor.execute("ROLLBACK TO write_op")
+                    cursor.execute("RELEASE write_op")
+                    results.append((op, None, e))
+            conn.commit()
+        except Exception as e:
+            logger.error(f"批量写入失败，共 {len(ops)} 个操作: {str(e)}")
+            if conn and conn.in_transaction:
+                conn.rollback()
+            metrics.incr("db.write_batch_errors")
+            for op in ops:
+                if not op.future.done():
+                    op.future.set_exception(e)
+            return
+        finally:
+            if conn:
+                release_connection(conn)
+
+        metrics.observe("db.write_commit_ms", (time.monotonic() - started) * 1000)
+        for op, result, error in results:
+            if error is not None:
+                op.future.set_exception(error)
+            else:
+                op.future.set_result(result)
+
+
+writer = WriteQueue()
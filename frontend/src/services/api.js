@@ -80,6 +80,17 @@ export const getQuizById = async (quizId) => {
   }
 };
 
+// 批量获取测验，返回按 quizIds 顺序排列的数组（不存在的测验不返回）
+export const getQuizzesByIds = async (quizIds) => {
+  try {
+    const response = await api.get(`/quizzes/batch?ids=${quizIds.join(',')}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching quizzes:', error);
+    throw error;
+  }
+};
+
 // 获取学生所有测验的分析结果
 export const getAnalyses = async () => {
   try {
@@ -155,6 +166,44 @@ export const getTeacherAnalysisById = async (analysisId) => {
   }
 }
 
+// 在老师自己的测验中搜索题目，返回 { results, nextCursor }
+export const searchQuestions = async (query, cursor) => {
+  try {
+    const tno = getTno();
+    const params = new URLSearchParams({ q: query, tno });
+    if (cursor) params.append('cursor', cursor);
+    const response = await api.get(`/search?${params.toString()}`);
+    return { results: response.data, nextCursor: response.headers['x-next-cursor'] || null };
+  } catch (error) {
+    console.error('Error searching questions:', error);
+    throw error;
+  }
+};
+
+// 批量获取分析结果
+export const getAnalysesByIds = async (analysisIds) => {
+  try {
+    const sno = getSno();
+    const response = await api.get(`/analyses/batch?ids=${analysisIds.join(',')}&sno=${sno}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching analyses:', error);
+    throw error;
+  }
+};
+
+// 批量获取分析结果（教师）
+export const getTeacherAnalysesByIds = async (analysisIds) => {
+  try {
+    const tno = getTno();
+    const response = await api.get(`/teacher_analyses/batch?ids=${analysisIds.join(',')}&tno=${tno}`);
+    return response.data;
+  } catch (error) {
+    console.error('Error fetching analyses:', error);
+    throw error;
+  }
+};
+
 // 生成测验
 export const generateQuiz = async (formData) => {
   try {